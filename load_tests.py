@@ -23,6 +23,15 @@ from tests import test_tp01c
 from tests import test_tp01d
 from tests import test_firme01d
 from tests import test_conso01d
+from tests import test_grille
+from tests import test_population
+from tests import test_ensemble
+from tests import test_balayage
+from tests import test_historique
+from tests import test_observateurs
+from tests import test_banc
+from tests import test_asynchrone
+from tests import test_reprise
 #==================================================#
 
 class Data(object):
@@ -70,7 +79,10 @@ def suite_me(fname):
     suite = unittest.TestSuite()
     for testme in (test_terrain, test_conso, test_firme,
                    test_access, test_distance, test_obstacles,
-                   test_tp01c, test_tp01d, test_firme01d, test_conso01d):
+                   test_tp01c, test_tp01d, test_firme01d, test_conso01d,
+                  test_grille, test_population, test_ensemble,
+                  test_balayage, test_historique, test_observateurs,
+                  test_banc, test_asynchrone, test_reprise):
         try:
             suite.addTest(testme.suite(fname))
         except Exception as _e:
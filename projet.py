@@ -8,11 +8,32 @@ __usage__ = "Projet 2017-2018 Hotelling"
 
 from tools.mmcContainer import intRequired
 from tools.ezCLI import grid as ezCLI_grid
-from tools.mmcContainer import Historique, MultiSet
+from tools.mmcContainer import Historique, MultiSet, LRU, memoize
+from tools.mmcContainer import spy, espionner
+from tools import grille
+from tools import stockage
+from tools import aleas
+from tools.consommateurs import Consommateurs, choix, recompenses, peupler
+from tools.chrono import Chronos
+from tools.bandes import Bandes
 from numbers import Number
+import asyncio
+import inspect
+import os
 import random
 import numpy as np
 
+# les événements de step auxquels on peut s'abonner
+# firme: une firme a agi, consommateurs: la phase consommateurs est
+# finie, tour: le step est fini
+EVENEMENTS = ("firme", "consommateurs", "tour")
+
+# un point de contrôle tous les PERIODE_CONTROLE tours (cf run)
+PERIODE_CONTROLE = 100
+# les paramètres rangés avec un point de contrôle, clientCost est une
+# fonction : elle vient de la configuration du terrain qui reprend
+PARAMETRES_CONTROLE = ("firmePM prixMinimum prixMaximum clientPM "
+                       "clientPreference clientUtility").split()
 
 # from projetIA import RandConso, Consommateur, Firme, PrefConso
 
@@ -62,9 +83,10 @@ class Terrain:
             self.__dmin = min(max(0, dmin), _area - 1)
 
         self.__vicinity = voisinage if isinstance(voisinage, bool) else True
+        self.__dminEffectif = None  # dmin utilisé au dernier placement
 
         # ========== variables à initialiser pour les getters =================#
-        self.__terrain = []
+        self.__conso = None  # les consommateurs, en colonnes
         self.__firmes = []
         self.__cPM = self.__area
         self.__fPM = self.__area
@@ -79,6 +101,23 @@ class Terrain:
         self.__current = None
         self.__Trace = None
         self.__context = None
+        self.__journalises = 0  # tours écrits dans le journal (cf run)
+        self.__fabrique = Historique  # Historique ou HistoriqueFlux
+        self.__abonnes = {e: [] for e in EVENEMENTS}
+        self.__stats = Chronos()  # chronométrage des phases de step
+        # distances pré-calculées, dépendent des obstacles
+        self.__table = None
+        self.__fichierTable = None
+        self.__champs = LRU(64)  # champs de distance par source
+        self.__invalide()
+        self.__bandes = None  # processus de la phase consommateurs
+        self.__delai = None  # délai des décisions asynchrones (arun)
+        self.__depassements = 0
+        # les flux aléatoires, créés au premier tirage (cf rng)
+        self.__graine = None
+        self.__racine = None
+        self.__rng = None
+        self.__places = 0  # nombre de mises en place des firmes
 
     @property
     def lignes(self):
@@ -184,6 +223,51 @@ class Terrain:
 
     clientUtility = property(get_clientUtility, set_clientUtility)
 
+    def get_fabriqueHistorique(self) -> callable:
+        return self.__fabrique
+
+    def set_fabriqueHistorique(self, v) -> None:
+        """ construit l'historique de run à partir de get_structure()
+        ex: functools.partial(HistoriqueFlux, store='gros', tampon=50)
+        """
+        if callable(v): self.__fabrique = v
+
+    fabriqueHistorique = property(get_fabriqueHistorique,
+                                  set_fabriqueHistorique)
+
+    def get_delaiDecision(self):
+        return self.__delai
+
+    def set_delaiDecision(self, v) -> None:
+        """ délai maximal, en secondes, d'une décision asynchrone de
+        firme dans astep/arun, None pas de limite
+        """
+        if v is None: self.__delai = None
+        elif (isinstance(v, Number) and not isinstance(v, bool) and
+              v > 0): self.__delai = v
+
+    delaiDecision = property(get_delaiDecision, set_delaiDecision)
+
+    @property
+    def depassements(self) -> int:
+        """ décisions hors délai depuis le début du dernier run """
+        return self.__depassements
+
+    def get_processus(self) -> int:
+        return 0 if self.__bandes is None else self.__bandes.nb
+
+    @intRequired
+    def set_processus(self, v) -> None:
+        """ nombre de processus pour la phase consommateurs, 0 aucun
+        le terrain est découpé en bandes de lignes, les résultats sont
+        identiques à ceux obtenus sans processus
+        """
+        if v < 0 or v == self.processus: return
+        if self.__bandes is not None: self.__bandes.fermer()
+        self.__bandes = Bandes(v) if v > 0 else None
+
+    processus = property(get_processus, set_processus)
+
     # =====================================================================#
     def __repr__(self):
         return ("{0}({1.lignes}, {1.colonnes}, {1.fini}, {1.obstacles}, "
@@ -206,62 +290,77 @@ class Terrain:
         return i * self.colonnes + j
 
     def posAccess(self, p: int, r: int) -> list:
-        """ les positions accessibles sont obtenues à partir
-            des coordonnées accessibles depuis pos2coord(p)
+        """ les positions accessibles depuis p en au plus r pas """
+        return self.__boule(p, r).tolist()
+
+    @memoize(instance=True)
+    def __boule(self, p: int, r: int) -> np.ndarray:
+        """ posAccess mémorisé, oublié quand les obstacles changent """
+        _b = self.posBoules([p], r, False)[0]
+        _b.setflags(write=False)
+        return _b
+
+    def posBoules(self, centres, rayons, masque: bool = True):
+        """ les cases accessibles depuis chaque centre, lues dans
+        les champs de distance
+        :rayons: un rayon commun ou un rayon par centre
+        :masque: True un tableau booléen (len(centres), lignes*colonnes)
+                 False une liste de tableaux de positions
         """
-        return [self.coord2pos(c)
-                for c in self.coordAccess(self.pos2coord(p), r)]
+        _c = list(centres)
+        _r = np.broadcast_to(np.asarray(rayons), (len(_c),)).tolist()
+        _m = np.zeros((len(_c), self.__area), dtype=bool)
+        for k, (p, r) in enumerate(zip(_c, _r)):
+            if not self.__valide(p) or r < 0: continue  # pas d'accès
+            if self.__bloque[p]:  # on ne sort pas d'un obstacle
+                _m[k, p] = True
+                continue
+            _d = self.champDistance(p)
+            _m[k] = (_d >= 0) & (_d <= r)
+        if masque: return _m
+        return [np.flatnonzero(_x) for _x in _m]
+
+    def posAccessible(self, p: int, q: int, r: int) -> bool:
+        """ q est-elle dans posAccess(p, r) """
+        if not (self.__valide(p) and self.__valide(q)) or r < 0:
+            return False
+        if self.__bloque[p]: return p == q
+        return 0 <= self.champDistance(p)[q] <= r
+
+    def __valide(self, p) -> bool:
+        """ p est une position du terrain """
+        return (isinstance(p, (int, np.integer)) and not isinstance(p, bool)
+                and 0 <= p < self.__area)
 
     @staticmethod
     def adjacent(c: tuple, nbl: int = 1, nbc: int = 5,
                  bound=True,
                  vneumann: bool = True) -> set:
         """ calcul les 4 ou 8 voisins d'une coordonnée """
-        _v = {True: [(-1, 0), (1, 0), (0, -1), (0, 1)],
-              False: [(i, j) for i in (-1, 0, 1) for j in (-1, 0, 1)
-                      if i * j != i + j]}
-        assert len(_v[True]) == 4 and len(_v[False]) == 8, _v
-
         x, y = c
-        if bound:
-            _o = set([(x + dx, y + dy) for dx, dy in _v[vneumann]
-                      if x + dx in range(nbl) and y + dy in range(nbc)])
-        else:
-            _o = set([((x + dx) % nbl, (y + dy) % nbc)
-                      for dx, dy in _v[vneumann]])
-            _o.discard(c)  # peut arriver dans monde linéaire
-        return _o
+        if not (0 <= x < nbl and 0 <= y < nbc):
+            # hors du terrain, pas de table : calcul direct
+            _d = [(i, j) for i in (-1, 0, 1) for j in (-1, 0, 1)
+                  if (i, j) != (0, 0) and (not vneumann or i * j == 0)]
+            if bound:
+                return set((x + dx, y + dy) for dx, dy in _d
+                           if 0 <= x + dx < nbl and 0 <= y + dy < nbc)
+            return set(((x + dx) % nbl, (y + dy) % nbc) for dx, dy in _d)
+        _v = grille.voisins(nbl, nbc, bound, vneumann)
+        return set(divmod(q, nbc) for q in _v[x * nbc + y].tolist()
+                   if q >= 0)
 
     def coordAccess(self, c: tuple, r: int) -> list:
         """ parcours en largeur d'abord jusqu'à la profondeur r """
-        if self.coord2pos(c) is None: return []  # pas valide
-        if r < 0: return []  # pas d'accès
-        _rep = set([c])  # le point de départ est accessible
-        _todo = [c]  # les sommets à explorer
-        _seen = set([])  # les sommets déjà explorer
-        for i in range(r):
-            _s = set([])  # les sommets accessibles à la profondeur suivante
-            while _todo != []:
-                x = _todo.pop()
-                if x in _seen: continue  # déjà vu
-                # (on gère ici les obstacles attention ce sont des pos)
-                if self.coord2pos(x) in self.__posObstacles: continue
-                _seen.add(x)
-                # print("visite de {}".format(x))
-                _s.update(self.adjacent(x, self.lignes, self.colonnes,
-                                        self.fini, self.voisinage))
-                # si on ne voulait pas les obstacles
-                # _s.update( [_ for _ in self.adjacent(x, self.lignes,
-                #                                 self.colonnes,
-                #                        self.fini, self.voisinage)
-                #            if self.coord2pos(_) not in self.__posObstacles
-                #            ] )
-            _rep.update(_s)
-            _todo = list(_s)
-        return list(_rep)
+        _p = self.coord2pos(c)
+        if _p is None: return []  # pas valide
+        return [self.pos2coord(q) for q in self.posAccess(_p, r)]
 
+    @memoize(instance=True)
     def posDistance(self, p: int, q: int) -> int:
-        """ distance entre deux positions """
+        """ distance entre deux positions, oubliée quand les obstacles
+        changent
+        """
         return self.coordDistance(self.pos2coord(p),
                                   self.pos2coord(q))
 
@@ -272,6 +371,62 @@ class Terrain:
         else:
             return self.__withObs(c1, c2)
 
+    def posDistances(self, positions) -> np.ndarray:
+        """ distances entre chaque case et chacune des positions
+        @return un tableau (lignes*colonnes, len(positions)) de float,
+        np.inf si la position est inaccessible
+        """
+        _p = list(positions)
+        if self.obstacles == 0:
+            return grille.ecarts(self.lignes, self.colonnes, self.fini,
+                                 self.voisinage, _p).astype(float)
+        _d = np.empty((self.__area, len(_p)), dtype=float)
+        for k, q in enumerate(_p):  # la distance est symétrique
+            _d[:, k] = self.champDistance(q)
+        _d[_d < 0] = np.inf
+        return _d
+
+    def champDistance(self, p: int, r: int = None) -> np.ndarray:
+        """ distances depuis la position p vers toutes les cases
+        :r: profondeur maximale du parcours (None pas de limite)
+        @return un tableau (lignes*colonnes,) d'int32, -1 si inaccessible
+        """
+        _d = self.__champs.get(p)
+        if _d is None:
+            _d = self.__champ(p)
+            _d.setflags(write=False)  # partagé par tous les appelants
+            self.__champs.put(p, _d)
+        if r is None: return _d
+        return np.where(_d > r, -1, _d).astype(np.int32)
+
+    def __champ(self, p: int) -> np.ndarray:
+        """ calcul effectif du champ de distance depuis p """
+        if self.obstacles == 0:
+            return grille.ecarts(self.lignes, self.colonnes, self.fini,
+                                 self.voisinage, [p])[:, 0].astype(np.int32)
+        _t = self.__matrice()
+        if _t is None:
+            _v = grille.voisins(self.lignes, self.colonnes,
+                                self.fini, self.voisinage)
+            return grille.champ(_v, self.__bloque, p)
+        _d = _t[p].astype(np.int32)
+        _d[_t[p] == np.iinfo(_t.dtype).max] = -1
+        return _d
+
+    def get_cacheChamps(self) -> int:
+        return self.__champs.capacite
+
+    def set_cacheChamps(self, v) -> None:
+        """ nombre maximal de champs de distance conservés """
+        self.__champs.capacite = v
+
+    cacheChamps = property(get_cacheChamps, set_cacheChamps)
+
+    @property
+    def statsChamps(self) -> dict:
+        """ succès, échecs, évictions du cache des champs """
+        return self.__champs.stats
+
     def __sansObs(self, c1: tuple, c2: tuple) -> int:
         """ fonctionne dans un monde sans obstacle """
         x, y = c1
@@ -291,38 +446,55 @@ class Terrain:
                        min(M1 - m1, m1 + self.colonnes - M1))
 
     def __withObs(self, c1: tuple, c2: tuple) -> int:
-        """ pour un monde avec obstacle, parcours en largeur 
-        On doit trouver le même résultat lorsque les obstacles 
-        ne sont pas affecter
+        """ pour un monde avec obstacle, lecture dans la matrice
+        des distances si elle est disponible, parcours sinon
         """
         if c1 == c2: return 0
-        found = False
-        pf = 0
-        _0 = set([c1])  # en cours d'exploration
-        _1 = set([])  # vu
-        while not found and _0 != set([]):
-            _2 = set([])
-            pf += 1
-            for x in _0:
-                _3 = self.adjacent(x, self.lignes,
-                                   self.colonnes, self.fini,
-                                   self.voisinage)
-                if c2 in _3:
-                    found = True
-                    break
-                _2.update([_ for _ in _3
-                           if (_ not in _1 and
-                               self.coord2pos(_) not in self.__posObstacles)])
-            _1.update(_0)  # les vus
-            _0 = _2  # les nouveaux à faire
-        if not found: return
-        return pf
+        p, q = self.coord2pos(c1), self.coord2pos(c2)
+        if p is None or q is None: return
+        _t = self.__matrice()
+        _v = self.champDistance(p)[q] if _t is None else _t[p, q]
+        if _t is None and _v < 0: return
+        if _t is not None and _v == np.iinfo(_t.dtype).max: return
+        return int(_v)
+
+    def __matrice(self):
+        """ la matrice courante, construite si sa taille le permet """
+        if self.__table is None:
+            _sz = self.__area ** 2 * grille.typeDistance(self.__area).itemsize
+            if self.__fichierTable is None and _sz > grille.TAILLE_TABLE:
+                return
+            self.matriceDistances(self.__fichierTable)
+        return self.__table
+
+    def matriceDistances(self, fichier: str = None) -> np.ndarray:
+        """ matrice des distances entre toutes les positions
+        construite une fois par disposition des obstacles
+        :fichier: memmap sur disque (.npy) pour les grands terrains
+        la valeur maximale du type code l'inaccessibilité
+        """
+        if self.__table is None or fichier != self.__fichierTable:
+            self.__fichierTable = fichier
+            _v = grille.voisins(self.lignes, self.colonnes,
+                                self.fini, self.voisinage)
+            self.__table = grille.matrice(_v, self.__bloque, fichier)
+        return self.__table
+
+    def __invalide(self) -> None:
+        """ les obstacles ont changé, les distances sont à refaire """
+        self.__table = None
+        self.__champs.clear()
+        self.posDistance.invalidate(objet=self)
+        self.__boule.invalidate(objet=self)
+        self.__bloque = np.zeros(self.__area, dtype=bool)
+        self.__bloque[self.__posObstacles] = True
 
     # 01b
     def __placementFirmes(self) -> list:
         """ s'occupe du placement des firmes seulement """
         # print("f")
         _dmin = self.__dmin
+        self.__dminEffectif = None
         _msg = "dmin changed to {} will be reset to {}"
         _0 = set(range(self.__area))
         _0.difference_update(self.__posObstacles)
@@ -338,37 +510,54 @@ class Terrain:
                 _M = [x for x in _2 if x in _0]
                 # possibilités de pb pour 2 lignes
                 _1 = [min(_m), max(_m), min(_M), max(_M)]
-                if self.firmes == 3: _1 = random.sample(_1, 3)
+                if self.firmes == 3: _1 = self.__tirer(_1, 3)
         else:
             _1 = [min(_0)]
+            _D = [self.champDistance(min(_0))]  # distances aux firmes
+            _ok = self.__admissibles(_1, _D)
             while len(_1) != self.firmes:
-                _2 = set(_0)
-                _i = len(_1)
-                while _i < self.firmes and _2 != set([]):
-                    _a = random.sample(_2, 1)[0]
-                    _ok = True
-                    for x in _1:
-                        if self.posDistance(x, _a) is None: continue
-                        if self.posDistance(x, _a) >= self.dmin: continue
-                        _ok = False
-                        break
-                    if _ok:
-                        _1.append(_a)
-                        _i += 1
-                    _2.discard(_a)
-                if _i < self.firmes:
+                if not _ok.any():
+                    # dmin == 0 laisse toutes les cases libres restantes
+                    if self.__dmin == 0:
+                        self.__dmin = _dmin
+                        raise ValueError("not enough room for firms")
                     self.__dmin = round(self.__dmin / 2)
                     if __debug__: print(_msg.format(self.dmin, _dmin))
+                    _ok = self.__admissibles(_1, _D)
+                    continue
+                _a = int(self.rng.choice(np.flatnonzero(_ok)))
+                _1.append(_a)
+                _D.append(self.champDistance(_a))
+                _ok &= (_D[-1] < 0) | (_D[-1] >= self.dmin)
+                _ok[_a] = False
+            self.__dminEffectif = self.__dmin
 
         self.__dmin = _dmin  # on remet en état
         return _1
 
+    def __admissibles(self, positions: list, champs: list) -> np.ndarray:
+        """ masque des cases libres à au moins dmin de chaque firme
+        -1 : inaccessible, pas de contrainte
+        """
+        _ok = ~self.__bloque
+        _ok[positions] = False
+        for _d in champs: _ok &= (_d < 0) | (_d >= self.dmin)
+        return _ok
+
+    @property
+    def dminEffectif(self) -> int:
+        """ le dmin respecté lors du dernier placement sur un tore
+        None si aucun placement contraint n'a eu lieu
+        """
+        return self.__dminEffectif
+
     def __str__(self):
         """ utilisation de la méthode grid """
-        if not self.__terrain:
+        if self.__conso is None:
             l = ['?' for _ in range(self.__area)]
         else:
-            l = ['X' if _ is None else str(_) for _ in self.__terrain]
+            l = ['X' if _ is None else str(_)
+                 for _ in map(self.getConsommateur, range(self.__area))]
         if self.__firmes:
             for f, p in self.__firmes: l[p] = str(f)
         m = [l[i * self.colonnes:(i + 1) * self.colonnes]
@@ -381,7 +570,8 @@ class Terrain:
         for f, p in self.__firmes:
             _str += "{!r:<20} en {:02d}\n".format(f, p)
         _str += "====== conso (repr) + position =====\n"
-        for i, x in enumerate(self.__terrain):
+        for i in range(self.__area if self.__conso is not None else 0):
+            x = self.getConsommateur(i)
             if x is None:
                 _str += "{:<20} en {:02d}\n".format("XX" * 5, i)
             else:
@@ -400,8 +590,14 @@ class Terrain:
         return -1
 
     def getConsommateur(self, idx: int):
-        if not self.__terrain: return
-        if idx in range(self.__area): return self.__terrain[idx]
+        """ l'objet consommateur en idx, construit au premier accès """
+        if self.__conso is None: return
+        if idx in range(self.__area): return self.__conso.agent(idx)
+
+    @property
+    def consommateurs(self) -> Consommateurs:
+        """ les consommateurs en colonnes (None avant reset) """
+        return self.__conso
 
     def getObstacles(self) -> list:
         return self.__posObstacles[:]
@@ -411,8 +607,8 @@ class Terrain:
         # on construit les cases accessibles
         _ok = set(range(self.__area))
         # on pioche des places sans obstacles
-        _ok = random.sample(_ok.difference(self.__posObstacles),
-                            self.firmes)
+        _ok = self.__tirer(sorted(_ok.difference(self.__posObstacles)),
+                           self.firmes)
         _i = 0
         self.__firmes = []
 
@@ -431,6 +627,7 @@ class Terrain:
             _p = _ok[k]
             self.__firmes.append((_f, _p))
             k += 1
+        self.__doterFirmes()
 
     def setTerrain(self, obstacles) -> bool:
         """ obstacles est supposée une liste de positions """
@@ -448,8 +645,9 @@ class Terrain:
         if _missing > 0:
             _0 = list(range(self.__area))
             for x in _o: _0.remove(x)
-            _o.extend(random.sample(_0, _missing))
+            _o.extend(self.__tirer(_0, _missing))
         self.__posObstacles = _o[:self.obstacles]
+        self.__invalide()
 
         return _ok and (_missing == 0)
 
@@ -471,19 +669,23 @@ class Terrain:
         _d['firm_position'] = [self.getPosFirme(i)
                                for i in range(self.firmes)]
         _d['cons_preference'] = _0 = {}
-        for i in range(self.__area):
-            _1 = self.getConsommateur(i)
-            if _1 is None: continue
-            _0[i] = _1.preference, _1.estFixe
+        if self.__conso is None: return _d
+        for i in np.flatnonzero(~self.__conso.bloque).tolist():
+            _0[i] = (self.__conso.preference[i].tolist(),
+                     bool(self.__conso.estFixe[i]))
         return _d
 
     def get_finalState(self):
         """ le contexte + consommateur pref """
         _d = {}
         _d['contexte'] = self.__context
-        _d['cons_preference'] = [(None if self.getConsommateur(i) is None
-        else self.getConsommateur(i).preference)
-                                 for i in range(self.__area)]
+        if self.__conso is None:
+            _d['cons_preference'] = [None] * self.__area
+            return _d
+        _d['cons_preference'] = [(None if _b else _p)
+                                 for _b, _p in
+                                 zip(self.__conso.bloque.tolist(),
+                                     self.__conso.preference.tolist())]
         return _d
 
     # ================================================================#
@@ -511,16 +713,17 @@ class Terrain:
                           del_population, "population de consommateurs")
 
     # 01d
+    @spy
     def resetTerrain(self) -> None:
         """
-        self.__terrain [] -> rien
+        self.__conso   None -> rien
         self.__firmes  [] -> rien
         """
-        if self.obstacles != 0 and self.__terrain != []:
+        if self.obstacles != 0 and self.__conso is not None:
             # nouvelles positions obstacles & consommateurs
-            random.shuffle(self.__terrain)
-            self.__posObstacles = [_ for _ in range(self.__area)
-                                   if self.__terrain[_] is None]
+            self.__conso.permute(self.rng.permutation(self.__area))
+            self.__posObstacles = np.flatnonzero(self.__conso.bloque).tolist()
+            self.__invalide()
         if self.__firmes:
             # nouvelles positions des firmes
             _1 = self.__placementFirmes()
@@ -532,30 +735,15 @@ class Terrain:
         """
         if (self.obstacles > 0 and
                 self.obstacles != len(self.__posObstacles)):
-            self.__posObstacles = random.sample(range(self.__area),
-                                                self.obstacles)
+            self.__posObstacles = self.__tirer(range(self.__area),
+                                               self.obstacles)
+            self.__invalide()
 
         if self.population == set([]): self.population = []
-        pf = [1 for _ in range(self.firmes)]
-        if self.clientPreference < 2: flag = True
-        if self.clientPreference == 2: flag = False
-        _c = []
-        for x, i in self.population:
-            _c.extend([x, ] * i)
-        random.shuffle(_c)
-        i = 0
-        while i < self.__area:
-            if i in self.__posObstacles:
-                self.__terrain.append(None)
-                i += 1
-                continue
-            klass = _c.pop()
-            _0 = klass(self.clientCost, pf[:],
-                       bool(random.range(2)) \
-                           if self.clientPreference == 3 else flag,
-                       self.clientUtility, self.clientPM)
-            self.__terrain.append(_0)
-            i += 1
+        self.__conso = peupler(self.__pop, self.__bloque, self.firmes,
+                               self.clientPreference, self.clientUtility,
+                               self.clientPM, self.clientCost, self.rng)
+        self.__conso.semer(aleas.enfant(self.__racine, aleas.CONSOMMATEURS))
 
     def resetAgents(self, freset: bool = True, creset: bool = True) -> None:
         """ appel le reset de chaque agent """
@@ -563,26 +751,29 @@ class Terrain:
             for i in range(self.firmes):
                 _f = self.getFirme(i)
                 if hasattr(_f, 'reset'): _f.reset()
-        if creset:
-            for i in range(self.__area):
-                _c = self.getConsommateur(i)
+        if creset and self.__conso is not None:
+            # seuls les objets déjà construits ont un état à remettre
+            self.__conso.rayon[:] = 0
+            for _, _c in self.__conso.agents():
                 if hasattr(_c, 'reset'): _c.reset()
 
+    @spy
     def reset(self) -> None:
         """ réinitialise la configuration du terrain et les listes 
         self.__firmes
-        self.__terrain
+        self.__conso
         """
         # quand rien n'existe, on fait à l'ancienne
-        if not self.__terrain:
+        if self.__conso is None:
             # self.__firmes != []
             self._generateConsommateurs()
         if not self.__firmes:
-            # self.__terrain != []
+            # self.__conso is not None
             _1 = self.__placementFirmes()
             self.__firmes = [(Firme(self.firmePM,
                                     self.prixMinimum,
                                     self.prixMaximum), p) for p in _1]
+            self.__doterFirmes()
 
         self.resetAgents()
         self.resetTerrain()
@@ -591,122 +782,286 @@ class Terrain:
         self.__Trace = None
         self.__context = None
 
+    # ======================== aléas ==========================#
+    @property
+    def graine(self) -> int:
+        """ la graine des flux aléatoires de la simulation
+        None: tirée de random et np.random au premier tirage
+        """
+        return self.__graine
+
+    @graine.setter
+    def graine(self, v: int) -> None:
+        """ repart des flux de la graine v, même sans changement """
+        if v is not None:
+            if isinstance(v, bool) or not isinstance(v, int) or v < 0: return
+        self.__graine = v
+        self.__semer()
+
+    @property
+    def rng(self) -> np.random.Generator:
+        """ le générateur du terrain : placements, tirages au sort """
+        if self.__rng is None: self.__semer()
+        return self.__rng
+
+    def __semer(self) -> None:
+        """ un flux pour le terrain, un par firme, un pour les
+        consommateurs, cf tools.aleas
+        """
+        self.__racine = aleas.sequence(self.__graine)
+        self.__rng = aleas.flux(self.__racine, aleas.TERRAIN)
+        self.__places = 0
+        self.__doterFirmes()
+        if self.__conso is not None:
+            self.__conso.semer(aleas.enfant(self.__racine,
+                                            aleas.CONSOMMATEURS))
+
+    def __doterFirmes(self) -> None:
+        """ à la n-ième mise en place, la firme idx reçoit le flux
+        (FIRMES, n, idx) : une nouvelle firme ne rejoue pas les tirages
+        de celle qu'elle remplace
+        """
+        if self.__rng is None: self.__semer() ; return
+        self.__places += 1
+        for i, (f, _) in enumerate(self.__firmes):
+            f.rng = aleas.flux(self.__racine, aleas.FIRMES, self.__places, i)
+
+    def __tirer(self, valeurs, k: int) -> list:
+        """ k valeurs distinctes, dans un ordre aléatoire """
+        _v = list(valeurs)
+        return [_v[i] for i in self.rng.permutation(len(_v))[:k].tolist()]
+
+    @property
+    def stats(self) -> Chronos:
+        """ durées des phases de step, t.stats.actif = True pour mesurer """
+        return self.__stats
+
+    # ======================== observateurs ==========================#
+    def abonner(self, evenement: str, fn: callable) -> None:
+        """ fn(terrain, data) sera appelée à chaque evenement
+        data est un dictionnaire propre à l'événement
+        """
+        if evenement not in EVENEMENTS:
+            raise ValueError("unknown event {}".format(evenement))
+        if callable(fn) and fn not in self.__abonnes[evenement]:
+            self.__abonnes[evenement].append(fn)
+
+    def desabonner(self, evenement: str, fn: callable) -> None:
+        if fn in self.__abonnes.get(evenement, []):
+            self.__abonnes[evenement].remove(fn)
+
+    def __publier(self, evenement: str, **data) -> None:
+        """ rien n'est calculé pour un événement sans abonné """
+        for fn in self.__abonnes[evenement][:]: fn(self, data)
+
+    @spy
     def __corpAction(self, idx: int) -> tuple:
         """ demande à la firme idx sont choix et fait les contrôles 
         @return new_coord, prix
         """
+        return self.__appliquer(idx,
+                                self.getFirme(idx).getDecision(self.__context))
+
+    async def __corpActions(self, indices: list) -> dict:
+        """ les décisions asynchrones des firmes sont attendues ensemble,
+        au plus delaiDecision secondes chacune, les autres sont
+        appelées directement
+        @return {idx: (new_coord, prix)}
+        """
+        _att, _dec = {}, {}
+        _retard = set()
+        try:
+            for i in indices:
+                _d = self.getFirme(i).getDecision(self.__context)
+                if inspect.isawaitable(_d):
+                    _att[i] = asyncio.ensure_future(_d)
+                else:
+                    _dec[i] = _d
+            # seul le délai est rattrapé, les erreurs des firmes remontent
+            if _att:
+                _, _retard = await asyncio.wait(_att.values(),
+                                                timeout=self.__delai)
+        finally:
+            # hors délai ou en cas d'erreur, aucune tâche ne reste en vol
+            _vol = [_t for _t in _att.values() if not _t.done()]
+            for _t in _vol: _t.cancel()
+            await asyncio.gather(*_vol, return_exceptions=True)
+            for _t in _att.values(): # erreurs lues, sans avertissement
+                if not _t.cancelled(): _t.exception()
+        for i, _t in _att.items():
+            if _t in _retard:
+                # hors délai : la firme reste en place, au même prix
+                self.__depassements += 1
+                _p = self.__choix.get(i)
+                _dec[i] = (0, 0), (self.getFirme(i).prixMaxi if _p is None
+                                   else _p[1])
+            else:
+                _dec[i] = _t.result()
+        return {i: self.__appliquer(i, _dec[i]) for i in indices}
+
+    def __appliquer(self, idx: int, decision: tuple) -> tuple:
+        """ contrôle la décision de la firme idx et la réalise
+        @return new_coord, prix
+        """
         _corp = self.getFirme(idx)
-        (dx, dy), prix = _corp.getDecision(self.__context)
-        print("Im {}: mvt {},{}, prix {}".format(_corp.__class__.__name__,
-                                                 dx, dy, prix))
+        (dx, dy), prix = decision
+        if self.__abonnes['firme']:
+            self.__publier('firme', idx=idx, decision=((dx, dy), prix))
         x, y = self.pos2coord(self.getPosFirme(idx))
         nx, ny = x + dx, y + dy
         if not self.fini:
             nx = nx % self.lignes
             ny = ny % self.colonnes
-        np = self.coord2pos((nx, ny))
-        if np is None or np in self.getObstacles():
+        _p = self.coord2pos((nx, ny))
+        if _p is None or self.__bloque[_p]:
             # sort du terrain ou tombe sur un obstacle
             return (x, y), prix
-        if self.coordDistance((x, y), (nx, ny)) > _corp.pm:
+        if not self.posAccessible(self.getPosFirme(idx), _p, _corp.pm):
             # déplacement excessif
             return (x, y), prix
-        self.__firmes[idx] = self.__firmes[idx][0], np
+        self.__firmes[idx] = self.__firmes[idx][0], _p
         return (nx, ny), prix
 
-    def __consumerAction(self, idx: int, dist: np.array) -> tuple:
+    @spy
+    def __consumerPhase(self) -> tuple:
         """ 
-        On détermine le reward
+        Tous les consommateurs choisissent en même temps
+        On détermine les rewards
         On fait l'updateModel
-        @return un vecteur de booléen + choix + récompense
+        @return quantités par firme + choix par case + récompense par case
         """
-        _consumer = self.getConsommateur(idx)
-        _1 = _consumer.getDecision()
-        # print("\nc{:03d} {}".format(idx, _consumer), end=' -> ')
-        rayon = _consumer.getDecision()
-        _vrai = dist <= rayon
-        _who = dist[_vrai]
-        # print(rayon, _vrai, _who, _who.size, end='|')
-        _2 = np.array(_consumer.preference)
+        _c = self.__conso
+        _ch = self.__stats
+        _t = _ch.top()
+        _i = np.flatnonzero(~_c.bloque)
+        _absent = [self.__choix[_] is None for _ in range(self.firmes)]
         _prices = np.array([(np.inf if self.__choix[_] is None
-        else self.__choix[_][1])
-                            for _ in range(self.firmes)])
-        if _vrai.sum() > 1:  # on doit effectuer un deuxième choix
-            _3 = (1 - _2 / _2.sum())
-            _4 = _3 * _prices
-            _vrai = _4 == _4.min()
-            # print(0, end='', flush=True)
-        if _vrai.sum() > 1:
-            _vrai = _2 == _2.max()  # ; print(1, end='', flush=True)
-        if _vrai.sum() > 1:
-            _vrai = _prices == _prices.min()  # ; print(2, end='', flush=True)
-        if _vrai.sum() > 1:
-            _vrai = dist == dist.min()  # ; print(3, end='', flush=True)
-        if _vrai.sum() > 1:
-            k = np.random.choice(np.arange(self.firmes)[_vrai])
-            _vrai ^= _vrai
-            _vrai[k] = True  # ; print(4, end='', flush=True)
-
-        assert _vrai.sum() <= 1, "oddities"
-
-        # on peut calculer le vecteurs des informations
-        _penalty = np.float(- _consumer.cout(rayon) - 1e-3)
-        _rew = _vrai * (_2 / _2.mean()) * \
-               (np.float(_consumer.utilite) - _prices) \
-               + _penalty
-        # On corrige les np.nan
-        _rew = np.where(np.isnan(_rew), _penalty, _rew)
-
-        if not isinstance(_consumer, PrefConso):
-            # on doit calculer l'unique reward pour les classes simples
-            _rew = np.nanmax(_rew)
-
-        _consumer.updateModel(_rew)
-        return _vrai.astype(bool), _1, _rew
-
+                             else self.__choix[_][1])
+                            for _ in range(self.firmes)], dtype=float)
+        _pos = [self.getPosFirme(_) for _ in range(self.firmes)]
+        if self.__bandes is not None:
+            return self.__consumerBandes(_i, _pos, _prices)
+        _D = self.posDistances(_pos)[_i]
+        _D[:, _absent] = np.inf
+        _t = _ch.mesure('distances', _t)
+        rayon = _c.decider()[_i]
+        _2 = _c.preference[_i]
+        _t = _ch.mesure('decisions', _t)
+        _vrai = choix(_D, rayon, _2, _prices, self.rng)
+        _t = _ch.mesure('departage', _t)
+
+        # on peut calculer les vecteurs des informations
+        _rew = recompenses(_vrai, _2, _c.utilite[_i], _prices,
+                           self.__penalites(rayon))
+        _choix, _rc = self.__sortiesConso(_i, rayon, _rew,
+                                          np.nanmax(_rew, axis=1))
+        _t = _ch.mesure('recompenses', _t)
+        _c.apprendre(_rc)
+        _ch.mesure('updateConso', _t)
+        return _vrai.sum(0), _choix, _rc
+
+    def __consumerBandes(self, _i, positions: list, prix) -> tuple:
+        """ __consumerPhase répartie sur les processus de self.__bandes """
+        _c = self.__conso
+        _ch = self.__stats
+        _t = _ch.top()
+        _b = self.__bandes
+        _b.preparer(self.lignes, self.colonnes, self.fini, self.voisinage,
+                    self.firmes)
+        _v = _b.vues
+        _v['position'][:] = positions
+        _v['prix'][:] = prix
+        np.logical_not(_c.bloque, out=_v['libre'])
+        if self.obstacles > 0:  # les champs sont en cache ici
+            _v['distance'][:] = self.posDistances(positions)
+        _t = _ch.mesure('distances', _t)
+        _v['rayon'][:] = _c.decider()
+        _v['preference'][:] = _c.preference
+        rayon = _v['rayon'][_i]
+        _t = _ch.mesure('decisions', _t)
+        _b.choix(self.obstacles == 0, self.rng)
+        _t = _ch.mesure('departage', _t)
+        _v['utilite'][:] = _c.utilite
+        _v['penalite'][_i] = self.__penalites(rayon)
+        _qte = _b.recompenses()
+        _choix, _rc = self.__sortiesConso(_i, rayon, _v['recompense'][_i],
+                                          _v['maximum'][_i])
+        _t = _ch.mesure('recompenses', _t)
+        _c.apprendre(_rc)
+        _ch.mesure('updateConso', _t)
+        return _qte, _choix, _rc
+
+    def __penalites(self, rayons: np.ndarray) -> np.ndarray:
+        """ le coût de chaque rayon, évalué une fois par valeur """
+        _u, _inv = np.unique(rayons, return_inverse=True)
+        return - np.array([self.__conso.cout(int(r)) for r in _u],
+                          dtype=float)[_inv] - 1e-3
+
+    def __sortiesConso(self, _i, rayon, _rew, _max) -> tuple:
+        """ choix et récompense par case, None pour un obstacle
+        l'unique reward pour les classes simples
+        """
+        _c = self.__conso
+        _pc = globals().get('PrefConso', ()) # PrefConso reste à coder
+        _vect = [k for k, K in enumerate(_c.klasses) if issubclass(K, _pc)]
+        _vect = np.isin(_c.classe[_i], _vect)
+        _choix = np.full(self.__area, None, dtype=object)
+        _choix[_i] = rayon.tolist()
+        _rc = np.full(self.__area, None, dtype=object)
+        _rc[_i] = _max.tolist()
+        for k in np.flatnonzero(_vect).tolist():
+            _rc[_i[k]] = np.array(_rew[k])
+        return _choix.tolist(), _rc.tolist()
+
+    @spy
     def step(self, flag: bool) -> None:
         """ flag = True: 
             1 seule firme : self.__current
             self.__choix les choix validés
         """
+        if flag and self.__current is None: return
+        _t0 = self.__stats.top()
+        # 1 les firmes agissent
+        _idx = [self.__current] if flag else range(self.firmes)
+        self.__tour(flag, {_: self.__corpAction(_) for _ in _idx}, _t0)
 
-        def check(idx, val):
-            """ transforme None en une valeur excessive """
-            return np.inf if val is None else val
+    @spy
+    async def astep(self, flag: bool) -> None:
+        """ step, les décisions asynchrones des firmes étant attendues
+        ensemble (cf delaiDecision)
+        """
+        if flag and self.__current is None: return
+        _t0 = self.__stats.top()
+        _idx = [self.__current] if flag else list(range(self.firmes))
+        self.__tour(flag, await self.__corpActions(_idx), _t0)
 
+    def __tour(self, flag: bool, decisions: dict, _t0) -> None:
+        """ la fin de step, les firmes ayant pris leurs décisions """
         # 0 la structure qui sera ajouté dans self.__Trace
         _struct = {key: []
                    for key in ("consommateur", "rewardConso", "rewardFirme")
                    }
         _struct['contexte'] = self.__context
-        # 1 les firmes agissent
+        _ch = self.__stats
         if flag:  # une seule firme agit
-            if self.__current is None: return
-            self.__choix[self.__current] = self.__corpAction(self.__current)
+            self.__choix[self.__current] = decisions[self.__current]
             _struct['firme'] = self.__current, self.__choix[self.__current]
         else:  # toutes agissent
-            self.__choix = {_: self.__corpAction(_)
-                            for _ in range(self.firmes)}
+            self.__choix = decisions
             _struct['firme'] = [self.__choix[_] for _ in range(self.firmes)]
-        print(self)
-        # 2 les consommateurs agissent
-        _qte = np.zeros(self.firmes, dtype=int)
-        for i in range(self.__area):
-            if self.getConsommateur(i) is None:
-                _struct['consommateur'].append(None)
-                _struct['rewardConso'].append(None)
-            else:  # pas obstacle
-                _dist = np.array([(np.inf if self.__choix[_] is None
-                else
-                self.posDistance(i, self.getPosFirme(_)))
-                                  for _ in range(self.firmes)])
-                _dist = np.vectorize(lambda x: check(i, x))(_dist)
-                win, choix, reward = self.__consumerAction(i, _dist)
-                _qte[win] += 1
-                _struct['consommateur'].append(choix)
-                _struct['rewardConso'].append(reward)
-
+        _ch.mesure('firmes', _t0)
+        # 2 les consommateurs agissent, tous ensemble
+        _qte, _struct['consommateur'], _struct['rewardConso'] = \
+            self.__consumerPhase()
+        _t = _ch.top()
+        if self.__abonnes['consommateurs']:
+            self.__publier('consommateurs', quantites=_qte,
+                           consommateur=_struct['consommateur'],
+                           rewardConso=_struct['rewardConso'])
+
+        _t = _ch.mesure('observateurs', _t)
         # 3 les firmes peuvent se mettre à jour
+        _struct['quantites'] = _qte
         _struct['rewardFirme'] = np.round(_qte / _qte.sum(), 4)
         for i in range(self.firmes):
             if self.__choix[i] is None:
@@ -721,29 +1076,165 @@ class Terrain:
         # au cas où l'on souhaiterait faire un step de plus
         # sans utiliser run
         self.__current = (self.__current + 1) % self.firmes
+        _t = _ch.mesure('updateFirmes', _t)
         if self.__Trace is None:
             print("No History available")
         else:
             self.__Trace.store(_struct)
-        # if finalState is present, he has to be corrected
-        self.__Trace.update('finalState', self.get_finalState())
-
-    def run(self, nb: int, flag: bool) -> Historique:
-        """ Doit renvoyer l'historique """
+            # if finalState is present, he has to be corrected
+            if self.__Trace.finalState is not None:
+                self.__Trace.update('finalState', self.get_finalState())
+        _t = _ch.mesure('historique', _t)
+        if self.__abonnes['tour']: self.__publier('tour', struct=_struct)
+        _ch.mesure('observateurs', _t)
+        _ch.mesure('tour', _t0)
+        _ch.finTour()
+
+    @spy
+    def run(self, nb: int, flag: bool, controle: str = None,
+            periode: int = PERIODE_CONTROLE) -> Historique:
+        """ Doit renvoyer l'historique
+        :controle: le fichier des points de contrôle, écrit tous les
+                   periode tours ; s'il existe run reprend là où il
+                   s'est arrêté, il est effacé une fois run fini
+                   les tours sont ajoutés au journal <controle>.trace
+        """
+        for i in range(self.__debutRun(nb, flag, controle), nb):
+            self.__current = i % self.firmes
+            self.step(flag)
+            self.__controle(controle, periode, nb, flag, i + 1)
+        return self.__finRun(controle)
+
+    @spy
+    async def arun(self, nb: int, flag: bool, controle: str = None,
+                   periode: int = PERIODE_CONTROLE) -> Historique:
+        """ run avec astep : h = asyncio.run(t.arun(nb, flag))
+        les firmes dont getDecision est une coroutine sont attendues
+        ensemble, les autres fonctionnent comme avec run
+        """
+        for i in range(self.__debutRun(nb, flag, controle), nb):
+            self.__current = i % self.firmes
+            await self.astep(flag)
+            self.__controle(controle, periode, nb, flag, i + 1)
+        return self.__finRun(controle)
+
+    def __debutRun(self, nb: int, flag: bool, controle: str) -> int:
+        """ @return le nombre de tours déjà faits """
+        if controle is not None and stockage.estArchive(controle):
+            return self.__reprendre(stockage.lire(controle), nb, flag,
+                                    self.__journal(controle))
+        if controle is not None and os.path.isfile(self.__journal(controle)):
+            os.remove(self.__journal(controle))
+        self.__journalises = 0
         self.__context = None
         self.__choix = {_: None for _ in range(self.firmes)}
+        self.__depassements = 0
 
         # création de l'historique
-        self.__Trace = Historique(self.get_structure())
+        self.__Trace = self.__fabrique(self.get_structure())
         self.__Trace.add('initState', self.get_initState())
+        return 0
 
-        for i in range(nb):
-            self.__current = i % self.firmes
-            self.step(flag)
-
+    def __finRun(self, controle: str) -> Historique:
         self.__Trace.add('finalState', self.get_finalState())
+        if controle is not None:
+            for _f in (controle, self.__journal(controle)):
+                if os.path.isfile(_f): os.remove(_f)
         return self.__Trace
 
+    @staticmethod
+    def __journal(controle: str) -> str:
+        """ le fichier des tours d'un point de contrôle """
+        return controle + ".trace"
+
+    def __journaliser(self, fichier: str, tour: int) -> int:
+        """ ajoute au journal les tours joués depuis le dernier ajout
+        @return la taille du journal
+        """
+        _k = self.__journalises + 1
+        _x = {'premier': _k,
+              'tours': [getattr(self.__Trace, "Iter_{}".format(i))
+                        for i in range(_k, tour + 1)]}
+        if _k == 1: _x['initState'] = self.__Trace.initState
+        stockage.ajouter(fichier, _x)
+        self.__journalises = tour
+        return os.path.getsize(fichier)
+
+    def __controle(self, controle: str, periode: int, nb: int,
+                   flag: bool, tour: int) -> None:
+        """ écriture atomique du point de contrôle après tour tours
+        l'historique n'y est pas, seulement la taille du journal
+        """
+        if controle is None or periode < 1: return
+        if tour % periode or tour == nb: return
+        _taille = self.__journaliser(self.__journal(controle), tour)
+        _g = random.getstate()
+        stockage.ecrire(controle, {
+            'version': 1, 'nb': nb, 'flag': flag, 'tour': tour,
+            'dimensions': self.__dimensions(),
+            'obstacles': self.__posObstacles,
+            'dminEffectif': self.__dminEffectif,
+            'parametres': {att: getattr(self, att)
+                           for att in PARAMETRES_CONTROLE},
+            'firmes': [(type(f), stockage.etatObjet(f), p)
+                       for f, p in self.__firmes],
+            'consommateurs': self.__conso.etat(),
+            'contexte': self.__context, 'choix': self.__choix,
+            'depassements': self.__depassements,
+            'graine': self.__graine, 'racine': self.__racine,
+            'rng': self.__rng, 'places': self.__places,
+            'random': (_g[0], np.array(_g[1], dtype=np.int64), _g[2]),
+            'numpy': np.random.get_state(),
+            'journal': _taille})
+
+    def __dimensions(self) -> tuple:
+        return (self.lignes, self.colonnes, self.fini, self.obstacles,
+                self.firmes, self.voisinage)
+
+    def __reprendre(self, etat, nb: int, flag: bool, journal: str) -> int:
+        """ remet le terrain, les agents, les générateurs aléatoires et
+        l'historique dans l'état d'un point de contrôle, l'historique
+        est reconstruit depuis le journal
+        @return le nombre de tours déjà faits
+        """
+        if tuple(etat['dimensions']) != self.__dimensions():
+            raise ValueError("checkpoint made for another terrain {}"
+                             .format(etat['dimensions']))
+        if (etat['nb'], etat['flag']) != (nb, flag):
+            raise ValueError("checkpoint made for run({nb}, {flag})"
+                             .format(**etat))
+        self.__posObstacles = list(etat['obstacles'])
+        self.__invalide()
+        self.__dminEffectif = etat['dminEffectif']
+        for att, v in etat['parametres'].items(): setattr(self, att, v)
+        _old = [f for f, _ in self.__firmes]
+        self.__firmes = [(stockage.objetDepuis(K, _e, _old[i] if i < len(_old)
+                                               else None), p)
+                         for i, (K, _e, p) in enumerate(etat['firmes'])]
+        self.__conso = Consommateurs.reprendre(etat['consommateurs'],
+                                               self.clientCost)
+        self.__context = stockage.detacher(etat['contexte'])
+        self.__choix = stockage.detacher(etat['choix'])
+        self.__depassements = etat['depassements']
+        self.__graine = etat.get('graine')
+        self.__racine = etat.get('racine')
+        self.__rng = etat.get('rng')
+        self.__places = etat.get('places', 0)
+        _g = etat['random']
+        random.setstate((_g[0], tuple(_g[1].tolist()), _g[2]))
+        np.random.set_state(etat['numpy'])
+        # les tours ajoutés après le point de contrôle sont retirés
+        with open(journal, 'ab') as _f: _f.truncate(etat['journal'])
+        self.__Trace = self.__fabrique(self.get_structure())
+        for _off in stockage.enregistrements(journal):
+            _x = stockage.lire(journal, _off)
+            if 'initState' in _x:
+                self.__Trace.add('initState',
+                                 stockage.detacher(_x['initState']))
+            for _t in _x['tours']: self.__Trace.store(stockage.detacher(_t))
+        self.__journalises = etat['tour']
+        return etat['tour']
+
     def simulation(self, nbTour: int = None, ordre: bool = None,
                    firmePM: int = None, prixMini: int = None, prixMaxi: int = None,
                    clientCost: callable = None, clientPref: int = None,
@@ -812,6 +1303,8 @@ class Terrain:
 
 
 class Firme(object):
+    __rng = None  # np.random tant que le terrain n'a pas donné de flux
+
     def __init__(self, pm=None, prixMini=None, prixMaxi=None):
         n, m = Terrain().lignes, Terrain().colonnes
 
@@ -855,6 +1348,15 @@ class Firme(object):
     def prixMedian(self):
         return (self.prixMini + self.prixMaxi) / 2
 
+    @property
+    def rng(self):
+        """ le générateur des décisions, fourni par le terrain """
+        return np.random if self.__rng is None else self.__rng
+
+    @rng.setter
+    def rng(self, v):
+        self.__rng = v
+
     @property
     def prix_actuel(self):
         return self.__prix_actuel
@@ -864,12 +1366,19 @@ class Firme(object):
         if isinstance(prix, (int, float)):
             self.__prix_actuel = min(max(self.__prix_actuel, self.prixMini), self.prixMaxi)
 
+    def __init_subclass__(cls, **kwargs):
+        """ les stratégies dérivées sont espionnées elles aussi """
+        super().__init_subclass__(**kwargs)
+        espionner(cls, 'getDecision', 'updateModel')
+
+    @spy
     def getDecision(self, *args, **kwargs):
         # on reçoit un triplet <coord, qté, prix> * nb_firmes
 
         # on renvoie le déplacement (δx, δy) ainsi que le prix de vente unitaire
         return (0, 0), self.prixMaxi
 
+    @spy
     def updateModel(self, real):
         self.part_de_marche = real
 
@@ -884,15 +1393,18 @@ class RandCorp(Firme):
     """Classe dérivée qui aura un comportement aléatoire, tant dans ses déplacements que dans sa politique de prix."""
 
     @staticmethod
-    def random_deplacement(pm):
-        pm_x = random.randrange(pm + 1)
+    def random_deplacement(pm, rng=None):
+        _r = np.random if rng is None else rng
+        pm_x = int(_r.choice(pm + 1))
         pm_y = pm - pm_x
-        return (random.choice([-1, 1]) * pm_x,
-                random.choice([-1, 1]) * pm_y)
+        _sx, _sy = _r.choice((-1, 1), size=2).tolist()
+        return (_sx * pm_x, _sy * pm_y)
 
     def getDecision(self, *args, **kwargs):
         "de déplace et fixe son prix aléatoirement"
-        return self.random_deplacement(self.pm), random.randint(self.prixMini, self.prixMaxi)
+        return (self.random_deplacement(self.pm, self.rng),
+                self.prixMini + int(self.rng.choice(self.prixMaxi -
+                                                    self.prixMini + 1)))
 
 
 class LowCorp(RandCorp):
@@ -914,7 +1426,8 @@ class LowCorp(RandCorp):
             self.prix_actuel += 1
         else:
             self.prix_actuel = self.prixMini
-        return self.random_deplacement(random.randrange(2)), self.dernier_prix
+        return (self.random_deplacement(int(self.rng.choice(2)), self.rng),
+                self.dernier_prix)
 
 
 class MidCorp(Firme):
@@ -989,7 +1502,7 @@ class AcidCorp(RandCorp):
                 self.prix_actuel -= 1
 
             # on sait pas comment bouger alors on bouge au hasard
-            deplacement = self.random_deplacement(self.pm)
+            deplacement = self.random_deplacement(self.pm, self.rng)
         return deplacement, self.prix_actuel
 
 
@@ -1025,6 +1538,8 @@ class DownCorp(StableCorp):
 
 # =================================================================================================================
 class Consommateur(object):
+    __rng = None  # np.random tant que le terrain n'a pas donné de flux
+
     def __init__(self, cout=None, preference=None, estFixe=None, utilite=None, pm=None):
         n, m = Terrain().lignes, Terrain().colonnes
 
@@ -1081,10 +1596,40 @@ class Consommateur(object):
     def utilite(self):
         return self.__utilite
 
+    @property
+    def rng(self):
+        """ le générateur des décisions, fourni par le terrain """
+        return np.random if self.__rng is None else self.__rng
+
+    @rng.setter
+    def rng(self, v):
+        self.__rng = v
+
+    def __init_subclass__(cls, **kwargs):
+        """ seules les versions groupées sont espionnées,
+        les autres sont appelées une fois par case
+        """
+        super().__init_subclass__(**kwargs)
+        espionner(cls, 'getDecisions', 'updateModels')
+
     def getDecision(self):
         return 0
 
-    def updateModel(self):
+    @classmethod
+    @spy
+    def getDecisions(cls, n: int, rng=None) -> np.ndarray:
+        """ n décisions d'un seul coup
+        :rng: le générateur commun de la population, np.random par défaut
+        """
+        return np.zeros(n, dtype=int)
+
+    def updateModel(self, reward=None):
+        pass
+
+    @classmethod
+    @spy
+    def updateModels(cls, rewards: list) -> None:
+        """ pas de modèle, rien à apprendre """
         pass
 
     def __repr__(self):
@@ -1094,7 +1639,11 @@ class Consommateur(object):
 
 class RandConso(Consommateur):
     def getDecision(self):
-        return random.randrange(10)
+        return int(self.rng.choice(10))
+
+    @classmethod
+    def getDecisions(cls, n: int, rng=None) -> np.ndarray:
+        return (np.random if rng is None else rng).choice(10, size=n)
 
 
 class PlusConso(Consommateur):
@@ -27,6 +27,7 @@ def addID(cls):
 @addID
 class RL:
     """ just a thing """
+    rng = None # Generator used by decision, np.random if None
     def __init__(self, data):
         if not isinstance(data, (tuple, list, np.ndarray)): return
         if not all([isinstance(x, Number) for x in data]): return
@@ -38,20 +39,24 @@ class RL:
         return np.array(self.__state0, dtype=np.float64)
 
     @staticmethod
-    def select(state:np.ndarray) -> int:
-        """ return a random argmax not necessarily the 1st one """
-        return np.random.choice(np.arange(state.size)[state==state.max()])
+    def select(state:np.ndarray, rng=None) -> int:
+        """ return a random argmax not necessarily the 1st one
+        rng: Generator or RandomState, np.random by default
+        """
+        _g = np.random if rng is None else rng
+        return _g.choice(np.arange(state.size)[state==state.max()])
     @staticmethod
-    def greedy(state:np.ndarray, eps:Number) -> int:
+    def greedy(state:np.ndarray, eps:Number, rng=None) -> int:
         """ return a greedy arg and if it's greedy or not """
-        if np.random.rand() > eps: return RL.select(state), True
-        else: return np.random.choice(state.size), False
+        _g = np.random if rng is None else rng
+        if _g.random() > eps: return RL.select(state, rng), True
+        else: return _g.choice(state.size), False
     @staticmethod
-    def softmax(state:np.ndarray, temp:Number) -> int:
+    def softmax(state:np.ndarray, temp:Number, rng=None) -> int:
         """ return a probabilistic arg """
         _s = np.exp(state / temp)
         _s /= _s.sum()
-        _r = np.random.rand()
+        _r = (np.random if rng is None else rng).random()
         _a = 0
         while _a < state.size -1 and _r > _s[_a]:
             _r -= _s[_a] ; _a += 1
@@ -43,7 +43,8 @@ class EGreedy(RL):
         
     def decision(self) -> int:
         """ use the RL method """
-        self.__last, flag = self.greedy(self.state, self.epsilon)
+        self.__last, flag = self.greedy(self.state, self.epsilon,
+                                         self.rng)
         self.__alea += 1 if not flag else 0
         return self.action
 
@@ -59,7 +59,7 @@ class Softmax(RL):
         
     def decision(self) -> int:
         """ use the RL method """
-        self.__last = self.softmax(self.state, self.tau)
+        self.__last = self.softmax(self.state, self.tau, self.rng)
         self.__tau *= self.__alfa
         return self.action
 
@@ -0,0 +1,160 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__usage__ = "Test Hotelling: décisions asynchrones des firmes"
+__version__ = "$Id: test_asynchrone.py,v 1.1 2026/10/18 21:55:03 mmc Exp $"
+
+import asyncio
+import contextlib
+import io
+import os
+import random
+import time
+import unittest
+import numpy as np
+from mmcTools import check_property
+
+"""
+arun attend ensemble les firmes dont getDecision est une coroutine,
+une décision hors délai laisse la firme en place, au même prix
+"""
+
+def lente(attente: float):
+    """ une firme asynchrone qui répond après attente secondes """
+    class Lente(getattr(tp, "Firme")):
+        async def getDecision(self, *args, **kwargs):
+            await asyncio.sleep(attente)
+            return (0, 1), self.prixMini
+    return Lente
+
+def fautive(erreur: type):
+    """ une firme asynchrone dont la décision échoue avec erreur """
+    class Fautive(getattr(tp, "Firme")):
+        async def getDecision(self, *args, **kwargs):
+            raise erreur("firm failure")
+    return Fautive
+
+class TestAsynchrone(unittest.TestCase):
+    """ astep et arun """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        if not hasattr(self.K, "arun"):
+            raise unittest.SkipTest("arun missing")
+
+    def terrain(self, firmes=None):
+        random.seed(11) ; np.random.seed(11)
+        _0 = self.K(6, 8, True, 3, 3, 1, True)
+        _0.population = [(getattr(tp, "RandConso"), 45)]
+        _0.reset()
+        if firmes:
+            _0.setFirmes([(K(), _0.getPosFirme(i))
+                          for i, K in enumerate(firmes)])
+        return _0
+
+    def arun(self, t, nb, flag):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return asyncio.run(t.arun(nb, flag))
+
+    def test_delaiDecision(self):
+        _0 = self.K()
+        self.assertIsNone(_0.delaiDecision, "no limit by default")
+        _0.delaiDecision = .5
+        for v in (0, -1, True, "1"):
+            _0.delaiDecision = v
+            self.assertEqual(_0.delaiDecision, .5, "{} ignored".format(v))
+        _0.delaiDecision = None
+        self.assertIsNone(_0.delaiDecision, "no limit")
+
+    def test_synchrone(self):
+        """ sans coroutine, arun et run donnent le même historique """
+        _K = getattr(tp, "RandCorp")
+        for flag in (False, True):
+            with self.subTest(ordre=flag):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    _1 = self.terrain([_K] * 3).run(5, flag)
+                _2 = self.arun(self.terrain([_K] * 3), 5, flag)
+                for k in range(1, 6):
+                    _a = getattr(_1, "Iter_{}".format(k))
+                    _b = getattr(_2, "Iter_{}".format(k))
+                    self.assertEqual(_a['firme'], _b['firme'], "firms")
+                    self.assertEqual(_a['rewardConso'], _b['rewardConso'])
+
+    def test_concurrence(self):
+        """ les attentes des firmes se recouvrent """
+        _0 = self.terrain([lente(.1)] * 3)
+        _t = time.perf_counter()
+        _h = self.arun(_0, 2, False)
+        self.assertLess(time.perf_counter() - _t, .45, "not concurrent")
+        self.assertEqual(_0.depassements, 0, "no timeout")
+        self.assertEqual([p for _, p in _h.Iter_2['firme']], [1] * 3,
+                         "prixMini expected")
+
+    def test_delai(self):
+        """ hors délai : même place, même prix """
+        _0 = self.terrain([lente(.01), lente(1), getattr(tp, "Firme")])
+        _0.delaiDecision = .2
+        _p = _0.getPosFirme(1)
+        _t = time.perf_counter()
+        _h = self.arun(_0, 2, False)
+        self.assertLess(time.perf_counter() - _t, .9, "no timeout")
+        self.assertEqual(_0.depassements, 2, "one per tour")
+        self.assertEqual(_0.getPosFirme(1), _p, "firm 1 did not move")
+        _f = _h.Iter_1['firme']
+        self.assertEqual(_f[1][1], _0.getFirme(1).prixMaxi, "default price")
+        self.assertEqual(_f[0][1], 1, "firm 0 answered")
+        self.assertEqual(_f[2][1], _0.getFirme(2).prixMaxi, "sync firm")
+
+    def test_erreur(self):
+        """ une erreur de la firme n'est pas un dépassement du délai """
+        for _e in (TimeoutError, ValueError):
+            with self.subTest(erreur=_e.__name__):
+                _0 = self.terrain([lente(.01), fautive(_e),
+                                   getattr(tp, "Firme")])
+                _0.delaiDecision = .5
+                with self.assertRaisesRegex(_e, "firm failure"):
+                    self.arun(_0, 2, False)
+                self.assertEqual(_0.depassements, 0, "no timeout")
+
+    def test_nettoyage(self):
+        """ une firme synchrone en erreur n'abandonne aucune tâche """
+        class Erreur(getattr(tp, "Firme")):
+            def getDecision(self, *args, **kwargs):
+                raise ValueError("sync failure")
+        _0 = self.terrain([lente(5), Erreur, getattr(tp, "Firme")])
+        async def essai():
+            with self.assertRaisesRegex(ValueError, "sync failure"):
+                await _0.arun(2, False)
+            return asyncio.all_tasks() - {asyncio.current_task()}
+        _t = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            _reste = asyncio.run(essai())
+        self.assertEqual(_reste, set(), "pending tasks")
+        self.assertLess(time.perf_counter() - _t, 1, "slow firm awaited")
+
+def suite(fname):
+    """ permet de récupérer les tests à passer avec l'import dynamique """
+    global tp
+    klasses = (TestAsynchrone, )
+    try:
+        tp = __import__(fname)
+    except Exception as _e:
+        print(_e)
+    sweet = unittest.TestSuite()
+    for klass_test in klasses:
+        sweet.addTest(unittest.makeSuite(klass_test))
+    return sweet
+
+if __name__ == "__main__":
+    param = input("quel est le fichier à traiter ? ")
+    if not os.path.isfile(param): ValueError("need a python file")
+
+    etudiant = param.split('.')[0]
+
+    _out = check_property(etudiant != '','acces au fichier')
+    print("tentative de lecture de {}".format(etudiant))
+    tp = __import__(etudiant) # revient à faire import XXX as tp
+
+    unittest.main()
@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__usage__ = "Test Hotelling: balayage des paramètres"
+__version__ = "$Id: test_balayage.py,v 1.1 2026/10/18 16:48:55 mmc Exp $"
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from mmcTools import check_property
+
+"""
+Balayage sans input(), reprise depuis le cache disque
+"""
+
+def carre(x): return x * x
+
+class TestBalayage(unittest.TestCase):
+    """ grille de paramètres """
+    def setUp(self):
+        for att in ("Terrain", "RandConso"):
+            if not hasattr(tp, att):
+                raise unittest.SkipTest("{} missing".format(att))
+        try:
+            from tools import balayage
+        except Exception as _e:
+            raise unittest.SkipTest("balayage: {}".format(_e))
+        self.B = balayage
+        self.spec = dict(lig=5, col=6, borne=True, obstacles=2,
+                         nbFirmes=2, dmin=2)
+        self.pop = [(getattr(tp, "RandConso"), 28)]
+        self.grille = {'nbTour': [4], 'prixMaximum': [10, 20],
+                       'clientCost': [abs, carre]}
+
+    def test_points(self):
+        _1 = self.B.points(self.grille)
+        self.assertEqual(len(_1), 4, "2 x 2 combinations")
+        with self.assertRaises(ValueError):
+            self.B.points({'nbTours': [1]})
+
+    def test_lambda(self):
+        """ une lambda n'a pas de nom stable """
+        with self.assertRaises(ValueError):
+            self.B.cle(self.spec, self.pop, {'clientCost': lambda x: x}, 0)
+
+    def test_reprise(self):
+        with tempfile.TemporaryDirectory() as _d:
+            _1 = self.B.balayage(self.grille, self.spec, self.pop,
+                                 graines=(1, 2), dossier=_d, workers=0)
+            self.assertEqual(len(_1), 8, "4 points x 2 seeds")
+            self.assertFalse(any(x['cache'] for x in _1), "nothing cached")
+            self.assertEqual(len(os.listdir(_d)), 8, "one file per point")
+            # un point perdu est recalculé, les autres sont relus
+            os.remove(os.path.join(_d, _1[0]['cle'] + ".npz"))
+            _2 = self.B.balayage(self.grille, self.spec, self.pop,
+                                 graines=(1, 2), dossier=_d, workers=0)
+            self.assertEqual([x['cache'] for x in _2],
+                             [False] + [True] * 7, "resume expected")
+            for x, y in zip(_1, _2):
+                with self.subTest(point=x['point'], graine=x['graine']):
+                    self.assertEqual(x['cle'], y['cle'], "same key")
+                    self.assertTrue(np.array_equal(x['parts'], y['parts'],
+                                                   equal_nan=True),
+                                    "same shares")
+
+def suite(fname):
+    """ permet de récupérer les tests à passer avec l'import dynamique """
+    global tp
+    klasses = (TestBalayage, )
+    try:
+        tp = __import__(fname)
+    except Exception as _e:
+        print(_e)
+    sweet = unittest.TestSuite()
+    for klass_test in klasses:
+        sweet.addTest(unittest.makeSuite(klass_test))
+    return sweet
+
+if __name__ == "__main__":
+    param = input("quel est le fichier à traiter ? ")
+    if not os.path.isfile(param): ValueError("need a python file")
+
+    etudiant = param.split('.')[0]
+
+    _out = check_property(etudiant != '','acces au fichier')
+    print("tentative de lecture de {}".format(etudiant))
+    tp = __import__(etudiant) # revient à faire import XXX as tp
+
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__usage__ = "Test Hotelling: banc d'essai"
+__version__ = "$Id: test_banc.py,v 1.1 2026/10/18 19:42:16 mmc Exp $"
+
+import copy
+import os
+import unittest
+from mmcTools import check_property
+
+"""
+Scénarios, mesure d'un petit scénario, détection des régressions
+"""
+
+class TestBanc(unittest.TestCase):
+    """ banc d'essai """
+    def setUp(self):
+        if not hasattr(getattr(tp, "Terrain", None), "stats"):
+            raise unittest.SkipTest("Terrain.stats missing")
+        try:
+            from tools import banc
+        except Exception as _e:
+            raise unittest.SkipTest("banc: {}".format(_e))
+        self.B = banc
+
+    def test_scenarios(self):
+        _1 = self.B.scenarios()
+        _n = [self.B.nommer(x) for x in _1]
+        self.assertEqual(len(set(_n)), len(_n), "names should be unique")
+        self.assertIn("300x300-borne-vN-obs0-f2-RandConso", _n)
+        self.assertIn("30x30-tore-vN-obs10-f2-RandConso",
+                      [self.B.nommer(x) for x in self.B.scenarios(True)])
+
+    def test_mesure(self):
+        _sc = dict(self.B.BASE, lig=5, col=6, obstacles=.1)
+        _1 = self.B.mesurer(_sc, 3)
+        self.assertEqual(_1['nom'], "5x6-borne-vN-obs10-f2-RandConso")
+        self.assertGreater(_1['tours_s'], 0, "throughput expected")
+        self.assertGreater(_1['pic_octets'], 0, "peak memory expected")
+        self.assertIn('departage', _1['phases'], "phase breakdown expected")
+
+    def test_regression(self):
+        _ref = {'scenarios': [{'nom': 'a', 'tours_s': 100.,
+                               'pic_octets': 1000}]}
+        _ok = copy.deepcopy(_ref)
+        _ok['scenarios'][0]['tours_s'] = 85.
+        self.assertEqual(self.B.comparer(_ok, _ref, .2), [], "within range")
+        _ko = copy.deepcopy(_ref)
+        _ko['scenarios'][0].update(tours_s=70., pic_octets=1300)
+        self.assertEqual([x[1] for x in self.B.comparer(_ko, _ref, .2)],
+                         ['tours_s', 'pic_octets'], "two regressions")
+
+def suite(fname):
+    """ permet de récupérer les tests à passer avec l'import dynamique """
+    global tp
+    klasses = (TestBanc, )
+    try:
+        tp = __import__(fname)
+    except Exception as _e:
+        print(_e)
+    sweet = unittest.TestSuite()
+    for klass_test in klasses:
+        sweet.addTest(unittest.makeSuite(klass_test))
+    return sweet
+
+if __name__ == "__main__":
+    param = input("quel est le fichier à traiter ? ")
+    if not os.path.isfile(param): ValueError("need a python file")
+
+    etudiant = param.split('.')[0]
+
+    _out = check_property(etudiant != '','acces au fichier')
+    print("tentative de lecture de {}".format(etudiant))
+    tp = __import__(etudiant) # revient à faire import XXX as tp
+
+    unittest.main()
@@ -0,0 +1,200 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__usage__ = "Test Hotelling: répliques en parallèle"
+__version__ = "$Id: test_ensemble.py,v 1.1 2026/10/18 16:02:19 mmc Exp $"
+
+import contextlib
+import io
+import os
+import random
+import unittest
+import numpy as np
+from mmcTools import check_property
+
+"""
+Une graine par réplique : le résultat ne dépend pas du nombre
+de processus utilisés
+"""
+
+class TestEnsemble(unittest.TestCase):
+    """ répliques indépendantes """
+    def setUp(self):
+        for att in ("Terrain", "RandConso", "Consommateur"):
+            if not hasattr(tp, att):
+                raise unittest.SkipTest("{} missing".format(att))
+        try:
+            from tools import ensemble
+        except Exception as _e:
+            raise unittest.SkipTest("ensemble: {}".format(_e))
+        self.E = ensemble
+        self.spec = dict(lig=6, col=8, borne=False, obstacles=3,
+                         nbFirmes=3, dmin=2)
+        self.pop = [(getattr(tp, "RandConso"), 25),
+                    (getattr(tp, "Consommateur"), 20)]
+
+    def test_forme(self):
+        _1 = self.E.ensemble(self.spec, self.pop, 12, False, repliques=3,
+                             graine=5, workers=0)
+        self.assertEqual(len(_1['graines']), 3, "one seed per replica")
+        for key in ('parts', 'prix', 'positions'):
+            with self.subTest(serie=key):
+                self.assertEqual(_1[key].shape, (3, 12, 3), "bad shape")
+        self.assertEqual(_1['partsMoyennes'].shape, (12, 3), "bad shape")
+
+    def test_parametres(self):
+        """ une valeur refusée par Terrain n'est pas simulée """
+        _0 = getattr(tp, "Terrain")(**self.spec)
+        self.E.appliquer(_0, {'clientUtility': 30, 'prixMaximum': 20,
+                              'prixMinimum': 5})
+        self.assertEqual((_0.prixMinimum, _0.prixMaximum, _0.clientUtility),
+                         (5, 20, 30), "order of application")
+        _0.prixMaximum = 10
+        self.E.appliquer(_0, {'prixMinimum': 15, 'prixMaximum': 30})
+        self.assertEqual((_0.prixMinimum, _0.prixMaximum), (15, 30),
+                         "maximum first")
+        for _p in ({'prixMaximum': 60}, {'clientUtility': 0}):
+            with self.subTest(parametres=_p):
+                with self.assertRaises(ValueError):
+                    self.E.replique(self.spec, self.pop, 2, False, 0, _p)
+
+    def test_processus(self):
+        """ même graine, même résultat, en séquentiel ou en parallèle """
+        _1 = self.E.ensemble(self.spec, self.pop, 10, True, repliques=3,
+                             graine=11, workers=0)
+        _2 = self.E.ensemble(self.spec, self.pop, 10, True, repliques=3,
+                             graine=11, workers=2)
+        self.assertEqual(_1['graines'], _2['graines'], "seeds differ")
+        for key in ('parts', 'prix', 'positions'):
+            with self.subTest(serie=key):
+                self.assertTrue(np.array_equal(_1[key], _2[key],
+                                               equal_nan=True),
+                                "{} differ".format(key))
+
+def tireur():
+    """ un consommateur qui décide seul, dans son propre flux """
+    class Tireur(getattr(tp, "Consommateur")):
+        def getDecision(self):
+            return int(self.rng.choice(10))
+    return Tireur
+
+class TestGraine(unittest.TestCase):
+    """ les flux aléatoires propres à chaque terrain """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        if not hasattr(self.K, "graine"):
+            raise unittest.SkipTest("graine missing")
+
+    def simuler(self, graine, globale):
+        """ l'historique d'un terrain de graine graine, les générateurs
+        globaux étant semés par globale
+        """
+        random.seed(globale) ; np.random.seed(globale)
+        _0 = self.K(7, 8, False, 4, 3, 2, True)
+        _0.graine = graine
+        _0.population = [(getattr(tp, "RandConso"), 25),
+                         (getattr(tp, "Consommateur"), 20)]
+        _0.reset()
+        _K = getattr(tp, "RandCorp")
+        _0.setFirmes([(_K(), -1) for _ in range(3)])
+        for i in range(0, 52, 5): _0.getConsommateur(i) # des objets
+        with contextlib.redirect_stdout(io.StringIO()):
+            _h = _0.run(8, False)
+        return _0, [getattr(_h, "Iter_{}".format(k + 1)) for k in range(8)]
+
+    def test_graine(self):
+        _0 = self.K()
+        self.assertIsNone(_0.graine, "no seed by default")
+        _0.graine = 3
+        for v in (-1, True, 2.5, "1"):
+            _0.graine = v
+            self.assertEqual(_0.graine, 3, "{} ignored".format(v))
+        _0.graine = None
+        self.assertIsNone(_0.graine, "back to global seeding")
+
+    def test_independance(self):
+        """ même graine, même simulation, quels que soient random et
+        np.random
+        """
+        _t1, _1 = self.simuler(4, 1)
+        _t2, _2 = self.simuler(4, 2)
+        self.assertEqual(_t1.getObstacles(), _t2.getObstacles())
+        for x, y in zip(_1, _2):
+            self.assertEqual(x['firme'], y['firme'], "firms")
+            self.assertEqual(x['consommateur'], y['consommateur'])
+            self.assertEqual(x['rewardConso'], y['rewardConso'])
+        _t3, _3 = self.simuler(5, 1)
+        self.assertNotEqual([x['firme'] for x in _1],
+                            [x['firme'] for x in _3], "seed ignored")
+
+    def test_ordre(self):
+        """ lire un consommateur avant run ne change pas la simulation """
+        _l = []
+        for lus in ((), (40, 3, 17)):
+            random.seed(1) ; np.random.seed(1)
+            _0 = self.K(6, 8, True, 3, 2, 2, True)
+            _0.graine = 8
+            _0.population = [(tireur(), 45)]
+            _0.reset()
+            for i in lus: _0.getConsommateur(i)
+            with contextlib.redirect_stdout(io.StringIO()):
+                _h = _0.run(4, False)
+            _l.append([getattr(_h, "Iter_{}".format(k + 1))['consommateur']
+                       for k in range(4)])
+        self.assertEqual(_l[0], _l[1], "streams depend on build order")
+
+    def test_flux(self):
+        """ un flux par agent """
+        _0, _ = self.simuler(4, 1)
+        _f = [_0.getFirme(i).rng for i in range(3)]
+        self.assertEqual(len(set(map(id, _f + [_0.rng]))), 4, "shared")
+        _l = [x.rng for _, x in _0.consommateurs.agents()]
+        self.assertGreater(len(_l), 1, "no consumer object")
+        self.assertEqual(len(set(map(id, _l))), len(_l), "shared")
+        from tools import aleas
+        _s = aleas.sequence(9)
+        self.assertEqual(aleas.flux(_s, 1, 2).random(3).tolist(),
+                         aleas.flux(_s, 1, 2).random(3).tolist(),
+                         "same key, same stream")
+        self.assertNotEqual(aleas.flux(_s, 1, 2).random(),
+                            aleas.flux(_s, 1, 3).random(), "same stream")
+
+    def test_places(self):
+        """ une firme remise en place ne rejoue pas les tirages d'avant """
+        _0 = self.K(6, 8, True, 3, 2, 2, True)
+        _0.graine = 3
+        _0.reset()
+        _K = getattr(tp, "RandCorp")
+        _l = []
+        for _ in range(2):
+            _0.setFirmes([(_K(), _0.getPosFirme(i)) for i in range(2)])
+            _l.append([_0.getFirme(0).getDecision() for _ in range(5)])
+        self.assertNotEqual(_l[0], _l[1], "same draws")
+
+def suite(fname):
+    """ permet de récupérer les tests à passer avec l'import dynamique """
+    global tp
+    klasses = (TestEnsemble, TestGraine)
+    try:
+        tp = __import__(fname)
+    except Exception as _e:
+        print(_e)
+    sweet = unittest.TestSuite()
+    for klass_test in klasses:
+        sweet.addTest(unittest.makeSuite(klass_test))
+    return sweet
+
+if __name__ == "__main__":
+    param = input("quel est le fichier à traiter ? ")
+    if not os.path.isfile(param): ValueError("need a python file")
+
+    etudiant = param.split('.')[0]
+
+    _out = check_property(etudiant != '','acces au fichier')
+    print("tentative de lecture de {}".format(etudiant))
+    tp = __import__(etudiant) # revient à faire import XXX as tp
+
+    unittest.main()
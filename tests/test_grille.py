@@ -0,0 +1,317 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__usage__ = "Test Hotelling: distances pré-calculées"
+__version__ = "$Id: test_grille.py,v 1.1 2026/10/18 10:12:41 mmc Exp $"
+
+import os
+import tempfile
+import unittest
+from mmcTools import check_property
+
+"""
+Les distances lues dans les structures pré-calculées doivent
+être celles du parcours en largeur d'origine
+"""
+
+def bfs(t, c1:tuple, c2:tuple) -> int:
+    """ parcours en largeur de référence, None si inaccessible """
+    if c1 == c2: return 0
+    _obs = t.getObstacles()
+    _seen = set([c1]) ; _todo = [c1] ; pf = 0
+    while _todo != []:
+        pf += 1 ; _nxt = []
+        for x in _todo:
+            for y in t.adjacent(x, t.lignes, t.colonnes, t.fini, t.voisinage):
+                if y == c2: return pf
+                if y in _seen: continue
+                _seen.add(y)
+                if t.coord2pos(y) not in _obs: _nxt.append(y)
+        _todo = _nxt
+
+class TestMatrice(unittest.TestCase):
+    """ matrice des distances avec obstacles """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        if not hasattr(self.K, "matriceDistances"):
+            raise unittest.SkipTest("matriceDistances missing")
+        self.msg = {True: "von Neumann", False: "Moore"}
+
+    def subtest_bfs(self, borne, vois):
+        """ comparaison avec un parcours en largeur naïf """
+        _0 = self.K(6, 8, borne, 4, 2, 1, vois)
+        _0.setTerrain([9, 10, 11, 27])
+        for p in range(0, 48, 5):
+            for q in range(48):
+                _e = bfs(_0, _0.pos2coord(p), _0.pos2coord(q))
+                with self.subTest(p=p, q=q):
+                    self.assertEqual(_0.posDistance(p, q), _e,
+                                     "d({}, {}) expected {}".format(p, q, _e))
+
+    def test_bfs(self):
+        for b in (True, False):
+            for v in (True, False):
+                with self.subTest(borne=b, voisinage=self.msg[v]):
+                    self.subtest_bfs(b, v)
+
+    def test_adjacent(self):
+        """ hors du terrain : les voisins dans le terrain, modulo sur un tore """
+        for b in (True, False):
+            with self.subTest(borne=b):
+                self.assertEqual(self.K.adjacent((1, 1), 3, 5, b, True),
+                                 {(0, 1), (2, 1), (1, 0), (1, 2)})
+        self.assertEqual(self.K.adjacent((-1, 0), 3, 5, True, True),
+                         {(0, 0)}, "bounded")
+        self.assertEqual(self.K.adjacent((3, 7), 3, 5, True, False),
+                         set(), "far outside")
+        self.assertEqual(self.K.adjacent((-1, 0), 3, 5, False, True),
+                         {(1, 0), (0, 0), (2, 4), (2, 1)}, "torus")
+        self.assertEqual(self.K.adjacent((3, 0), 3, 5, False, False),
+                         self.K.adjacent((0, 0), 3, 5, False, False),
+                         "torus, Moore")
+
+    def test_invalidation(self):
+        """ setTerrain doit invalider la matrice """
+        _0 = self.K(5, 10, True, 3, 2, 1, True)
+        _0.setTerrain([3, 5, 14])
+        self.assertIsNone(_0.posDistance(4, 24), "4 is locked")
+        _0.setTerrain([13, 5, 14])
+        self.assertEqual(_0.posDistance(4, 24), 6, "4 is no more locked")
+
+    def test_memmap(self):
+        """ la matrice peut résider sur disque """
+        _0 = self.K(5, 10, False, 3, 2, 1, False)
+        _0.setTerrain([13, 25, 14])
+        _m = _0.matriceDistances().copy()
+        with tempfile.TemporaryDirectory() as _d:
+            _f = os.path.join(_d, "distances.npy")
+            _1 = _0.matriceDistances(_f)
+            self.assertTrue(os.path.isfile(_f), "no file found")
+            self.assertTrue((_1 == _m).all(), "distances differ")
+
+class TestDistances(unittest.TestCase):
+    """ distances cases x positions en un seul appel """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        if not hasattr(self.K, "posDistances"):
+            raise unittest.SkipTest("posDistances missing")
+        self.msg = {True: "von Neumann", False: "Moore"}
+
+    def subtest_sansObs(self, lig, col, borne, vois):
+        _0 = self.K(lig, col, borne, 0, 3, 1, vois)
+        _p = [0, (lig*col)//2, lig*col-1]
+        _1 = _0.posDistances(_p)
+        self.assertEqual(_1.shape, (lig*col, len(_p)), "wrong shape")
+        for i in range(lig*col):
+            for k, q in enumerate(_p):
+                with self.subTest(p=i, q=q):
+                    self.assertEqual(_1[i, k], _0.posDistance(i, q),
+                                     "d({}, {})".format(i, q))
+
+    def test_sansObs(self):
+        for lig, col in ((1, 10), (3, 10), (4, 6), (7, 7)):
+            for b in (True, False):
+                for v in (True, False):
+                    with self.subTest(dim=(lig, col), borne=b,
+                                      voisinage=self.msg[v]):
+                        self.subtest_sansObs(lig, col, b, v)
+
+    def test_avecObs(self):
+        """ np.inf pour une position inaccessible """
+        _0 = self.K(5, 10, True, 3, 2, 1, True)
+        _0.setTerrain([3, 5, 14])
+        _1 = _0.posDistances([4, 0])
+        self.assertEqual(_1[24, 0], float('inf'), "4 is locked")
+        self.assertEqual(_1[24, 1], _0.posDistance(24, 0), "d(24, 0)")
+
+class TestChamp(unittest.TestCase):
+    """ parcours en largeur sur les positions """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        if not hasattr(self.K, "champDistance"):
+            raise unittest.SkipTest("champDistance missing")
+
+    def test_champ(self):
+        """ le champ de p contient toutes les distances depuis p """
+        for obs in (0, 4):
+            for b in (True, False):
+                _0 = self.K(6, 8, b, obs, 2, 1, True)
+                _0.setTerrain([9, 10, 11, 27])
+                for p in (0, 20, 47):
+                    _1 = _0.champDistance(p)
+                    for q in range(48):
+                        _e = _0.posDistance(p, q)
+                        with self.subTest(obstacles=obs, borne=b, p=p, q=q):
+                            self.assertEqual(-1 if _e is None else _e,
+                                             _1[q], "d({}, {})".format(p, q))
+
+    def test_profondeur(self):
+        """ posAccess est le champ tronqué """
+        _0 = self.K(5, 10, False, 3, 2, 1, False)
+        _0.setTerrain([13, 25, 14])
+        for r in range(5):
+            _1 = _0.champDistance(24, r)
+            with self.subTest(r=r):
+                self.assertEqual(sorted(_0.posAccess(24, r)),
+                                 [q for q in range(50) if _1[q] >= 0],
+                                 "rayon {}".format(r))
+
+class TestCache(unittest.TestCase):
+    """ cache LRU des champs de distance """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        if not hasattr(self.K, "statsChamps"):
+            raise unittest.SkipTest("statsChamps missing")
+
+    def test_compteurs(self):
+        _0 = self.K(5, 10, False, 3, 2, 1, True)
+        _0.setTerrain([3, 5, 14])
+        _0.cacheChamps = 2
+        for p in (0, 1, 0, 2, 3, 0):
+            _0.champDistance(p)
+        _1 = _0.statsChamps
+        self.assertEqual((_1['hits'], _1['misses']), (1, 5), "hits/misses")
+        self.assertEqual(_1['evictions'], 3, "evictions")
+        self.assertEqual(_1['taille'], 2, "bounded size")
+
+    def test_invalidation(self):
+        """ un nouveau terrain vide le cache """
+        _0 = self.K(5, 10, True, 3, 2, 1, True)
+        _0.setTerrain([3, 5, 14])
+        self.assertEqual(_0.champDistance(4)[24], -1, "4 is locked")
+        _0.setTerrain([13, 5, 14])
+        self.assertEqual(_0.champDistance(4)[24], 6, "4 is no more locked")
+        self.assertEqual(_0.statsChamps['taille'], 1, "cache cleared")
+
+class TestBoules(unittest.TestCase):
+    """ requêtes d'accessibilité groupées """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        if not hasattr(self.K, "posBoules"):
+            raise unittest.SkipTest("posBoules missing")
+
+    def test_boules(self):
+        """ même résultat que posAccess, centre par centre """
+        _0 = self.K(5, 10, True, 3, 2, 1, False)
+        _0.setTerrain([13, 25, 14])
+        _c = [0, 24, 13, 49, -1]
+        _r = [2, 3, 1, 0, 2]
+        _m = _0.posBoules(_c, _r)
+        _l = _0.posBoules(_c, _r, False)
+        self.assertEqual(_m.shape, (len(_c), 50), "one mask per centre")
+        for k, (p, r) in enumerate(zip(_c, _r)):
+            _e = sorted(_0.posAccess(p, r))
+            with self.subTest(p=p, r=r):
+                self.assertEqual(_m[k].nonzero()[0].tolist(), _e, "mask")
+                self.assertEqual(_l[k].tolist(), _e, "positions")
+
+    def test_accessible(self):
+        """ q dans posAccess(p, r) """
+        _0 = self.K(5, 10, False, 3, 2, 1, True)
+        _0.setTerrain([3, 5, 14])
+        for p in (0, 4, 24):
+            for r in (0, 1, 3):
+                _1 = set(_0.posAccess(p, r))
+                for q in range(50):
+                    with self.subTest(p=p, q=q, r=r):
+                        self.assertEqual(_0.posAccessible(p, q, r), q in _1,
+                                         "{} within {} of {}".format(q, r, p))
+
+class TestPlacement(unittest.TestCase):
+    """ placement des firmes sur un tore avec dmin """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        if not hasattr(self.K, "dminEffectif"):
+            raise unittest.SkipTest("dminEffectif missing")
+
+    def test_dmin(self):
+        """ dmin trop grand : le placement se termine tout de même """
+        for v in (True, False):
+            _0 = self.K(12, 15, False, 18, 4, 25, v)
+            self.assertIsNone(_0.dminEffectif, "no placement yet")
+            _0.reset()
+            _d = _0.dminEffectif
+            self.assertEqual(_0.dmin, 25, "dmin should be restored")
+            self.assertLessEqual(_d, 25, "effective dmin too large")
+            _p = [_0.getPosFirme(i) for i in range(4)]
+            self.assertEqual(len(set(_p)), 4, "firms should not share a cell")
+            for i, p in enumerate(_p):
+                self.assertNotIn(p, _0.getObstacles(), "firm on obstacle")
+                for q in _p[i+1:]:
+                    _e = _0.posDistance(p, q)
+                    with self.subTest(voisinage=v, p=p, q=q):
+                        self.assertTrue(_e is None or _e >= _d,
+                                        "d({}, {}) < {}".format(p, q, _d))
+
+class TestMemoize(unittest.TestCase):
+    """ memoize borné, par objet, avec invalidation """
+    def setUp(self):
+        from tools.mmcContainer import memoize
+        self.memoize = memoize
+        self.K = getattr(tp, "Terrain")
+
+    def test_faux(self):
+        """ None et 0 sont mémorisés """
+        _n = []
+        @self.memoize(taille=2)
+        def f(x): _n.append(x) ; return None if x else 0
+        for x in (0, 1, 0, 1, 2, 0):
+            f(x)
+        self.assertEqual(_n, [0, 1, 2, 0], "falsy values should be cached")
+        self.assertEqual(f.stats()['hits'], 2, "hits")
+        self.assertEqual(f.stats()['evictions'], 2, "bounded cache")
+
+    def test_invalidate(self):
+        _n = []
+        @self.memoize
+        def f(x, y=0): _n.append(x) ; return x + y
+        for x in range(5): f(x, y=1)
+        self.assertEqual(f.invalidate(lambda a, k: a[0] % 2 == 0), 3,
+                         "0, 2, 4 forgotten")
+        for x in range(5): f(x, y=1)
+        self.assertEqual(_n, [0, 1, 2, 3, 4, 0, 2, 4], "recomputed")
+        self.assertEqual(f([1], y=[2]), [1, 2], "unhashable bypass")
+
+    def test_instance(self):
+        """ un cache par objet, invalidé par setTerrain """
+        _0 = self.K(5, 10, True, 3, 2, 1, True)
+        _1 = self.K(5, 10, True, 3, 2, 1, True)
+        _0.setTerrain([3, 5, 14]) ; _1.setTerrain([13, 5, 14])
+        self.assertIsNone(_0.posDistance(4, 24), "4 is locked")
+        self.assertIsNone(_0.posDistance(4, 24), "cached None")
+        self.assertEqual(_1.posDistance(4, 24), 6, "other terrain")
+        _s = self.K.posDistance.stats(_0)
+        self.assertEqual((_s['hits'], _s['misses']), (1, 1), "per object")
+        _0.setTerrain([13, 5, 14])
+        self.assertEqual(_0.posDistance(4, 24), 6, "4 is no more locked")
+        self.assertEqual(sorted(_0.posAccess(4, 1)),
+                         sorted(_1.posAccess(4, 1)), "same access")
+
+def suite(fname):
+    """ permet de récupérer les tests à passer avec l'import dynamique """
+    global tp
+    klasses = (TestMatrice, TestDistances, TestChamp, TestCache,
+                TestBoules, TestPlacement, TestMemoize)
+    try:
+        tp = __import__(fname)
+    except Exception as _e:
+        print(_e)
+    sweet = unittest.TestSuite()
+    for klass_test in klasses:
+        sweet.addTest(unittest.makeSuite(klass_test))
+    return sweet
+
+if __name__ == "__main__":
+    param = input("quel est le fichier à traiter ? ")
+    if not os.path.isfile(param): ValueError("need a python file")
+
+    etudiant = param.split('.')[0]
+
+    _out = check_property(etudiant != '','acces au fichier')
+    print("tentative de lecture de {}".format(etudiant))
+    tp = __import__(etudiant) # revient à faire import XXX as tp
+
+    unittest.main()
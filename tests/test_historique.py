@@ -0,0 +1,304 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__usage__ = "Test Hotelling: historiques"
+__version__ = "$Id: test_historique.py,v 1.1 2026/10/18 17:20:31 mmc Exp $"
+
+import contextlib
+import functools
+import io
+import os
+import random
+import tempfile
+import unittest
+import numpy as np
+from mmcTools import check_property
+
+"""
+Les différents historiques doivent rendre les mêmes informations
+que l'Historique en mémoire
+"""
+
+def simuler(t, nb: int, graine: int, flag: bool = False):
+    """ un run silencieux et reproductible """
+    random.seed(graine) ; np.random.seed(graine)
+    with contextlib.redirect_stdout(io.StringIO()):
+        t.reset()
+        return t.run(nb, flag)
+
+class TestFlux(unittest.TestCase):
+    """ historique écrit sur disque au fil du run """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        if not hasattr(self.K, "fabriqueHistorique"):
+            raise unittest.SkipTest("fabriqueHistorique missing")
+        from tools.mmcContainer import HistoriqueFlux
+        self.H = HistoriqueFlux
+        self.args = [6, 7, False, 3, 3, 2, True]
+        self.pop = [(getattr(tp, "RandConso"), 39)]
+
+    def subtest_tours(self, h, ref, nb):
+        for k in (1, 7, 8, nb):
+            _a = getattr(h, "Iter_{}".format(k))
+            _b = getattr(ref, "Iter_{}".format(k))
+            with self.subTest(tour=k):
+                self.assertEqual(_a['consommateur'], _b['consommateur'],
+                                 "choices differ")
+                self.assertTrue(np.array_equal(_a['rewardFirme'],
+                                               _b['rewardFirme']),
+                                "rewardFirme differs")
+
+    def test_flux(self):
+        with tempfile.TemporaryDirectory() as _d:
+            _0 = self.K(*self.args) ; _0.population = self.pop
+            _ref = simuler(_0, 20, 3)
+            _1 = self.K(*self.args) ; _1.population = self.pop
+            _1.fabriqueHistorique = functools.partial(self.H, store='flux',
+                                                      where=_d, tampon=8)
+            _h = simuler(_1, 20, 3)
+            self.assertLessEqual(_h.tampon, 8, "bounded buffer")
+            self.assertTrue(os.path.getsize(_h.fichier) > 0, "no flush")
+            for att in ('cfg', 'initState', 'finalState', 'last'):
+                with self.subTest(att=att):
+                    self.assertEqual(repr(getattr(_h, att)),
+                                     repr(getattr(_ref, att)),
+                                     "{} differs".format(att))
+            self.subtest_tours(_h, _ref, 20)
+            self.assertEqual(len(list(_h.tours())), 20, "20 tours")
+            # relecture depuis le disque
+            _h.save()
+            _2 = self.H(store='flux', where=_d)
+            self.assertEqual(_2.last, 20, "last should be restored")
+            self.subtest_tours(_2, _ref, 20)
+
+    def test_simultanes(self):
+        """ deux historiques vivants ne partagent pas leur flux """
+        with tempfile.TemporaryDirectory() as _d:
+            _h = []
+            for _g in (3, 5):
+                _0 = self.K(*self.args) ; _0.population = self.pop
+                _0.fabriqueHistorique = functools.partial(self.H, where=_d,
+                                                          tampon=4)
+                _h.append(simuler(_0, 12, _g))
+            self.assertNotEqual(_h[0].fichier, _h[1].fichier, "same file")
+            for _x, _g in zip(_h, (3, 5)):
+                _0 = self.K(*self.args) ; _0.population = self.pop
+                _ref = simuler(_0, 12, _g)
+                with self.subTest(graine=_g):
+                    self.subtest_tours(_x, _ref, 12)
+
+    def test_troncature(self):
+        """ une fin de flux incomplète est coupée au rechargement """
+        with tempfile.TemporaryDirectory() as _d:
+            _h = self.H({'essai': 1}, store='coupe', where=_d, tampon=2)
+            for k in range(4): _h.store({'tour': k+1})
+            _h.save()
+            _n = os.path.getsize(_h.fichier)
+            with open(_h.fichier, 'ab') as _f: _f.write(b'\x00' * 11)
+            _1 = self.H(store='coupe', where=_d, tampon=2)
+            self.assertEqual(os.path.getsize(_1.fichier), _n, "tail kept")
+            for k in range(4, 6): _1.store({'tour': k+1})
+            _2 = self.H(store='coupe', where=_d)
+            self.assertEqual(_2.last, 6, "appended tours lost")
+            self.assertEqual([x['tour'] for x in _2.tours()],
+                             list(range(1, 7)), "tours differ")
+
+class TestColonnes(unittest.TestCase):
+    """ historique en colonnes, séries temporelles """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        if not hasattr(self.K, "fabriqueHistorique"):
+            raise unittest.SkipTest("fabriqueHistorique missing")
+        from tools.mmcContainer import HistoriqueColonnes
+        self.H = HistoriqueColonnes
+        self.pop = [(getattr(tp, "RandConso"), 39)]
+
+    def subtest_series(self, flag):
+        _0 = self.K(6, 7, False, 3, 3, 2, True) ; _0.population = self.pop
+        _ref = simuler(_0, 25, 5, flag)
+        _1 = self.K(6, 7, False, 3, 3, 2, True) ; _1.population = self.pop
+        _1.fabriqueHistorique = functools.partial(self.H, tours=4)
+        _h = simuler(_1, 25, 5, flag)
+        self.assertEqual(_h.last, 25, "25 tours")
+        self.assertEqual(_h.prix().shape, (25, 3), "one row per tour")
+        for k in range(1, 26):
+            _r = getattr(_ref, "Iter_{}".format(k))
+            _i = getattr(_h, "Iter_{}".format(k))
+            # le contexte du tour suivant donne position, qte, prix
+            _ctx = (getattr(_ref, "Iter_{}".format(k+1))['contexte']
+                    if k < 25 else _ref.finalState['contexte'])
+            with self.subTest(tour=k):
+                self.assertEqual(_i['consommateur'], _r['consommateur'],
+                                 "choices differ")
+                self.assertEqual(_h.choix(11)[k-1],
+                                 -1 if _r['consommateur'][11] is None
+                                 else _r['consommateur'][11], "cell 11")
+                self.assertTrue(np.array_equal(_h.parts()[k-1],
+                                               _r['rewardFirme'],
+                                               equal_nan=True), "shares")
+                for f, x in enumerate(_ctx):
+                    if x is None: continue
+                    self.assertEqual(_h.positions(f)[k-1],
+                                     _0.coord2pos(tuple(x[0])), "position")
+                    self.assertEqual(_h.quantites(f)[k-1], x[1], "quantity")
+                    self.assertEqual(_h.prix(f)[k-1], x[2], "price")
+
+    def test_series(self):
+        for flag in (True, False):
+            with self.subTest(flag=flag):
+                self.subtest_series(flag)
+
+    def test_lecture_seule(self):
+        _0 = self.K(6, 7, False, 3, 3, 2, True) ; _0.population = self.pop
+        _0.fabriqueHistorique = self.H
+        _h = simuler(_0, 3, 1)
+        with self.assertRaises(ValueError):
+            _h.prix()[0, 0] = 1
+
+    def test_rechargement(self):
+        """ un historique relu sans aucun tour accepte le suivant """
+        _0 = self.K(6, 7, False, 3, 3, 2, True) ; _0.population = self.pop
+        _0.reset()
+        with tempfile.TemporaryDirectory() as _d:
+            self.H(_0.get_structure(), "vide", _d).save()
+            _h = self.H(None, "vide", _d)
+            _1 = self.K(6, 7, False, 3, 3, 2, True) ; _1.population = self.pop
+            _r = simuler(_1, 2, 1)
+            _h.store(_r.Iter_1) ; _h.store(_r.Iter_2)
+        self.assertEqual(_h.last, 2, "2 tours")
+        self.assertEqual(_h.Iter_2['consommateur'], _r.Iter_2['consommateur'])
+
+class TestDelta(unittest.TestCase):
+    """ choix des consommateurs rangés par différences """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        if not hasattr(self.K, "fabriqueHistorique"):
+            raise unittest.SkipTest("fabriqueHistorique missing")
+        from tools.mmcContainer import HistoriqueDelta
+        self.H = HistoriqueDelta
+
+    def subtest_exact(self, klass, flag):
+        _pop = [(klass, 95)]
+        _0 = self.K(10, 10, False, 5, 3, 3, True) ; _0.population = _pop
+        _ref = simuler(_0, 40, 2, flag)
+        _1 = self.K(10, 10, False, 5, 3, 3, True) ; _1.population = _pop
+        _1.fabriqueHistorique = functools.partial(self.H, periode=7)
+        _h = simuler(_1, 40, 2, flag)
+        # dans le désordre, pour ne pas profiter du tour précédent
+        for k in (40, 1, 7, 8, 15, 22, 39):
+            _r = getattr(_ref, "Iter_{}".format(k))
+            _i = getattr(_h, "Iter_{}".format(k))
+            with self.subTest(tour=k):
+                self.assertEqual(sorted(_i), sorted(_r), "keys differ")
+                for key in ('consommateur', 'rewardConso'):
+                    self.assertEqual(_i[key], _r[key],
+                                     "{} differs".format(key))
+        return _h
+
+    def test_exact(self):
+        for klass in ("RandConso", "Consommateur"):
+            for flag in (True, False):
+                with self.subTest(klass=klass, flag=flag):
+                    self.subtest_exact(getattr(tp, klass), flag)
+
+    def test_compression(self):
+        """ des consommateurs qui ne changent pas coûtent peu """
+        _h = self.subtest_exact(getattr(tp, "Consommateur"), True)
+        self.assertLess(_h.compression, .3, "poor compression")
+
+class TestStockage(unittest.TestCase):
+    """ sauvegarde binaire versionnée """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        try:
+            from tools import stockage
+            from tools.mmcContainer import Historique
+        except Exception as _e:
+            raise unittest.SkipTest("stockage: {}".format(_e))
+        self.S = stockage
+        self.H = Historique
+        self.pop = [(getattr(tp, "RandConso"), 39)]
+
+    def test_relecture(self):
+        """ save deux fois sans question, relecture à l'identique """
+        with tempfile.TemporaryDirectory() as _d:
+            _0 = self.K(6, 7, False, 3, 3, 2, True) ; _0.population = self.pop
+            _0.fabriqueHistorique = functools.partial(self.H, store='bin',
+                                                      where=_d)
+            _ref = simuler(_0, 12, 4)
+            _ref.save() ; _ref.save()
+            _1 = self.H(store='bin', where=_d)
+            self.assertEqual(_1.last, 12, "last")
+            self.assertEqual(_1.cfg['type_firmes'], _ref.cfg['type_firmes'],
+                             "classes should be restored")
+            self.assertEqual(_1.cfg['population'], _ref.cfg['population'],
+                             "population")
+            for k in (1, 6, 12):
+                _a = getattr(_1, "Iter_{}".format(k))
+                _b = getattr(_ref, "Iter_{}".format(k))
+                with self.subTest(tour=k):
+                    for key in ('consommateur', 'rewardConso', 'contexte',
+                                'firme'):
+                        self.assertEqual(_a[key], _b[key],
+                                         "{} differs".format(key))
+                    self.assertIsInstance(_a['rewardFirme'].base, np.memmap,
+                                          "arrays should not be copied")
+
+    def test_version(self):
+        with tempfile.TemporaryDirectory() as _d:
+            _f = os.path.join(_d, "v")
+            self.S.ecrire(_f, {'x': np.arange(3)})
+            with open(_f, 'r+b') as _h:
+                _h.seek(len(self.S.MAGIE))
+                _h.write((self.S.VERSION + 1).to_bytes(4, 'little'))
+            with self.assertRaises(ValueError):
+                self.S.lire(_f)
+
+    def test_classeAbsente(self):
+        """ une classe introuvable à la relecture est nommée """
+        _K = type("Fantome", (), {'__module__': __name__})
+        with tempfile.TemporaryDirectory() as _d:
+            _f = os.path.join(_d, "c")
+            self.S.ecrire(_f, {'k': _K, 'x': 1})
+            _a = self.S.lire(_f)
+            self.assertEqual(_a['x'], 1, "other keys are readable")
+            with self.assertRaisesRegex(ValueError, "Fantome"):
+                _a['k']
+
+    def test_paquets(self):
+        """ un paquet tronqué en fin de fichier est ignoré """
+        with tempfile.TemporaryDirectory() as _d:
+            _f = os.path.join(_d, "p")
+            _o = [self.S.ajouter(_f, {'k': k, 'v': np.arange(k)})
+                  for k in range(3)]
+            with open(_f, 'ab') as _h: _h.write(self.S.MAGIE + b'\x01')
+            self.assertEqual(list(self.S.enregistrements(_f)), _o, "offsets")
+            self.assertEqual(self.S.lire(_f, _o[2])['v'].tolist(), [0, 1])
+
+def suite(fname):
+    """ permet de récupérer les tests à passer avec l'import dynamique """
+    global tp
+    klasses = (TestFlux, TestColonnes, TestDelta, TestStockage)
+    try:
+        tp = __import__(fname)
+    except Exception as _e:
+        print(_e)
+    sweet = unittest.TestSuite()
+    for klass_test in klasses:
+        sweet.addTest(unittest.makeSuite(klass_test))
+    return sweet
+
+if __name__ == "__main__":
+    param = input("quel est le fichier à traiter ? ")
+    if not os.path.isfile(param): ValueError("need a python file")
+
+    etudiant = param.split('.')[0]
+
+    _out = check_property(etudiant != '','acces au fichier')
+    print("tentative de lecture de {}".format(etudiant))
+    tp = __import__(etudiant) # revient à faire import XXX as tp
+
+    unittest.main()
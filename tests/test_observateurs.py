@@ -0,0 +1,192 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__usage__ = "Test Hotelling: abonnés aux événements de step"
+__version__ = "$Id: test_observateurs.py,v 1.1 2026/10/18 18:47:30 mmc Exp $"
+
+import contextlib
+import io
+import os
+import time
+import unittest
+from mmcTools import check_property
+
+"""
+step ne fait aucun affichage sans abonné
+"""
+
+class TestEvenements(unittest.TestCase):
+    """ abonnement aux événements """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        if not hasattr(self.K, "abonner"):
+            raise unittest.SkipTest("abonner missing")
+        self.t = self.K(5, 6, True, 2, 3, 2, True)
+        self.t.population = [(getattr(tp, "RandConso"), 28)]
+        self.t.reset()
+
+    def run_silence(self, nb, flag):
+        _out = io.StringIO()
+        with contextlib.redirect_stdout(_out):
+            self.t.run(nb, flag)
+        return _out.getvalue()
+
+    def test_silence(self):
+        """ sans abonné ni la grille ni les firmes ne sont affichées """
+        _0 = self.run_silence(4, False)
+        self.assertNotIn("Im ", _0, "firm decision printed")
+        self.assertNotIn(str(self.t).splitlines()[0], _0, "grid printed")
+
+    def test_ordre(self):
+        _l = []
+        for e in ("firme", "consommateurs", "tour"):
+            self.t.abonner(e, lambda t, d, e=e: _l.append((e, sorted(d))))
+        self.run_silence(2, False)
+        _e = ([("firme", ['decision', 'idx'])] * 3 +
+              [("consommateurs", ['consommateur', 'quantites',
+                                  'rewardConso']),
+               ("tour", ['struct'])])
+        self.assertEqual(_l, _e * 2, "events out of order")
+
+    def test_desabonner(self):
+        _l = []
+        _f = lambda t, d: _l.append(d['idx'])
+        self.t.abonner('firme', _f)
+        self.run_silence(2, True)
+        self.t.desabonner('firme', _f)
+        self.run_silence(2, True)
+        self.assertEqual(_l, [0, 1], "one firm per tour")
+        with self.assertRaises(ValueError):
+            self.t.abonner('inconnu', _f)
+
+    def test_console(self):
+        from tools import observateurs
+        observateurs.console(self.t)
+        _0 = self.run_silence(1, True)
+        self.assertIn("Im ", _0, "firm decision expected")
+        self.assertIn(str(self.t), _0, "grid expected")
+
+class TestStats(unittest.TestCase):
+    """ chronométrage des phases de step """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        if not hasattr(self.K, "stats"):
+            raise unittest.SkipTest("stats missing")
+        self.t = self.K(5, 6, True, 2, 3, 2, True)
+        self.t.reset()
+
+    def run_silence(self, nb):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.t.run(nb, False)
+
+    def test_inactif(self):
+        self.assertFalse(self.t.stats.actif, "off by default")
+        self.run_silence(3)
+        self.assertEqual(self.t.stats.tours, 0, "nothing measured")
+        self.assertEqual(self.t.stats.phases, [], "nothing measured")
+
+    def test_actif(self):
+        self.t.stats.actif = True
+        self.run_silence(5)
+        _0 = self.t.stats.resume()
+        for ph in ("firmes", "distances", "decisions", "departage",
+                   "recompenses", "updateFirmes", "historique", "tour"):
+            with self.subTest(phase=ph):
+                self.assertIn(ph, _0, "missing phase")
+                _1 = _0[ph]
+                self.assertEqual(_1['n'], 5, "one value per tour")
+                self.assertTrue(0 <= _1['p50'] <= _1['p95'] <= _1['max'],
+                                "bad order")
+        self.assertGreaterEqual(_0['tour']['total'],
+                                _0['departage']['total'], "tour is inclusive")
+        # arrêt en cours de route
+        self.t.stats.actif = False
+        self.run_silence(2)
+        self.assertEqual(self.t.stats.tours, 5, "stopped")
+        self.t.stats.reset()
+        self.assertEqual(self.t.stats.resume(), {}, "reset")
+
+class TestProfil(unittest.TestCase):
+    """ registre des fonctions espionnées """
+    def setUp(self):
+        from tools import mmcContainer
+        self.m = mmcContainer
+        if not hasattr(self.m, "profiler"):
+            raise unittest.SkipTest("profiler missing")
+        self.K = getattr(tp, "Terrain")
+        self.t = self.K(5, 6, True, 2, 3, 2, True)
+        self.t.population = [(getattr(tp, "RandConso"), 28)]
+        self.t.reset()
+
+    def test_imbrication(self):
+        """ exclusif = inclusif - temps des fils espionnés """
+        @self.m.spy
+        def fils(n): time.sleep(.002 * n)
+        @self.m.spy
+        def pere(n):
+            if n > 0: pere(n - 1)
+            fils(1)
+        with self.m.profiler() as _p:
+            pere(2)
+        _m = {k.rsplit('.', 1)[-1]: v for k, v in _p.mesures.items()
+              if v[0] > 0}
+        self.assertEqual(_m['pere'][0], 3, "3 calls")
+        self.assertEqual(_m['fils'][0], 3, "3 calls")
+        self.assertGreaterEqual(_m['fils'][1], 6e6, "at least 6ms")
+        self.assertLess(_m['pere'][2], _m['fils'][1], "sleep is in fils")
+        self.assertEqual(_m['pere'][1], _m['pere'][2] + _m['fils'][1],
+                         "recursion counted once")
+        self.assertAlmostEqual(pere.clock, _m['pere'][1] * 1e-9)
+
+    def test_run(self):
+        """ seuls les appels du bloc sont comptés """
+        class Strategie(getattr(tp, "Firme")):
+            def getDecision(self, *args, **kwargs):
+                return super().getDecision(*args, **kwargs)
+        _0 = self.t
+        _0.setFirmes([(Strategie(), _0.getPosFirme(i)) for i in range(3)])
+        with contextlib.redirect_stdout(io.StringIO()):
+            _0.run(2, False)
+            with self.m.profiler() as _p:
+                _0.run(4, False)
+            _0.run(2, False)
+        _m = _p.mesures
+        _s = [k for k in _m if k.endswith("Strategie.getDecision")]
+        self.assertEqual(len(_s), 1, "strategy not registered")
+        self.assertEqual(_m[_s[0]][0], 12, "3 firms, 4 tours")
+        self.assertEqual(_m["projet.Terrain.step"][0], 4, "4 tours")
+        self.assertEqual(_m["projet.Terrain.run"][0], 1, "1 run")
+        _out = io.StringIO()
+        _l = _p.report('inclusif', _out)
+        self.assertEqual(_l[0][0], "projet.Terrain.run", "run is on top")
+        self.assertEqual(len(_out.getvalue().splitlines()), len(_l) + 1,
+                         "header + one line per function")
+        self.assertRaises(ValueError, _p.report, 'nom')
+
+def suite(fname):
+    """ permet de récupérer les tests à passer avec l'import dynamique """
+    global tp
+    klasses = (TestEvenements, TestStats, TestProfil)
+    try:
+        tp = __import__(fname)
+    except Exception as _e:
+        print(_e)
+    sweet = unittest.TestSuite()
+    for klass_test in klasses:
+        sweet.addTest(unittest.makeSuite(klass_test))
+    return sweet
+
+if __name__ == "__main__":
+    param = input("quel est le fichier à traiter ? ")
+    if not os.path.isfile(param): ValueError("need a python file")
+
+    etudiant = param.split('.')[0]
+
+    _out = check_property(etudiant != '','acces au fichier')
+    print("tentative de lecture de {}".format(etudiant))
+    tp = __import__(etudiant) # revient à faire import XXX as tp
+
+    unittest.main()
@@ -0,0 +1,281 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__usage__ = "Test Hotelling: population en colonnes"
+__version__ = "$Id: test_population.py,v 1.1 2026/10/18 14:31:07 mmc Exp $"
+
+import contextlib
+import io
+import os
+import random
+import unittest
+import numpy as np
+from mmcTools import check_property
+
+"""
+Les consommateurs sont stockés en colonnes, getConsommateur
+en donne une vue objet
+"""
+
+class TestColonnes(unittest.TestCase):
+    """ stockage des consommateurs """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        if not hasattr(self.K, "consommateurs"):
+            raise unittest.SkipTest("consommateurs missing")
+        # 49 cases, 4 obstacles, 4 firmes, Moore borné
+        self.args = [7, 7, True, 4, 4, 5, False]
+
+    def test_avant_reset(self):
+        _0 = self.K(*self.args)
+        self.assertIsNone(_0.consommateurs, "no consumer before reset")
+
+    def test_colonnes(self):
+        _0 = self.K(*self.args)
+        _0.reset()
+        _1 = _0.consommateurs
+        self.assertEqual(len(_1), 45, "45 consumers expected")
+        self.assertEqual(_1.preference.shape, (49, 4), "one row per cell")
+        self.assertEqual(_1.bloque.nonzero()[0].tolist(),
+                         sorted(_0.getObstacles()), "obstacles mismatch")
+        for i in range(49):
+            with self.subTest(pos=i):
+                self.assertEqual(_0.getConsommateur(i) is None,
+                                 bool(_1.bloque[i]), "None iff obstacle")
+
+    def test_vue(self):
+        """ getConsommateur renvoie toujours le même objet """
+        _0 = self.K(*self.args)
+        _0.reset()
+        _p = [i for i in range(49) if i not in _0.getObstacles()]
+        _1 = [_0.getConsommateur(i) for i in _p]
+        for i, x in zip(_p, _1):
+            with self.subTest(pos=i):
+                self.assertIs(_0.getConsommateur(i), x, "same object")
+
+    def test_resetTerrain(self):
+        """ les objets suivent leur case lors du mélange """
+        _0 = self.K(*self.args)
+        _0.reset()
+        _1 = [_0.getConsommateur(i) for i in range(49)]
+        _0.resetTerrain()
+        _2 = [_0.getConsommateur(i) for i in range(49)]
+        self.assertEqual(sorted(id(x) for x in _1 if x is not None),
+                         sorted(id(x) for x in _2 if x is not None),
+                         "consumers should only move")
+        self.assertEqual([i for i in range(49) if _2[i] is None],
+                         sorted(_0.getObstacles()), "obstacles mismatch")
+
+def cascade(dist, rayon, pref, prix):
+    """ départage de référence, case par case, None si tirage au sort """
+    _vrai = dist <= rayon
+    if _vrai.sum() > 1:
+        _4 = (1 - pref / pref.sum()) * prix
+        _vrai = _4 == _4.min()
+    if _vrai.sum() > 1: _vrai = pref == pref.max()
+    if _vrai.sum() > 1: _vrai = prix == prix.min()
+    if _vrai.sum() > 1: _vrai = dist == dist.min()
+    return _vrai, _vrai.sum() > 1
+
+class TestChoix(unittest.TestCase):
+    """ phase consommateurs calculée pour tous à la fois """
+    def setUp(self):
+        for att in ("choix", "recompenses"):
+            if not hasattr(tp, att):
+                raise unittest.SkipTest("{} missing".format(att))
+        self.choix = getattr(tp, "choix")
+        self.recompenses = getattr(tp, "recompenses")
+        np.random.seed(42)
+        # beaucoup d'ex-aequo, une firme absente
+        self.n, self.f = 500, 4
+        self.dist = np.random.randint(0, 5, (self.n, self.f)).astype(float)
+        self.dist[:, 2] = np.inf
+        self.rayon = np.random.randint(0, 6, self.n)
+        self.pref = np.random.randint(1, 3, (self.n, self.f)).astype(float)
+        self.prix = np.array([3., 2., np.inf, 3.])
+
+    def test_choix(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            _1 = self.choix(self.dist, self.rayon, self.pref, self.prix)
+            for i in range(self.n):
+                _e, _hasard = cascade(self.dist[i], self.rayon[i],
+                                      self.pref[i], self.prix)
+                with self.subTest(conso=i):
+                    self.assertLessEqual(_1[i].sum(), 1, "oddities")
+                    if _hasard:
+                        self.assertTrue(_e[_1[i]].all(), "not a candidate")
+                    else:
+                        self.assertEqual(_1[i].tolist(), _e.tolist(),
+                                         "choice differs")
+
+    def test_recompenses(self):
+        _1 = self.choix(self.dist, self.rayon, self.pref, self.prix)
+        _pen = -self.rayon - 1e-3
+        _2 = self.recompenses(_1, self.pref, 10, self.prix, _pen)
+        with np.errstate(invalid='ignore'):
+            for i in range(self.n):
+                _e = (_1[i] * (self.pref[i] / self.pref[i].mean()) *
+                      (10. - self.prix) + _pen[i])
+                _e = np.where(np.isnan(_e), _pen[i], _e)
+                with self.subTest(conso=i):
+                    self.assertTrue(np.allclose(_2[i], _e), "reward differs")
+
+    def test_step(self):
+        """ toutes les cases ont un choix et une récompense """
+        _0 = getattr(tp, "Terrain")(7, 7, True, 4, 3, 2, False)
+        _0.reset()
+        _h = _0.run(3, False)
+        _s = _h.Iter_3
+        _obs = set(_0.getObstacles())
+        for i in range(49):
+            with self.subTest(pos=i):
+                self.assertEqual(_s['consommateur'][i] is None, i in _obs,
+                                 "None iff obstacle")
+                self.assertEqual(_s['rewardConso'][i] is None, i in _obs,
+                                 "None iff obstacle")
+
+class TestMultiSet(unittest.TestCase):
+    """ tirages dans population """
+    def setUp(self):
+        from tools.mmcContainer import MultiSet
+        self.M = MultiSet
+        if not hasattr(MultiSet, "sample"):
+            raise unittest.SkipTest("sample missing")
+
+    def test_cardinal(self):
+        _0 = self.M([('x', 3), ('y', 5), 'z'])
+        self.assertEqual(len(_0), 9, "3 + 5 + 1")
+        _0.remove('y', 7) ; _0.add('w', 2) ; _0.remove('v')
+        self.assertEqual(len(_0), 6, "y is gone")
+        self.assertEqual(_0.toDict(), {'x': 3, 'z': 1, 'w': 2}, "dict")
+        _0.compact()
+        self.assertEqual((len(_0), _0.keys()), (6, ['x', 'z', 'w']), "compact")
+
+    def test_sample(self):
+        _0 = self.M({'a': 5, 'b': 1000, 'c': 3})
+        _r = np.random.default_rng(3)
+        for n in (0, 7, 500, 1008):
+            with self.subTest(n=n):
+                _1 = _0.sample(n, _r)
+                self.assertEqual(_1.size, n, "size")
+                self.assertTrue((np.bincount(_1, minlength=3) <=
+                                 _0.counts()).all(), "without replacement")
+        self.assertEqual(np.bincount(_0.to_class_ids(_r)).tolist(),
+                         [5, 1000, 3], "every element once")
+        self.assertRaises(ValueError, _0.sample, 1009)
+
+    def test_terrain(self):
+        """ une classe par case libre, selon population """
+        _K = [getattr(tp, x) for x in ("RandConso", "Consommateur")]
+        _0 = getattr(tp, "Terrain")(7, 7, True, 4, 3, 2, False)
+        _0.population = [(_K[0], 30), (_K[1], 10)]
+        _0.reset()
+        _c = _0.consommateurs
+        _n = {K: int((_c.classe == k).sum()) for k, K in enumerate(_c.klasses)}
+        self.assertEqual(_n, {_K[0]: 35, _K[1]: 10}, "45 free cells")
+
+class TestPeupler(unittest.TestCase):
+    """ construction de la population d'un seul bloc """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        self.args = [9, 9, True, 6, 3, 2, False]
+
+    def test_preference(self):
+        """ estFixe selon clientPreference, obstacles compris """
+        for cp, fixe in ((0, [True]), (1, [True]), (2, [False]),
+                         (3, [False, True])):
+            with self.subTest(clientPreference=cp):
+                _0 = self.K(*self.args)
+                _0.clientPreference = cp
+                _0.reset()
+                _c = _0.consommateurs
+                _1 = _c.estFixe[~_c.bloque]
+                self.assertEqual(sorted(set(_1.tolist())), fixe, "estFixe")
+                self.assertTrue(_c.estFixe[_c.bloque].all(), "obstacles")
+                self.assertEqual(_c.preference.tolist(), [[1.] * 3] * 81,
+                                 "one preference per firm")
+
+    def test_graine(self):
+        _l = []
+        for _ in range(2):
+            random.seed(7) ; np.random.seed(7)
+            _0 = self.K(*self.args)
+            _0.clientPreference = 3
+            _0.population = [(getattr(tp, "Consommateur"), 40)]
+            _0._generateConsommateurs()
+            _c = _0.consommateurs
+            _l.append((_c.classe.tolist(), _c.estFixe.tolist()))
+        self.assertEqual(_l[0], _l[1], "same seed, same population")
+
+class TestBandes(unittest.TestCase):
+    """ phase consommateurs répartie sur des processus """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        if not hasattr(self.K, "processus"):
+            raise unittest.SkipTest("processus missing")
+
+    def simuler(self, nb, obstacles, flag):
+        random.seed(5) ; np.random.seed(5)
+        _0 = self.K(11, 9, False, obstacles, 3, 2, True)
+        _0.population = [(getattr(tp, "RandConso"), 60)]
+        _0.reset()
+        _0.processus = nb
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                _h = _0.run(6, flag)
+        finally:
+            _0.processus = 0
+        return [getattr(_h, "Iter_{}".format(k + 1)) for k in range(6)]
+
+    def test_processus(self):
+        _0 = self.K(4, 5)
+        self.assertEqual(_0.processus, 0, "no process by default")
+        _0.processus = -1 ; _0.processus = 1.5
+        self.assertEqual(_0.processus, 0, "bad values ignored")
+        _0.processus = 2
+        self.assertEqual(_0.processus, 2, "2 processes")
+        _0.processus = 0
+        self.assertEqual(_0.processus, 0, "stopped")
+
+    def test_identique(self):
+        """ mêmes graines, mêmes résultats avec ou sans processus """
+        for obs, flag, nb in ((0, False, 2), (9, False, 3), (9, True, 15)):
+            with self.subTest(obstacles=obs, ordre=flag, processus=nb):
+                _1 = self.simuler(0, obs, flag)
+                _2 = self.simuler(nb, obs, flag)
+                for x, y in zip(_1, _2):
+                    self.assertEqual(x['consommateur'], y['consommateur'])
+                    self.assertEqual(x['rewardConso'], y['rewardConso'])
+                    self.assertEqual(x['quantites'].tolist(),
+                                     y['quantites'].tolist())
+                    np.testing.assert_array_equal(x['rewardFirme'],
+                                                  y['rewardFirme'])
+
+def suite(fname):
+    """ permet de récupérer les tests à passer avec l'import dynamique """
+    global tp
+    klasses = (TestColonnes, TestChoix, TestMultiSet, TestPeupler,
+                TestBandes)
+    try:
+        tp = __import__(fname)
+    except Exception as _e:
+        print(_e)
+    sweet = unittest.TestSuite()
+    for klass_test in klasses:
+        sweet.addTest(unittest.makeSuite(klass_test))
+    return sweet
+
+if __name__ == "__main__":
+    param = input("quel est le fichier à traiter ? ")
+    if not os.path.isfile(param): ValueError("need a python file")
+
+    etudiant = param.split('.')[0]
+
+    _out = check_property(etudiant != '','acces au fichier')
+    print("tentative de lecture de {}".format(etudiant))
+    tp = __import__(etudiant) # revient à faire import XXX as tp
+
+    unittest.main()
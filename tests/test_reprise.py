@@ -0,0 +1,183 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__usage__ = "Test Hotelling: points de contrôle et reprise de run"
+__version__ = "$Id: test_reprise.py,v 1.1 2026/10/18 22:31:47 mmc Exp $"
+
+import contextlib
+import inspect
+import io
+import os
+import random
+import tempfile
+import unittest
+import numpy as np
+from mmcTools import check_property
+
+"""
+run(nb, flag, controle) écrit un point de contrôle tous les periode
+tours, une simulation interrompue reprend là où elle s'est arrêtée
+et donne le même historique qu'une simulation d'un seul tenant
+"""
+
+class Panne(Exception): pass
+
+def apprenant(base):
+    """ un consommateur qui décide seul, dans son propre flux, et se
+    souvient du nombre de ses apprentissages
+    """
+    class Apprenant(base):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.vus = 0
+        def getDecision(self):
+            return int(self.rng.integers(1 + self.vus % 4))
+        def updateModel(self, reward=None):
+            self.vus += 1
+    # retrouvée par son nom dans un point de contrôle
+    Apprenant.__qualname__ = "Apprenant"
+    return Apprenant
+
+class TestReprise(unittest.TestCase):
+    """ run avec points de contrôle """
+    def setUp(self):
+        self.K = getattr(tp, "Terrain")
+        if "controle" not in inspect.signature(self.K.run).parameters:
+            raise unittest.SkipTest("checkpoints missing")
+        _d = tempfile.TemporaryDirectory()
+        self.addCleanup(_d.cleanup)
+        self.fichier = os.path.join(_d.name, "controle")
+
+    def terrain(self, fabrique=None, population=None):
+        random.seed(5) ; np.random.seed(5)
+        _0 = self.K(6, 7, True, 4, 3, 1, True)
+        if fabrique is not None: _0.fabriqueHistorique = fabrique
+        _0.population = population or [(getattr(tp, "RandConso"), 20),
+                                       (getattr(tp, "AdjustConso"), 18)]
+        _0.reset()
+        _K = getattr(tp, "RandCorp")
+        _0.setFirmes([(_K(), _0.getPosFirme(i)) for i in range(3)])
+        return _0
+
+    def lancer(self, t, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return t.run(*args, **kwargs)
+
+    def panne(self, tour: int):
+        """ un observateur qui arrête la simulation après tour tours """
+        _n = [0]
+        def fn(terrain, data):
+            _n[0] += 1
+            if _n[0] == tour: raise Panne()
+        return fn
+
+    def test_reprise(self):
+        from tools import mmcContainer
+        for flag, nom in ((False, "Historique"), (True, "Historique"),
+                          (False, "HistoriqueDelta"),
+                          (True, "HistoriqueColonnes")):
+            with self.subTest(ordre=flag, historique=nom):
+                _H = getattr(mmcContainer, nom)
+                _ref = self.lancer(self.terrain(_H), 12, flag)
+                _0 = self.terrain(_H)
+                _0.abonner('tour', self.panne(8))
+                with self.assertRaises(Panne):
+                    self.lancer(_0, 12, flag, self.fichier, 3)
+                self.assertTrue(os.path.isfile(self.fichier), "checkpoint")
+                # un autre terrain, les générateurs ont avancé
+                random.seed(99) ; np.random.seed(99)
+                _h = self.lancer(self.terrain(_H), 12, flag, self.fichier, 3)
+                self.assertFalse(os.path.isfile(self.fichier), "removed")
+                self.assertFalse(os.path.isfile(self.fichier + ".trace"),
+                                 "journal removed")
+                for k in range(1, 13):
+                    _a = getattr(_ref, "Iter_{}".format(k))
+                    _b = getattr(_h, "Iter_{}".format(k))
+                    self.assertEqual(_a['firme'], _b['firme'],
+                                     "tour {}: firms".format(k))
+                    self.assertEqual(_a['rewardConso'], _b['rewardConso'],
+                                     "tour {}: consumers".format(k))
+                self.assertEqual(_ref.finalState, _h.finalState)
+
+    def test_objets(self):
+        """ les consommateurs reprennent leur état et leur flux """
+        if not hasattr(self.K, "graine"):
+            raise unittest.SkipTest("graine missing")
+        _pop = [(Apprenant, 20), (getattr(tp, "RandConso"), 18)]
+        def terrain():
+            _0 = self.terrain(population=_pop)
+            _0.graine = 7 ; _0.reset()
+            _K = getattr(tp, "RandCorp")
+            _0.setFirmes([(_K(), _0.getPosFirme(i)) for i in range(3)])
+            return _0
+        _r = terrain()
+        _ref = self.lancer(_r, 12, False)
+        _0 = terrain()
+        _0.abonner('tour', self.panne(8))
+        with self.assertRaises(Panne):
+            self.lancer(_0, 12, False, self.fichier, 3)
+        _1 = terrain()
+        _h = self.lancer(_1, 12, False, self.fichier, 3)
+        for k in range(1, 13):
+            self.assertEqual(getattr(_ref, "Iter_{}".format(k))['consommateur'],
+                             getattr(_h, "Iter_{}".format(k))['consommateur'],
+                             "tour {}: choices".format(k))
+        _vus = [[a.vus for _, a in t.consommateurs.agents()
+                 if isinstance(a, Apprenant)] for t in (_r, _1)]
+        self.assertEqual(_vus[0], _vus[1], "learning lost")
+        self.assertEqual(len(_vus[1]), 20, "20 objects")
+
+    def test_taille(self):
+        """ l'historique n'est pas réécrit à chaque point de contrôle """
+        _l = []
+        for tour in (4, 16):
+            _0 = self.terrain()
+            _0.abonner('tour', self.panne(tour))
+            with self.assertRaises(Panne):
+                self.lancer(_0, 20, False, self.fichier, 3)
+            _l.append(os.path.getsize(self.fichier))
+            os.remove(self.fichier)
+        self.assertLess(_l[1], _l[0] * 1.1, "checkpoint grows with tours")
+
+    def test_autreRun(self):
+        """ un point de contrôle n'est repris que par le même run """
+        _0 = self.terrain()
+        _0.abonner('tour', self.panne(4))
+        with self.assertRaises(Panne):
+            self.lancer(_0, 10, False, self.fichier, 2)
+        with self.assertRaises(ValueError):
+            self.lancer(self.terrain(), 11, False, self.fichier, 2)
+        _1 = self.K(5, 7, True, 4, 3, 1, True)
+        _1.population = [(getattr(tp, "RandConso"), 20)]
+        _1.reset()
+        with self.assertRaises(ValueError):
+            self.lancer(_1, 10, False, self.fichier, 2)
+
+def suite(fname):
+    """ permet de récupérer les tests à passer avec l'import dynamique """
+    global tp, Apprenant
+    klasses = (TestReprise, )
+    try:
+        tp = __import__(fname)
+        Apprenant = apprenant(getattr(tp, "Consommateur"))
+    except Exception as _e:
+        print(_e)
+    sweet = unittest.TestSuite()
+    for klass_test in klasses:
+        sweet.addTest(unittest.makeSuite(klass_test))
+    return sweet
+
+if __name__ == "__main__":
+    param = input("quel est le fichier à traiter ? ")
+    if not os.path.isfile(param): ValueError("need a python file")
+
+    etudiant = param.split('.')[0]
+
+    _out = check_property(etudiant != '','acces au fichier')
+    print("tentative de lecture de {}".format(etudiant))
+    tp = __import__(etudiant) # revient à faire import XXX as tp
+
+    unittest.main()
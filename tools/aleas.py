@@ -0,0 +1,44 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__version__ = "$Id: aleas.py,v 1.1 2026/10/18 23:04:18 mmc Exp $"
+__usage__ = "Flux aléatoires propres à une simulation"
+
+import random
+import numpy as np
+
+"""
+Une simulation a sa racine, une np.random.SeedSequence, dont dérivent
+des flux indépendants désignés par une clef (suite d'entiers)
+flux(racine, FIRMES, 2) est toujours le même générateur pour une
+même racine, quels que soient le processus et l'ordre des appels
+
+s = sequence(42)
+t = flux(s, TERRAIN) ; f = flux(s, FIRMES, 0) ; c = enfant(s, CONSOMMATEURS)
+"""
+
+# les clefs des flux d'une simulation
+TERRAIN, FIRMES, CONSOMMATEURS = 0, 1, 2
+
+def sequence(graine: int = None) -> np.random.SeedSequence:
+    """ la racine des flux d'une simulation
+    graine None : tirée des générateurs globaux, random.seed et
+    np.random.seed suffisent alors à rejouer la simulation
+    """
+    if graine is None:
+        graine = [random.getrandbits(32),
+                  int(np.random.randint(2 ** 32, dtype=np.int64))]
+    return np.random.SeedSequence(graine)
+
+def enfant(racine: np.random.SeedSequence,
+           *cle: int) -> np.random.SeedSequence:
+    """ la sous-séquence cle de racine, sans effet sur racine """
+    return np.random.SeedSequence(racine.entropy,
+                                  spawn_key=racine.spawn_key + tuple(cle),
+                                  pool_size=racine.pool_size)
+
+def flux(racine: np.random.SeedSequence, *cle: int) -> np.random.Generator:
+    """ le générateur de la sous-séquence cle de racine """
+    return np.random.default_rng(enfant(racine, *cle))
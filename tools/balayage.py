@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__version__ = "$Id: balayage.py,v 1.1 2026/10/18 16:48:55 mmc Exp $"
+__usage__ = "Balayage non interactif des paramètres de simulation"
+
+from tools.ensemble import replique
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import hashlib
+import itertools
+import json
+import os
+import numpy as np
+
+"""
+Toutes les combinaisons d'une grille de paramètres sont simulées
+sans aucune question, chaque point fini est rangé sur disque
+sous le nom <hash>.npz : un balayage interrompu reprend là où
+il s'est arrêté
+
+grille: {parametre: [valeurs], ...} parmi PARAMETRES
+les paramètres absents gardent la valeur de Terrain, sauf
+nbTour et ordre qui prennent leur valeur de DEFAUTS
+"""
+
+# les paramètres de Terrain.simulation
+PARAMETRES = ("nbTour ordre firmePM prixMinimum prixMaximum clientCost "
+              "clientPreference clientUtility clientPM").split()
+DEFAUTS = {'nbTour': 5000, 'ordre': False}
+SERIES = ('parts', 'prix', 'positions')
+
+def canonique(x):
+    """ forme stable, transformable en json, d'un paramètre """
+    if isinstance(x, dict):
+        return {str(k): canonique(v) for k, v in sorted(x.items())}
+    if isinstance(x, (list, tuple)): return [canonique(v) for v in x]
+    if callable(x):
+        _n = "{}.{}".format(x.__module__, x.__qualname__)
+        if '<' in _n:
+            raise ValueError("{}: module-level function required".format(_n))
+        return _n
+    if isinstance(x, np.generic): return x.item()
+    return x
+
+def cle(terrain, population: list, point: dict, graine: int,
+        firmes: list = None) -> str:
+    """ l'empreinte d'une simulation """
+    _d = canonique({'terrain': terrain, 'population': population,
+                    'point': point, 'graine': graine, 'firmes': firmes})
+    return hashlib.sha1(json.dumps(_d, sort_keys=True).encode()).hexdigest()
+
+def points(grille: dict) -> list:
+    """ toutes les combinaisons de la grille """
+    _bad = set(grille).difference(PARAMETRES)
+    if _bad: raise ValueError("unknown parameters {}".format(sorted(_bad)))
+    _k = [k for k in PARAMETRES if k in grille]
+    return [dict(zip(_k, v))
+            for v in itertools.product(*[list(grille[k]) for k in _k])]
+
+def simuler(terrain, population: list, point: dict, graine: int,
+            firmes: list = None) -> dict:
+    """ la simulation d'un point de la grille """
+    _p = dict(point)
+    nb = _p.pop('nbTour', DEFAUTS['nbTour'])
+    flag = _p.pop('ordre', DEFAUTS['ordre'])
+    return replique(terrain, population, nb, flag, graine, _p, firmes)
+
+def sauver(fichier: str, data: dict) -> None:
+    """ écriture atomique : un fichier présent est toujours complet """
+    _tmp = fichier + ".tmp.npz"
+    np.savez(_tmp, **data)
+    os.replace(_tmp, fichier)
+
+def charger(fichier: str) -> dict:
+    with np.load(fichier) as _f:
+        return {k: _f[k] for k in SERIES}
+
+def balayage(grille: dict, terrain, population: list, graines=(0,),
+             firmes: list = None, dossier: str = 'Data/balayage',
+             workers: int = None) -> list:
+    """ simule chaque point de la grille pour chaque graine
+
+    :dossier: le cache sur disque
+    :workers: nombre de processus, None: autant que de coeurs,
+              0: tout dans le processus courant
+
+    @return une liste de dictionnaires point, graine, cle, cache
+    (True si lu sur disque) et les séries parts, prix, positions
+    """
+    os.makedirs(dossier, exist_ok=True)
+    _todo = [] ; _out = []
+    for _p in points(grille):
+        for g in graines:
+            _k = cle(terrain, population, _p, g, firmes)
+            _f = os.path.join(dossier, _k + ".npz")
+            _d = {'point': _p, 'graine': g, 'cle': _k}
+            _out.append(_d)
+            if os.path.isfile(_f):
+                _d['cache'] = True ; _d.update(charger(_f))
+            else:
+                _d['cache'] = False ; _todo.append((_d, _f))
+
+    if workers == 0:
+        for _d, _f in _todo:
+            _r = simuler(terrain, population, _d['point'], _d['graine'], firmes)
+            sauver(_f, _r) ; _d.update(_r)
+    elif _todo:
+        with ProcessPoolExecutor(max_workers=workers) as _pool:
+            _job = {_pool.submit(simuler, terrain, population, _d['point'],
+                                 _d['graine'], firmes): (_d, _f)
+                    for _d, _f in _todo}
+            # chaque point est rangé dès qu'il est fini
+            for _x in as_completed(_job):
+                _d, _f = _job[_x]
+                _r = _x.result()
+                sauver(_f, _r) ; _d.update(_r)
+    return _out
@@ -0,0 +1,154 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__version__ = "$Id: banc.py,v 1.1 2026/10/18 19:42:16 mmc Exp $"
+__usage__ = "Banc d'essai des performances du moteur Hotelling"
+
+import projet
+from projet import Terrain
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+"""
+python3 -m tools.banc [--complet] [--tours N] [--sortie f.json]
+                      [--reference base.json] [--tolerance .2]
+
+Chaque scénario est simulé deux fois avec la même graine :
+une fois pour le débit (tours/s) et le détail des phases
+(Terrain.stats), une fois sous tracemalloc pour le pic mémoire
+Un scénario est en régression si son débit baisse ou si son pic
+mémoire augmente de plus de tolerance par rapport à la référence
+"""
+
+TAILLES = [(1, 10), (10, 10), (30, 30), (100, 100), (300, 300)]
+CLASSES = ("Consommateur", "RandConso", "PlusConso", "AdjustConso")
+# le scénario de base, dont on fait varier un paramètre à la fois
+BASE = {'lig': 30, 'col': 30, 'borne': True, 'voisinage': True,
+        'obstacles': 0., 'firmes': 2, 'classe': "RandConso"}
+
+def nommer(sc: dict) -> str:
+    return "{lig}x{col}-{b}-{v}-obs{o}-f{firmes}-{classe}".format(
+        b="borne" if sc['borne'] else "tore",
+        v="vN" if sc['voisinage'] else "Moore",
+        o=int(sc['obstacles'] * 100), **sc)
+
+def scenarios(complet: bool = False) -> list:
+    """ la liste des scénarios standard
+    :complet: toutes les combinaisons, sinon un axe à la fois
+    """
+    _axes = {'taille': TAILLES, 'borne': (True, False),
+             'voisinage': (True, False), 'obstacles': (0., .1),
+             'firmes': (2, 3, 4), 'classe': CLASSES}
+    _l = []
+    if complet:
+        for _v in itertools.product(*_axes.values()):
+            _d = dict(zip(_axes, _v))
+            (_d['lig'], _d['col']) = _d.pop('taille')
+            _l.append(_d)
+    else:
+        for k, vals in _axes.items():
+            for v in vals:
+                _d = dict(BASE)
+                if k == 'taille': _d['lig'], _d['col'] = v
+                else: _d[k] = v
+                if _d not in _l: _l.append(_d)
+    return _l
+
+def preparer(sc: dict, graine: int) -> Terrain:
+    random.seed(graine) ; np.random.seed(graine)
+    _area = sc['lig'] * sc['col']
+    t = Terrain(sc['lig'], sc['col'], sc['borne'],
+                round(_area * sc['obstacles']), sc['firmes'],
+                None, sc['voisinage'])
+    t.graine = graine
+    t.population = [(getattr(projet, sc['classe']), _area)]
+    t.reset()
+    return t
+
+def mesurer(sc: dict, tours: int, graine: int = 0,
+            memoire: bool = True) -> dict:
+    """ débit, phases et pic mémoire d'un scénario """
+    with contextlib.redirect_stdout(io.StringIO()):
+        t = preparer(sc, graine)
+        t.stats.actif = True
+        _t = time.perf_counter()
+        t.run(tours, False)
+        _s = time.perf_counter() - _t
+    _r = {'nom': nommer(sc), 'params': sc, 'tours': tours,
+          'secondes': _s, 'tours_s': tours / _s if _s > 0 else None,
+          'phases': {k: v['mean'] for k, v in t.stats.resume().items()},
+          'pic_octets': None}
+    if memoire:
+        with contextlib.redirect_stdout(io.StringIO()):
+            tracemalloc.start()
+            try:
+                preparer(sc, graine).run(tours, False)
+                _r['pic_octets'] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    return _r
+
+def banc(complet: bool = False, tours: int = 20, graine: int = 0,
+         memoire: bool = True, trace: bool = True) -> dict:
+    """ tous les scénarios, au format du fichier json """
+    _l = []
+    for sc in scenarios(complet):
+        _l.append(mesurer(sc, tours, graine, memoire))
+        if trace:
+            print("{nom:<42} {tours_s:>10.1f} tours/s".format(**_l[-1]),
+                  file=sys.stderr)
+    return {'version': 1, 'date': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'scenarios': _l}
+
+def comparer(resultat: dict, reference: dict,
+             tolerance: float = .2) -> list:
+    """ les régressions (nom, mesure, référence, valeur) """
+    _ref = {x['nom']: x for x in reference.get('scenarios', [])}
+    _l = []
+    for x in resultat['scenarios']:
+        y = _ref.get(x['nom'])
+        if y is None: continue
+        if (x['tours_s'] and y['tours_s'] and
+            x['tours_s'] < y['tours_s'] * (1 - tolerance)):
+            _l.append((x['nom'], 'tours_s', y['tours_s'], x['tours_s']))
+        if (x['pic_octets'] and y['pic_octets'] and
+            x['pic_octets'] > y['pic_octets'] * (1 + tolerance)):
+            _l.append((x['nom'], 'pic_octets', y['pic_octets'],
+                       x['pic_octets']))
+    return _l
+
+def main(args=None) -> int:
+    _p = argparse.ArgumentParser(description=__usage__)
+    _p.add_argument('--complet', action='store_true',
+                    help="toutes les combinaisons de scénarios")
+    _p.add_argument('--tours', type=int, default=20)
+    _p.add_argument('--graine', type=int, default=0)
+    _p.add_argument('--sans-memoire', action='store_true')
+    _p.add_argument('--sortie', default=None, help="fichier json")
+    _p.add_argument('--reference', default=None, help="json de référence")
+    _p.add_argument('--tolerance', type=float, default=.2)
+    _a = _p.parse_args(args)
+    _r = banc(_a.complet, _a.tours, _a.graine, not _a.sans_memoire)
+    if _a.sortie:
+        with open(_a.sortie, 'w') as _f: json.dump(_r, _f, indent=1)
+    if _a.reference is None: return 0
+    with open(_a.reference) as _f: _reg = comparer(_r, json.load(_f),
+                                                   _a.tolerance)
+    for nom, m, ref, val in _reg:
+        print("REGRESSION {} {}: {:.4g} -> {:.4g}".format(nom, m, ref, val))
+    return 1 if _reg else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
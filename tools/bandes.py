@@ -0,0 +1,209 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__version__ = "$Id: bandes.py,v 1.1 2026/10/18 21:12:40 mmc Exp $"
+__usage__ = "Phase consommateurs répartie en bandes de lignes"
+
+from tools.consommateurs import departage, recompenses, tirage
+from tools import grille
+from multiprocessing import resource_tracker, shared_memory
+import multiprocessing
+import traceback
+import weakref
+import numpy as np
+
+"""
+Le terrain est découpé en bandes de lignes, une par processus.
+Les processus sont persistants, toutes les données passent par un
+unique segment de mémoire partagée : les tubes ne transportent que
+des ordres de quelques octets
+
+Un tour se fait en deux ordres
+  departage: distances (sans obstacle) puis départage déterministe
+  recompenses: récompenses, maximum par case et quantités partielles
+entre les deux, le tirage au sort final est fait par le processus
+principal sur tout le terrain : le générateur est consommé exactement
+comme par la version mono-processus, les résultats sont identiques
+"""
+
+ALIGNEMENT = 64
+
+def disposition(n: int, f: int, w: int) -> tuple:
+    """ les tableaux partagés pour n cases, f firmes et w bandes
+    @return {nom: (dtype, shape, offset)}, la taille totale en octets
+    """
+    _t = (('position', np.int64, (f,)), ('prix', float, (f,)),
+          ('libre', bool, (n,)), ('rayon', np.int32, (n,)),
+          ('preference', float, (n, f)), ('utilite', float, (n,)),
+          ('penalite', float, (n,)), ('distance', float, (n, f)),
+          ('choix', bool, (n, f)), ('recompense', float, (n, f)),
+          ('maximum', float, (n,)), ('quantite', np.int64, (w, f)))
+    _d = {} ; _off = 0
+    for nom, dt, sh in _t:
+        _d[nom] = (np.dtype(dt), sh, _off)
+        _off += -(-int(np.prod(sh)) * np.dtype(dt).itemsize
+                  // ALIGNEMENT) * ALIGNEMENT
+    return _d, max(_off, 1)
+
+def vues(buf, plan: dict) -> dict:
+    """ un tableau numpy par nom, sur le segment buf """
+    return {nom: np.ndarray(sh, dtype=dt, buffer=buf, offset=off)
+            for nom, (dt, sh, off) in plan.items()}
+
+def _bande(tube) -> None:
+    """ la boucle d'un processus : attend un ordre, l'exécute, répond """
+    _shm = None ; _v = None
+    while True:
+        _o = tube.recv()
+        if _o is None: break
+        try:
+            if _o[0] == 'config':
+                (_, nom, n, f, w, idx, a, b, geo) = _o
+                if _shm is not None: _v = None ; _shm.close()
+                # le suivi des ressources est celui du processus principal,
+                # seul à détruire le segment
+                _shm = shared_memory.SharedMemory(name=nom)
+                _v = vues(_shm.buf, disposition(n, f, w)[0])
+            elif _o[0] == 'departage':
+                _j = a + np.flatnonzero(_v['libre'][a:b])
+                if _o[1]: # sans obstacle, calcul local des distances
+                    _d = grille.ecarts(*geo, _v['position'],
+                                       _j).astype(float)
+                else:
+                    _d = _v['distance'][_j]
+                _d[:, np.isinf(_v['prix'])] = np.inf
+                _v['choix'][a:b] = False
+                _v['choix'][_j] = departage(_d, _v['rayon'][_j],
+                                            _v['preference'][_j],
+                                            _v['prix'])
+            elif _o[0] == 'recompenses':
+                _j = a + np.flatnonzero(_v['libre'][a:b])
+                _c = _v['choix'][_j]
+                _r = recompenses(_c, _v['preference'][_j],
+                                 _v['utilite'][_j], _v['prix'],
+                                 _v['penalite'][_j])
+                _v['recompense'][_j] = _r
+                _v['maximum'][_j] = np.nanmax(_r, axis=1)
+                _v['quantite'][idx] = _c.sum(0)
+            tube.send(None)
+        except Exception:
+            tube.send(traceback.format_exc())
+    _v = None
+    if _shm is not None: _shm.close()
+
+def _liberer(procs: list, tubes: list, shm: list) -> None:
+    """ arrêt des processus et libération du segment """
+    for _t in tubes:
+        try: _t.send(None)
+        except Exception: pass
+    for _p in procs:
+        _p.join(1)
+        if _p.is_alive(): _p.terminate()
+    for _s in shm:
+        try: _s.close()
+        except BufferError: pass # une vue survit, le système libérera
+        _s.unlink()
+    shm.clear()
+
+class Bandes:
+    """ processus persistants pour la phase consommateurs
+
+    b = Bandes(4)
+    b.preparer(lig, col, fini, voisinage, firmes)
+    v = b.vues ; on remplit position, prix, libre, rayon, preference
+    choix = b.choix(calcul) ; on remplit utilite, penalite
+    qte = b.recompenses() ; v['recompense'], v['maximum'] sont à jour
+    b.fermer()
+    """
+    def __init__(self, nb: int):
+        if nb < 1: raise ValueError("at least one process expected")
+        self.__nb = nb
+        self.__procs = []
+        self.__tubes = []
+        self.__shm = [] # le segment courant, liste pour _liberer
+        self.__cfg = None
+        self.__vues = None
+        self.__actifs = []
+        self.__fin = weakref.finalize(self, _liberer, self.__procs,
+                                      self.__tubes, self.__shm)
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, self.__nb)
+
+    @property
+    def nb(self) -> int:
+        """ le nombre de processus demandés """
+        return self.__nb
+
+    @property
+    def vues(self) -> dict:
+        """ les tableaux partagés, None avant preparer """
+        return self.__vues
+
+    def preparer(self, lig: int, col: int, fini: bool, voisinage: bool,
+                 firmes: int) -> None:
+        """ démarre les processus, (re)crée le segment si besoin """
+        _cfg = (lig, col, fini, voisinage, firmes)
+        if _cfg == self.__cfg: return
+        if not self.__fin.alive: raise RuntimeError("closed")
+        if not self.__procs:
+            # un seul suivi des ressources, hérité par les processus :
+            # sinon chacun détruirait le segment en s'arrêtant
+            resource_tracker.ensure_running()
+            _ctx = multiprocessing.get_context()
+            for _ in range(self.__nb):
+                _a, _b = _ctx.Pipe()
+                _p = _ctx.Process(target=_bande, args=(_b,), daemon=True)
+                _p.start()
+                self.__procs.append(_p) ; self.__tubes.append(_a)
+        # pas plus de bandes que de lignes
+        _w = min(self.__nb, lig)
+        _plan, _taille = disposition(lig * col, firmes, _w)
+        self.__vues = None
+        _liberer([], [], self.__shm)
+        self.__shm.append(shared_memory.SharedMemory(create=True,
+                                                     size=_taille))
+        self.__vues = vues(self.__shm[0].buf, _plan)
+        self.__vues['choix'][:] = False
+        _l = np.array_split(np.arange(lig), _w)
+        self.__actifs = self.__tubes[:_w]
+        for k, (_t, _r) in enumerate(zip(self.__actifs, _l)):
+            _t.send(('config', self.__shm[0].name, lig * col, firmes, _w,
+                     k, int(_r[0]) * col, (int(_r[-1]) + 1) * col,
+                     (lig, col, fini, voisinage)))
+        self.__attendre()
+        self.__cfg = _cfg
+
+    def __ordre(self, *ordre) -> None:
+        for _t in self.__actifs: _t.send(ordre)
+        self.__attendre()
+
+    def __attendre(self) -> None:
+        _e = [_t.recv() for _t in self.__actifs]
+        _e = [x for x in _e if x is not None]
+        if _e: raise RuntimeError("worker failed\n" + _e[0])
+
+    def choix(self, calcul: bool, rng=None) -> np.ndarray:
+        """ départage par bandes puis tirage au sort sur tout le terrain
+        :calcul: True, les distances sont calculées par les processus,
+                 False, elles ont été rangées dans vues['distance']
+        :rng: le générateur du tirage au sort, cf tirage
+        @return vues['choix'] (cases, firmes), False hors des cases libres
+        """
+        self.__ordre('departage', calcul)
+        return tirage(self.__vues['choix'], rng)
+
+    def recompenses(self) -> np.ndarray:
+        """ @return les quantités par firme """
+        self.__ordre('recompenses')
+        return self.__vues['quantite'].sum(0)
+
+    def fermer(self) -> None:
+        """ arrête les processus et libère la mémoire partagée,
+        définitivement : il faudra un nouvel objet
+        """
+        self.__vues = None
+        self.__cfg = None
+        self.__fin()
@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__version__ = "$Id: chrono.py,v 1.1 2026/10/18 19:10:04 mmc Exp $"
+__usage__ = "Chronométrage des phases d'une simulation"
+
+import time
+import numpy as np
+
+"""
+_t = c.top()
+... phase A ...
+_t = c.mesure('A', _t)
+... phase B ...
+_t = c.mesure('B', _t)
+c.finTour()
+
+Inactif, top et mesure renvoient 0 sans lire l'horloge
+Les durées sont en nanosecondes (perf_counter_ns)
+"""
+
+class Chronos:
+    """ durées cumulées par tour de chaque phase """
+    def __init__(self, actif: bool = False):
+        self.__actif = actif if isinstance(actif, bool) else False
+        self.__courant = {} # le tour en cours
+        self.__series = {} # phase -> durées par tour
+        self.__tours = 0
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, self.__actif)
+
+    def __str__(self):
+        """ tableau en millisecondes """
+        _str = "{:<14} {:>6} {:>10} {:>9} {:>9} {:>9} {:>9}\n".format(
+            "phase", "n", "total", "mean", "p50", "p95", "max")
+        for k, v in self.resume().items():
+            _str += "{:<14} {:>6} {:>10.3f} {:>9.3f} {:>9.3f} {:>9.3f} " \
+                    "{:>9.3f}\n".format(k, v['n'], v['total'] / 1e6,
+                                        v['mean'] / 1e6, v['p50'] / 1e6,
+                                        v['p95'] / 1e6, v['max'] / 1e6)
+        return _str
+
+    def get_actif(self) -> bool:
+        return self.__actif
+    def set_actif(self, v: bool) -> None:
+        if isinstance(v, bool):
+            if v and not self.__actif: self.__courant = {}
+            self.__actif = v
+    actif = property(get_actif, set_actif, None, "chronométrage en marche")
+
+    @property
+    def tours(self) -> int:
+        """ nombre de tours chronométrés """
+        return self.__tours
+    @property
+    def phases(self) -> list:
+        return list(self.__series)
+
+    def top(self) -> int:
+        """ l'instant présent, 0 si inactif """
+        return time.perf_counter_ns() if self.__actif else 0
+
+    def mesure(self, phase: str, debut: int) -> int:
+        """ ajoute la durée depuis debut à phase, renvoie l'instant présent """
+        if not self.__actif: return 0
+        _t = time.perf_counter_ns()
+        self.__courant[phase] = self.__courant.get(phase, 0) + _t - debut
+        return _t
+
+    def finTour(self) -> None:
+        """ range les durées du tour en cours """
+        if not self.__actif: return
+        for k, v in self.__courant.items():
+            self.__series.setdefault(k, []).append(v)
+        self.__courant = {}
+        self.__tours += 1
+
+    def reset(self) -> None:
+        self.__courant = {}
+        self.__series = {}
+        self.__tours = 0
+
+    def serie(self, phase: str) -> np.ndarray:
+        """ les durées par tour de phase """
+        return np.array(self.__series.get(phase, []), dtype=np.int64)
+
+    def resume(self) -> dict:
+        """ phase -> n, total, mean, p50, p95, max """
+        _d = {}
+        for k in self.__series:
+            _a = self.serie(k)
+            _d[k] = {'n': _a.size, 'total': int(_a.sum()),
+                     'mean': float(_a.mean()),
+                     'p50': float(np.percentile(_a, 50)),
+                     'p95': float(np.percentile(_a, 95)),
+                     'max': int(_a.max())}
+        return _d
@@ -0,0 +1,289 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__version__ = "$Id: consommateurs.py,v 1.1 2026/10/18 14:31:07 mmc Exp $"
+__usage__ = "Consommateurs du terrain stockés par colonnes"
+
+from tools.mmcContainer import spy
+from tools import aleas, stockage
+import numpy as np
+
+"""
+Une ligne par case du terrain, classe -1 pour un obstacle
+Les objets consommateurs ne sont construits qu'à la demande (agent),
+les colonnes restent la référence pour la simulation
+"""
+
+def groupee(klass, nom: str):
+    """ la version groupée (nom + 's') de la méthode nom
+    None si la classe qui définit nom ne la fournit pas elle-même
+    """
+    for _k in klass.__mro__:
+        if nom in vars(_k):
+            return getattr(klass, nom + 's') if nom + 's' in vars(_k) else None
+    return None
+
+def choix(dist: np.ndarray, rayons, preference: np.ndarray,
+          prix: np.ndarray, rng=None) -> np.ndarray:
+    """ la firme retenue par chaque consommateur
+
+    :dist: (n, firmes) distances, np.inf pour une firme absente
+    :rayons: (n,) les rayons de recherche
+    :preference: (n, firmes) les préférences
+    :prix: (firmes,) les prix, np.inf pour une firme absente
+    :rng: le générateur du tirage au sort, cf tirage
+
+    départage successif des lignes ambiguës : prix pondéré,
+    préférence, prix, distance puis hasard
+    @return un tableau (n, firmes) de booléens, au plus un True par ligne
+    """
+    return tirage(departage(dist, rayons, preference, prix), rng)
+
+def departage(dist: np.ndarray, rayons, preference: np.ndarray,
+              prix: np.ndarray) -> np.ndarray:
+    """ choix sans le tirage au sort final, ligne par ligne
+    @return un tableau (n, firmes) de booléens, les lignes ayant
+    plusieurs True sont à tirer au sort
+    """
+    _v = dist <= np.asarray(rayons)[:, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        _r = _v.sum(1) > 1
+        if _r.any():
+            _p = preference[_r]
+            _w = (1 - _p / _p.sum(1, keepdims=True)) * prix
+            _v[_r] = _w == _w.min(1, keepdims=True)
+        _r = _v.sum(1) > 1
+        if _r.any():
+            _p = preference[_r]
+            _v[_r] = _p == _p.max(1, keepdims=True)
+        _r = _v.sum(1) > 1
+        if _r.any():
+            _v[_r] = prix == prix.min()
+        _r = _v.sum(1) > 1
+        if _r.any():
+            _d = dist[_r]
+            _v[_r] = _d == _d.min(1, keepdims=True)
+    return _v
+
+def tirage(choix: np.ndarray, rng=None) -> np.ndarray:
+    """ tirage uniforme parmi les ex-aequo de chaque ligne, sur place
+    :rng: np.random.Generator ou RandomState, np.random par défaut,
+          consommé dans l'ordre des lignes ambiguës
+    """
+    _r = np.flatnonzero(choix.sum(1) > 1)
+    if _r.size > 0:
+        _c = choix[_r].cumsum(1)
+        _r0 = np.random if rng is None else rng
+        _k = (_r0.random(_r.size) * _c[:, -1]).astype(int)
+        _j = (_c > _k[:, None]).argmax(1)
+        choix[_r] = False
+        choix[_r, _j] = True
+    return choix
+
+def recompenses(gagne: np.ndarray, preference: np.ndarray, utilite,
+                prix: np.ndarray, penalite) -> np.ndarray:
+    """ (n, firmes) les récompenses, la pénalité seule hors de la firme
+    retenue ou quand le calcul n'a pas de sens (np.nan)
+    utilite et penalite sont des scalaires ou des vecteurs (n,)
+    """
+    _pen = np.asarray(penalite, dtype=float).reshape(-1, 1)
+    _u = np.asarray(utilite, dtype=float).reshape(-1, 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        _r = (gagne * (preference / preference.mean(1, keepdims=True)) *
+              (_u - prix) + _pen)
+    return np.where(np.isnan(_r), _pen, _r)
+
+class Consommateurs:
+    """ population de consommateurs en colonnes numpy """
+    def __init__(self, klasses: list, classe, preference,
+                 estFixe, utilite, pm, cout: callable):
+        """
+        :klasses: les classes de consommateurs, indexées par classe
+        :classe: (area,) indice dans klasses, -1 pour un obstacle
+        :preference: (area, firmes) préférences envers chaque firme
+        :estFixe: (area,) booléen, True si les préférences sont figées
+        :utilite: (area,) ou scalaire, l'utilité d'achat
+        :pm: (area,) ou scalaire, le rayon maximal
+        :cout: la fonction de coût commune
+        """
+        self.__klasses = list(klasses)
+        self.__classe = np.asarray(classe, dtype=np.int16).copy()
+        _n = self.__classe.size
+        self.__pref = np.array(preference, dtype=float).reshape(_n, -1)
+        self.__fixe = np.broadcast_to(np.asarray(estFixe, dtype=bool),
+                                      (_n,)).copy()
+        self.__util = np.broadcast_to(np.asarray(utilite, dtype=float),
+                                      (_n,)).copy()
+        self.__pm = np.broadcast_to(np.asarray(pm, dtype=np.int32),
+                                    (_n,)).copy()
+        self.__rayon = np.zeros(_n, dtype=np.int32)  # dernière décision
+        # la case d'origine, clef du flux de l'objet (suit permute)
+        self.__cle = np.arange(_n, dtype=np.int64)
+        self.__cout = cout
+        self.__agents = {}  # les objets déjà construits
+        self.__graine = None  # la racine des flux, cf semer
+        self.__rng = None
+
+    def __repr__(self):
+        return "{}({}, {})".format(self.__class__.__name__,
+                                   [k.__name__ for k in self.__klasses],
+                                   self.taille)
+
+    def __len__(self):
+        """ nombre de consommateurs (obstacles exclus) """
+        return int((self.__classe >= 0).sum())
+
+    @property
+    def taille(self) -> int: return self.__classe.size
+    @property
+    def klasses(self) -> list: return self.__klasses[:]
+    @property
+    def classe(self) -> np.ndarray: return self.__classe
+    @property
+    def bloque(self) -> np.ndarray: return self.__classe < 0
+    @property
+    def preference(self) -> np.ndarray: return self.__pref
+    @property
+    def estFixe(self) -> np.ndarray: return self.__fixe
+    @property
+    def utilite(self) -> np.ndarray: return self.__util
+    @property
+    def pm(self) -> np.ndarray: return self.__pm
+    @property
+    def rayon(self) -> np.ndarray: return self.__rayon
+    @property
+    def cout(self) -> callable: return self.__cout
+    @property
+    def rng(self):
+        """ le générateur des décisions groupées, np.random par défaut """
+        return np.random if self.__rng is None else self.__rng
+
+    def semer(self, graine: np.random.SeedSequence) -> None:
+        """ les décisions groupées tirent dans le flux 0 de graine,
+        l'objet né en case c dans le flux (1, c), cf tools.aleas :
+        le flux ne dépend pas de l'ordre de construction des objets
+        """
+        self.__graine = graine
+        self.__rng = aleas.flux(graine, 0)
+        for idx, _a in self.agents(): self.__doter(idx, _a)
+
+    def __doter(self, idx: int, agent) -> None:
+        agent.rng = aleas.flux(self.__graine, 1, int(self.__cle[idx]))
+
+    def agent(self, idx: int):
+        """ l'objet consommateur de la case idx, None pour un obstacle
+        construit au premier accès puis conservé
+        """
+        if self.__classe[idx] < 0: return None
+        _a = self.__agents.get(idx)
+        if _a is None:
+            klass = self.__klasses[self.__classe[idx]]
+            _a = klass(self.__cout, self.__pref[idx].tolist(),
+                       bool(self.__fixe[idx]), int(self.__util[idx]),
+                       int(self.__pm[idx]))
+            self.__agents[idx] = _a
+            if self.__graine is not None: self.__doter(idx, _a)
+        return _a
+
+    @spy
+    def decider(self) -> np.ndarray:
+        """ le rayon de chaque case, 0 pour un obstacle
+        une classe fournissant getDecisions(n, rng) décide d'un seul
+        bloc, les autres passent par leurs objets
+        """
+        self.__rayon[:] = 0
+        for k, klass in enumerate(self.__klasses):
+            _i = np.flatnonzero(self.__classe == k)
+            if _i.size == 0: continue
+            _f = groupee(klass, 'getDecision')
+            if _f is None:
+                self.__rayon[_i] = [self.agent(i).getDecision()
+                                    for i in _i.tolist()]
+            else:
+                self.__rayon[_i] = _f(_i.size, rng=self.rng)
+        return self.__rayon
+
+    @spy
+    def apprendre(self, recompenses: list) -> None:
+        """ updateModel de chaque consommateur, recompenses par case
+        une classe fournissant updateModels apprend d'un seul bloc
+        """
+        for k, klass in enumerate(self.__klasses):
+            _i = np.flatnonzero(self.__classe == k).tolist()
+            if _i == []: continue
+            _f = groupee(klass, 'updateModel')
+            if _f is None:
+                for i in _i: self.agent(i).updateModel(recompenses[i])
+            else:
+                _f([recompenses[i] for i in _i])
+
+    def etat(self) -> dict:
+        """ les colonnes, les cases des objets déjà construits avec leurs
+        attributs (dont leur flux) et les flux, cf reprendre ;
+        la fonction de coût n'est pas rangée
+        """
+        return {'klasses': self.klasses, 'classe': self.__classe,
+                'preference': self.__pref, 'estFixe': self.__fixe,
+                'utilite': self.__util, 'pm': self.__pm,
+                'rayon': self.__rayon, 'cle': self.__cle,
+                'construits': np.array(sorted(self.__agents), dtype=np.int64),
+                'agents': [stockage.etatObjet(a) for _, a in self.agents()],
+                'graine': self.__graine, 'rng': self.__rng}
+
+    @classmethod
+    def reprendre(cls, etat: dict, cout: callable):
+        """ la population rangée par etat, les objets sont reconstruits
+        depuis les colonnes avec la fonction de coût cout, puis reprennent
+        leurs attributs et la position de leur flux
+        """
+        _c = cls(etat['klasses'], etat['classe'], etat['preference'],
+                 etat['estFixe'], etat['utilite'], etat['pm'], cout)
+        _c.rayon[:] = etat['rayon']
+        _c.__cle[:] = etat['cle']
+        _c.__graine = etat['graine']
+        _c.__rng = etat['rng']
+        for i, _e in zip(etat['construits'].tolist(), etat['agents']):
+            _a = _c.agent(i)
+            stockage.objetDepuis(type(_a), _e, _a)
+        return _c
+
+    def agents(self):
+        """ itère sur les objets déjà construits (idx, objet) """
+        for idx in sorted(self.__agents): yield idx, self.__agents[idx]
+
+    def permute(self, perm) -> None:
+        """ la case i reçoit le contenu de la case perm[i] """
+        _p = np.asarray(perm, dtype=np.int64)
+        for _c in (self.__classe, self.__pref, self.__fixe,
+                   self.__util, self.__pm, self.__rayon, self.__cle):
+            _c[:] = _c[_p]
+        _inv = np.empty_like(_p)
+        _inv[_p] = np.arange(_p.size)
+        self.__agents = {int(_inv[i]): a for i, a in self.__agents.items()}
+
+def peupler(population, bloque, firmes: int, typePreference: int,
+            utilite, pm, cout: callable, rng=None) -> Consommateurs:
+    """ remplit toutes les cases libres d'un seul coup
+
+    :population: MultiSet {classe: effectif}, au moins une par case libre
+    :bloque: (area,) booléen, True pour un obstacle
+    :typePreference: 0..3, estFixe vaut True pour 0 et 1, False pour 2,
+                     tiré au hasard pour 3
+    :rng: np.random.Generator ou RandomState, np.random par défaut
+
+    chaque case libre reçoit une classe tirée sans remise dans
+    population, des préférences à 1 pour chaque firme
+    """
+    _r = np.random if rng is None else rng
+    _libre = ~np.asarray(bloque, dtype=bool)
+    _n = int(_libre.sum())
+    _id = np.full(_libre.size, -1, dtype=np.int16)
+    _id[_libre] = population.sample(_n, _r)
+    _fixe = np.ones(_libre.size, dtype=bool)
+    if typePreference == 2: _fixe[_libre] = False
+    elif typePreference == 3: _fixe[_libre] = _r.random(_n) < .5
+    return Consommateurs(population.keys(), _id,
+                         np.ones((_libre.size, firmes)), _fixe,
+                         utilite, pm, cout)
@@ -0,0 +1,131 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__version__ = "$Id: ensemble.py,v 1.1 2026/10/18 16:02:19 mmc Exp $"
+__usage__ = "Répliques indépendantes d'une même simulation"
+
+from projet import Terrain
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import io
+import random
+import warnings
+import numpy as np
+
+"""
+Chaque réplique tourne dans son propre processus avec sa graine,
+seules les séries (tours x firmes) reviennent au processus parent,
+jamais l'Historique complet
+
+terrain: les paramètres de Terrain, dictionnaire ou séquence
+population: [(classe de consommateur, effectif), ...]
+parametres: {attribut de Terrain: valeur}, ex {'prixMaximum': 20}
+firmes: [classe de firme, ...] remplace les Firme par défaut
+
+Tout doit pouvoir être transmis par pickle (pas de lambda)
+Une réplique ne dépend que de sa graine (Terrain.graine), pas du
+processus qui la simule ; random et np.random sont aussi semés pour
+les agents qui y puisent encore
+"""
+
+# les bornes de prix avant l'utilité qui en dépend
+ORDRE = ("prixMinimum", "prixMaximum", "clientUtility")
+
+def appliquer(t: Terrain, parametres: dict) -> None:
+    """ fixe les attributs de t, ValueError pour une valeur refusée
+    par Terrain : la simulation ne serait pas celle demandée
+    """
+    _p = dict(parametres or {})
+    _k = sorted(_p, key=lambda a: ORDRE.index(a) if a in ORDRE else -1)
+    if 'prixMaximum' in _p and _p.get('prixMinimum', 0) > t.prixMaximum:
+        # le nouveau minimum dépasse l'ancien maximum
+        _k.remove('prixMaximum') ; _k.insert(_k.index('prixMinimum'),
+                                             'prixMaximum')
+    for att in _k:
+        setattr(t, att, _p[att])
+        if getattr(t, att) != _p[att]:
+            raise ValueError("{}={!r} refused, {!r} kept"
+                             .format(att, _p[att], getattr(t, att)))
+
+def graines(graine: int, nb: int) -> list:
+    """ nb graines indépendantes dérivées de graine """
+    _s = np.random.SeedSequence(graine).spawn(nb)
+    return [int(x.generate_state(1)[0]) for x in _s]
+
+def series(t: Terrain, h) -> dict:
+    """ parts de marché, prix et positions par tour (nb, firmes)
+    np.nan (resp. -1) tant qu'une firme n'a pas agi
+    """
+    _nb, _f = h.last or 0, t.firmes
+    _parts = np.full((_nb, _f), np.nan)
+    _prix = np.full((_nb, _f), np.nan)
+    _pos = np.full((_nb, _f), -1, dtype=np.int32)
+    for k in range(_nb):
+        _parts[k] = getattr(h, "Iter_{}".format(k + 1))['rewardFirme']
+        # le contexte du tour k est celui que lit le tour k+1
+        if k + 1 < _nb:
+            _ctx = getattr(h, "Iter_{}".format(k + 2))['contexte']
+        else:
+            _ctx = h.finalState['contexte']
+        for i, x in enumerate(_ctx or []):
+            if x is None: continue
+            (_c, _, _p) = x
+            _prix[k, i] = _p
+            _pos[k, i] = t.coord2pos(tuple(_c))
+    return {'parts': _parts, 'prix': _prix, 'positions': _pos}
+
+def replique(terrain, population: list, nb: int, flag: bool,
+             graine: int, parametres: dict = None,
+             firmes: list = None) -> dict:
+    """ une simulation complète, sans affichage
+    @return les séries de la simulation
+    """
+    random.seed(graine)
+    np.random.seed(graine)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if isinstance(terrain, dict): t = Terrain(**terrain)
+        else: t = Terrain(*terrain)
+        t.graine = graine # les flux du terrain et de ses agents
+        appliquer(t, parametres)
+        t.population = population
+        t.reset()
+        if firmes:
+            t.setFirmes([(K(t.firmePM, t.prixMinimum, t.prixMaximum),
+                          t.getPosFirme(i))
+                         for i, K in enumerate(firmes)])
+        h = t.run(nb, flag)
+    return series(t, h)
+
+def ensemble(terrain, population: list, nb: int, flag: bool,
+             repliques: int = 10, graine: int = None,
+             parametres: dict = None, firmes: list = None,
+             workers: int = None) -> dict:
+    """ repliques simulations indépendantes réparties sur des processus
+
+    :workers: nombre de processus, None: autant que de coeurs,
+              0: tout dans le processus courant
+
+    @return un dictionnaire
+        graines: la graine de chaque réplique
+        parts, prix, positions: (repliques, nb, firmes)
+        partsMoyennes, prixMoyens: (nb, firmes) moyennes sur les répliques
+    """
+    _g = graines(graine, repliques)
+    _args = [(terrain, population, nb, flag, g, parametres, firmes)
+             for g in _g]
+    if workers == 0:
+        _r = [replique(*a) for a in _args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as _pool:
+            _r = list(_pool.map(replique, *zip(*_args)))
+    _d = {'graines': _g}
+    for key in ('parts', 'prix', 'positions'):
+        _d[key] = np.stack([x[key] for x in _r])
+    with warnings.catch_warnings():
+        # une firme qui n'a jamais agi donne une moyenne vide
+        warnings.simplefilter('ignore', RuntimeWarning)
+        _d['partsMoyennes'] = np.nanmean(_d['parts'], axis=0)
+        _d['prixMoyens'] = np.nanmean(_d['prix'], axis=0)
+    return _d
@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__version__ = "$Id: grille.py,v 1.1 2026/10/18 10:12:41 mmc Exp $"
+__usage__ = "Distances sur une grille codée par positions"
+
+import functools
+import numpy as np
+
+"""
+Une case est repérée par sa position p = i * colonnes + j
+Les obstacles sont atteignables mais on ne les traverse pas,
+la case de départ est toujours explorée (cf Terrain.__withObs)
+"""
+
+# au-delà de cette taille (en octets) la matrice n'est pas construite
+# en mémoire, sauf demande explicite
+TAILLE_TABLE = 1 << 26
+# nombre maximal de couples (source, case) traités simultanément
+TAILLE_BLOC = 1 << 18
+
+#========================== voisinages =======================================#
+@functools.lru_cache(maxsize=32)
+def voisins(nbl: int, nbc: int, bound: bool = True,
+            vneumann: bool = True) -> np.ndarray:
+    """ table (nbl*nbc, 4|8) des voisins de chaque position, -1 si absent
+    calculée une seule fois par géométrie, la table est en lecture seule
+    """
+    if vneumann:
+        _v = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    else:
+        _v = [(i, j) for i in (-1, 0, 1) for j in (-1, 0, 1) if (i, j) != (0, 0)]
+    _x, _y = np.divmod(np.arange(nbl * nbc), nbc)
+    _t = np.full((nbl * nbc, len(_v)), -1, dtype=np.int64)
+    for k, (dx, dy) in enumerate(_v):
+        nx, ny = _x + dx, _y + dy
+        if bound:
+            _ok = (nx >= 0) & (nx < nbl) & (ny >= 0) & (ny < nbc)
+        else:
+            nx %= nbl ; ny %= nbc
+            _ok = np.ones(nx.size, dtype=bool)
+        _p = nx * nbc + ny
+        _t[_ok, k] = _p[_ok]
+    # monde torique étroit : soi-même et doublons sont retirés
+    _self = np.arange(nbl * nbc)
+    for k in range(len(_v)):
+        _dup = (_t[:, k] == _self)
+        for j in range(k):
+            _dup |= (_t[:, k] == _t[:, j])
+        _t[_dup & (_t[:, k] >= 0), k] = -1
+    _t.setflags(write=False)
+    return _t
+
+#========================== parcours en largeur ==============================#
+def parcours(table: np.ndarray, bloque: np.ndarray, sources,
+             profondeur: int = None) -> np.ndarray:
+    """ parcours en largeur simultané depuis chaque source
+
+    :table: la table des voisins
+    :bloque: masque booléen des obstacles
+    :sources: les positions de départ
+    :profondeur: arrêt au-delà de cette distance (None: pas de limite)
+
+    @return un tableau (len(sources), area) d'int32, -1 si inaccessible
+    """
+    _src = np.asarray(sources, dtype=np.int64).reshape(-1)
+    _n, _area = _src.size, table.shape[0]
+    _d = np.full((_n, _area), -1, dtype=np.int32)
+    _flat = _d.reshape(-1)
+    _s = np.arange(_n, dtype=np.int64)
+    _flat[_s * _area + _src] = 0
+    _cur = _src # la source est explorée même si bloquée
+    pf = 0
+    while _s.size > 0 and (profondeur is None or pf < profondeur):
+        pf += 1
+        _nxt = table[_cur].reshape(-1)
+        _who = np.repeat(_s, table.shape[1])
+        _ok = _nxt >= 0
+        _key = _who[_ok] * _area + _nxt[_ok]
+        _key = _key[_flat[_key] == -1]
+        # élimination des doublons : seule la dernière écriture subsiste
+        _i = np.arange(_key.size, dtype=np.int32)
+        _flat[_key] = -2 - _i
+        _key = _key[_flat[_key] == -2 - _i]
+        _flat[_key] = pf
+        _s, _cur = np.divmod(_key, _area)
+        _ok = ~bloque[_cur] # les obstacles ne sont pas traversés
+        _s, _cur = _s[_ok], _cur[_ok]
+    return _d
+
+def champ(table: np.ndarray, bloque: np.ndarray, source: int,
+          profondeur: int = None) -> np.ndarray:
+    """ distances (area,) depuis une seule source, -1 si inaccessible """
+    return parcours(table, bloque, [source], profondeur)[0]
+
+def typeDistance(area: int) -> np.dtype:
+    """ le plus petit entier non signé pouvant coder une distance """
+    for _t in (np.uint8, np.uint16, np.uint32):
+        if area < np.iinfo(_t).max: return np.dtype(_t)
+    return np.dtype(np.uint64)
+
+def matrice(table: np.ndarray, bloque: np.ndarray,
+            fichier: str = None) -> np.ndarray:
+    """ matrice (area, area) des distances entre toutes les positions
+    la valeur maximale du type code l'inaccessibilité
+    :fichier: si fourni, la matrice est un memmap (.npy) sur disque
+    """
+    _area = table.shape[0]
+    _t = typeDistance(_area)
+    if fichier is None:
+        _m = np.empty((_area, _area), dtype=_t)
+    else:
+        _m = np.lib.format.open_memmap(fichier, mode='w+', dtype=_t,
+                                       shape=(_area, _area))
+    _inf = np.iinfo(_t).max
+    _sz = max(1, TAILLE_BLOC // max(1, _area))
+    for i in range(0, _area, _sz):
+        _d = parcours(table, bloque, np.arange(i, min(_area, i + _sz)))
+        _m[i:i + _d.shape[0]] = np.where(_d < 0, _inf, _d)
+    if fichier is not None: _m.flush()
+    return _m
+
+#========================== monde sans obstacle ==============================#
+def ecarts(nbl: int, nbc: int, bound: bool, vneumann: bool,
+           cibles, cases=None) -> np.ndarray:
+    """ distances (nbl*nbc, len(cibles)) sans obstacle, formules closes
+    Manhattan (von Neumann) ou Chebyshev (Moore), éventuellement toriques
+    :cases: les lignes à calculer (len(cases), len(cibles)), toutes si None
+    """
+    _x, _y = np.divmod(np.arange(nbl * nbc) if cases is None
+                       else np.asarray(cases, dtype=np.int64), nbc)
+    _a, _b = np.divmod(np.asarray(cibles, dtype=np.int64).reshape(-1), nbc)
+    _dx = np.abs(_x[:, None] - _a[None, :])
+    _dy = np.abs(_y[:, None] - _b[None, :])
+    if not bound:
+        _dx = np.minimum(_dx, nbl - _dx)
+        _dy = np.minimum(_dy, nbc - _dy)
+    return _dx + _dy if vneumann else np.maximum(_dx, _dy)
@@ -6,8 +6,19 @@ __date__ = "15.02.18"
 __version__ = "$Id: mmcContainer.py,v 1.2 2018/03/18 15:08:07 mmc Exp $"
 __usage__ = "Container usuels"
 
+import collections
+import os
 import functools
+import inspect
+import pickle
+import sys
+import tempfile
+import threading
+import time
+import weakref
+import numpy as np
 from tools.mmcTools import signature
+from tools import stockage
 
 #=========================== décorateurs =====================================#
 def intRequired(fun):
@@ -20,40 +31,213 @@ def intRequired(fun):
         return fun(self, v)
     return enveloppe
 #-------------------- déco temps nb appel ------------------------#
+# tous les espions, par nom complet module.qualname
+ESPIONS = {}
+# les appels espionnés en cours, par thread
+_pile = threading.local()
+
 def spy(fn):
+    """ compte les appels de fn et mesure leur durée (perf_counter_ns)
+
+    fn.cpt: le nombre d'appels
+    fn.inclusif: le temps passé dans fn en ns
+    fn.exclusif: le même sans les fonctions espionnées appelées par fn
+    fn.clock: le temps inclusif en secondes
+
+    fn est inscrit dans ESPIONS, cf report et profiler
+    pour une coroutine, le temps mesuré comprend l'attente et
+    exclusif vaut inclusif : des coroutines s'entrelacent
+    """
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def spyed_fn(*args, **kwargs):
+            spyed_fn.cpt += 1
+            _ts = time.perf_counter_ns()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                _dt = time.perf_counter_ns() - _ts
+                spyed_fn.inclusif += _dt
+                spyed_fn.exclusif += _dt
+                spyed_fn.clock = spyed_fn.inclusif * 1e-9
+        return _inscrire(fn, spyed_fn)
+
     @functools.wraps(fn)
     def spyed_fn(*args, **kwargs):
+        _p = getattr(_pile, 'appels', None)
+        if _p is None: _p = _pile.appels = []
         spyed_fn.cpt += 1
-        _ts = time.time()
-        _rep = fn(*args, **kwargs)
-        spyed_fn.clock += time.time() - _ts
-        return _rep
+        spyed_fn.niveau += 1
+        _p.append(0) # le temps des appels fils
+        _ts = time.perf_counter_ns()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _dt = time.perf_counter_ns() - _ts
+            spyed_fn.exclusif += _dt - _p.pop()
+            if _p: _p[-1] += _dt
+            spyed_fn.niveau -= 1
+            # un appel récursif est inclus dans le premier appel
+            if spyed_fn.niveau == 0:
+                spyed_fn.inclusif += _dt
+                spyed_fn.clock = spyed_fn.inclusif * 1e-9
+    return _inscrire(fn, spyed_fn)
+
+def _inscrire(fn, spyed_fn):
+    """ compteurs à 0 et inscription dans ESPIONS """
     spyed_fn.cpt = 0
     spyed_fn.clock = 0
+    spyed_fn.inclusif = 0
+    spyed_fn.exclusif = 0
+    spyed_fn.niveau = 0
+    ESPIONS["{}.{}".format(fn.__module__, fn.__qualname__)] = spyed_fn
     return spyed_fn
 
 def spy_reset(fn):
     """ remet les compteurs à 0 """
-    attrs = "cpt clock".split()
+    attrs = "cpt clock inclusif exclusif".split()
     if all([hasattr(fn, att) for att in attrs]):
         for att in attrs: setattr(fn, att, 0)
 
+def espionner(klass, *noms) -> None:
+    """ espionne les méthodes noms définies par klass elle-même
+    (méthodes, classmethod et staticmethod)
+    """
+    for nom in noms:
+        _m = vars(klass).get(nom)
+        if _m is None: continue
+        if isinstance(_m, (classmethod, staticmethod)):
+            if hasattr(_m.__func__, 'cpt'): continue
+            setattr(klass, nom, type(_m)(spy(_m.__func__)))
+        elif callable(_m) and not hasattr(_m, 'cpt'):
+            setattr(klass, nom, spy(_m))
+
+def releve() -> dict:
+    """ {nom: (appels, inclusif, exclusif)} des espions """
+    return {k: (f.cpt, f.inclusif, f.exclusif) for k, f in ESPIONS.items()}
+
+# les colonnes de report, dans l'ordre des valeurs de releve
+COLONNES = ("appels", "inclusif", "exclusif")
+
+def report(tri: str = "exclusif", mesures: dict = None,
+           fichier=None) -> list:
+    """ affiche le tableau des fonctions espionnées qui ont été appelées
+
+    :tri: une des COLONNES, par ordre décroissant
+    :mesures: un releve, par défaut celui des ESPIONS depuis le début
+    :fichier: la sortie, sys.stdout par défaut
+
+    @return les lignes (nom, appels, inclusif, exclusif), temps en ns
+    """
+    if tri not in COLONNES:
+        raise ValueError("{}: sort key not in {}".format(tri, COLONNES))
+    _d = releve() if mesures is None else mesures
+    _l = sorted(((k,) + tuple(v) for k, v in _d.items() if v[0] > 0),
+                key=lambda x: (-x[1 + COLONNES.index(tri)], x[0]))
+    _w = max([len(x[0]) for x in _l] + [8])
+    _f = "{:<%d} {:>9} {:>12} {:>12} {:>10}" % _w
+    _out = sys.stdout if fichier is None else fichier
+    print(_f.format("fonction", "appels", "incl. ms", "excl. ms",
+                    "moy. us"), file=_out)
+    for nom, n, inc, exc in _l:
+        print(_f.format(nom, n, "{:.3f}".format(inc * 1e-6),
+                        "{:.3f}".format(exc * 1e-6),
+                        "{:.1f}".format(inc * 1e-3 / n)), file=_out)
+    return _l
+
+class profiler:
+    """ ne compte que les appels faits dans un bloc
+
+    with profiler() as p:
+        t.run(100, False)
+    p.report()
+    """
+    def __init__(self):
+        self.__debut = None
+        self.__mesures = None
+    def __enter__(self):
+        self.__debut = releve()
+        self.__mesures = None
+        return self
+    def __exit__(self, *exc):
+        _0 = (0,) * len(COLONNES)
+        self.__mesures = {k: tuple(a - b for a, b in
+                                   zip(v, self.__debut.get(k, _0)))
+                          for k, v in releve().items()}
+        return False
+    @property
+    def mesures(self) -> dict:
+        """ {nom: (appels, inclusif, exclusif)} dans le bloc """
+        return self.__mesures
+    def report(self, tri: str = "exclusif", fichier=None) -> list:
+        if self.__mesures is None:
+            raise RuntimeError("report is available after the block")
+        return report(tri, self.__mesures, fichier)
+
 #-------------------- décorateur memoize -------------------------#
-def memoize(fn):
+# capacité par défaut des caches de memoize
+TAILLE_MEMOIZE = 1024
+
+def memoize(fn=None, *, taille: int = TAILLE_MEMOIZE, instance: bool = False):
     """ Memoize fn: 
          make it remember the computed value for any argument list.
+
+    @memoize ou @memoize(taille=256, instance=True)
+    :taille: au plus taille résultats, les moins récents sont oubliés
+    :instance: pour une méthode, un cache par objet (sans le retenir)
+
+    les résultats faux (None, 0, []) sont mémorisés comme les autres,
+    des arguments non hachables ne passent pas par le cache
+    fn.stats: hits, misses, evictions, taille cumulés
+    fn.invalidate(predicat=None, objet=None): oublie les résultats dont
+      les arguments vérifient predicat(args, kwargs), tous si None ;
+      objet limite au cache d'un seul objet (instance=True)
     """
+    if fn is None:
+        return functools.partial(memoize, taille=taille, instance=instance)
+    _caches = weakref.WeakKeyDictionary() if instance else None
+    _cache = None if instance else LRU(taille)
+    _absent = object()
+
     @functools.wraps(fn)
     def memoized_fn(*args, **kargs):
+        if instance:
+            _c = _caches.get(args[0])
+            if _c is None: _c = _caches[args[0]] = LRU(taille)
+            _args = args[1:]
+        else:
+            _c, _args = _cache, args
+        _key = (_args, tuple(sorted(kargs.items())))
         try:
-            hash(args)
-            _args = args
-        except:
-            _args = repr(args)
-        if not memoized_fn.cache.get(_args, False):
-            memoized_fn.cache[_args] = fn(*args, **kargs)
-        return memoized_fn.cache[_args]
-    memoized_fn.cache = {}
+            _val = _c.get(_key, _absent)
+        except TypeError: # non hachable
+            return fn(*args, **kargs)
+        if _val is _absent:
+            _val = fn(*args, **kargs)
+            _c.put(_key, _val)
+        return _val
+
+    def caches(objet=None) -> list:
+        if not instance: return [_cache]
+        if objet is None: return list(_caches.values())
+        _c = _caches.get(objet)
+        return [] if _c is None else [_c]
+
+    def invalidate(predicat: callable = None, objet=None) -> int:
+        """ @return le nombre de résultats oubliés """
+        _p = None if predicat is None else (lambda k: predicat(k[0],
+                                                               dict(k[1])))
+        return sum(_c.invalidate(_p) for _c in caches(objet))
+
+    def stats(objet=None) -> dict:
+        _d = {'hits': 0, 'misses': 0, 'evictions': 0, 'taille': 0}
+        for _c in caches(objet):
+            for k in _d: _d[k] += _c.stats[k]
+        return _d
+
+    memoized_fn.cache = _cache
+    memoized_fn.invalidate = invalidate
+    memoized_fn.stats = stats
     return memoized_fn
 
 #----------------------- serializing -------------------------------#
@@ -72,7 +256,9 @@ def serialize(Class):
         def load(self):
             monDic = self._load(monFichier)
             if monDic is None: initialiser monDic
-     
+
+    le format est celui de tools.stockage : entête JSON et tableaux
+    numpy, écriture atomique sans question, lecture paresseuse
     """
 
     @classmethod
@@ -80,29 +266,22 @@ def serialize(Class):
         """
         @return True si sauvegarde effectuée, False sinon
         """
-        os = __import__('os')
-        pickle = __import__('pickle')
-        _ok = "oO0Yy"
-        if os.path.isfile(fichier):
-            _ = input("{} exists, save anyway ? [{}] ".format(fichier, _ok))
-            if _ not in _ok: print("saving aborted") ; return False
-        with open(fichier, 'wb') as _f:
-            print("saving ...")
-            pickle.dump(data, _f)
-            _f.close()
+        try:
+            stockage.ecrire(fichier, data)
+        except (OSError, TypeError) as _e:
+            print("saving aborted: {}".format(_e)) ; return False
         return True
     @classmethod
     def load(cls, fichier:str):
         """
         @return None si échec de récupération, un dictionnaire sinon
         """
-        os = __import__('os')
-        pickle = __import__('pickle')
-        if os.path.isfile(fichier):
+        if stockage.estArchive(fichier):
+            return stockage.lire(fichier)
+        elif os.path.isfile(fichier):
+            # ancien format, écrit avec pickle
             with open(fichier, 'rb') as _f:
-                data = pickle.load(_f)
-                _f.close()
-            return data
+                return pickle.load(_f)
         else:
             print("{}: file not found".format(fichier))
             return None
@@ -116,65 +295,67 @@ class MultiSet:
     pas de parametre on crée un ensemble vide
     param peut être un set, une liste/tuple, 
     une chaîne de caractères voire un dictionnaire
+
+    stockage en deux tableaux parallèles : les clefs (une liste) et
+    leurs multiplicités (numpy), la cardinalité est tenue à jour
     """
     def __init__(self, param=None):
         """ filtrage des valeurs en fonction de la nature du paramètre """
-        self.__dic = {}
-        self.__size = None
-        if isinstance(param, set): self.__dic = {x:1 for x in param}
+        self.__cles = []
+        self.__pos = {} # clef -> indice dans les tableaux
+        self.__occ = np.zeros(8, dtype=np.int64)
+        self.__size = 0
+        if isinstance(param, set):
+            for x in param: self.add(x)
         elif isinstance(param, list) or isinstance(param, tuple):
             for val in param:
                 if hasattr(val, '__len__'):
                     if len(val) >= 2 and isinstance(val[1], int) and val[1] > 0:
-                        _occ = self.multiplicity(val[0]) + val[1]
+                        self.add(val[0], val[1])
                     else: 
-                        _occ = self.multiplicity(val[0]) + 1
-                    self.__dic[val[0]] = _occ
+                        self.add(val[0])
                 else:
-                    _occ = self.multiplicity(val) + 1
-                    self.__dic[val] = _occ
+                    self.add(val)
         elif isinstance(param, str):
             _ignoring, _seen = 0, 0
             for val in param:
                 _seen += 1
                 if val.isalpha(): # uniquement les caractères 
-                    _occ = self.multiplicity(val) + 1
-                    self.__dic[val] = _occ
+                    self.add(val)
                 else:
                     _ignoring += 1
             if _ignoring > 0:
                 print("Ignoring {} values out of {}".format(_ignoring, _seen))
         elif isinstance(param, dict):
             for val in param:
-                if isinstance(param[val], int): self.__dic[val] = param[val]
-                else: self.__dic[val] = 1
+                if isinstance(param[val], int): self.add(val, param[val])
+                else: self.add(val)
         elif hasattr(param, '__iter__'):
-            for val in param:
-                self.__dic[val] = self.multiplicity(val) + 1
+            for val in param: self.add(val)
 
         self.compact()
     
     def multiplicity(self, val):
         """ renvoie 0 ou le nombre d'occurences de val > 0 """
-        return max(0, self.__dic.get(val, 0))
+        _i = self.__pos.get(val)
+        return 0 if _i is None else int(self.__occ[_i])
     
     def __repr__(self):
         """ affiche la structure interne """
-        return "{}({})".format(self.__class__.__name__, self.__dic)
+        return "{}({})".format(self.__class__.__name__,
+                               dict(zip(self.__cles, self.__occ.tolist())))
     
     def __str__(self):
         """ affichage à la manière de dictionnaire """
         _str = "{{  \n"
-        for x in self.__dic.keys():
+        for x in self.__cles:
             if self.multiplicity(x) <= 0: continue
-            _str += "  {}:\t{}, \n".format(x, self.__dic[x])
+            _str += "  {}:\t{}, \n".format(x, self.multiplicity(x))
         return _str[:-3]+"}}"
 
     #==== opérations sur les multisets ==================================#
     def __len__(self):
         """ cardinalité """
-        if self.__size is None: #jamais initialisé
-            self.__size = sum(self.multiplicity(x) for x in self)
         return self.__size
     
     def __contains__(self, elem):
@@ -185,50 +366,160 @@ class MultiSet:
     def add(self, x, occ=1):
         """ add occ from multiplicity(x) default add one occ """
         if occ > 0:
-            self.__dic[x] = self.multiplicity(x) + occ
-            if self.__size is not None: self.__size += occ
+            _i = self.__pos.get(x)
+            if _i is None:
+                _i = self.__pos[x] = len(self.__cles)
+                self.__cles.append(x)
+                if _i == self.__occ.size:
+                    self.__occ = np.concatenate([self.__occ,
+                                                 np.zeros_like(self.__occ)])
+            self.__occ[_i] += occ
+            self.__size += occ
             
     def remove(self, x, occ=1):
         """ remove occ from multiplicity(x) default remove one occ """
-        if occ > 0:
-            if self.__size is not None: self.__size -= self.multiplicity(x)
-            self.__dic[x] = self.multiplicity(x) - occ
-            if self.__size is not None: self.__size += self.multiplicity(x)
+        _i = self.__pos.get(x)
+        if occ > 0 and _i is not None:
+            _n = min(occ, int(self.__occ[_i]))
+            self.__occ[_i] -= _n
+            self.__size -= _n
 
     #==== deux itérables ===============================================#
     def __iter__(self):
         """ histoire de rendre MultiSet itérable """
-        for x in self.__dic.keys(): yield x
+        for x in self.__cles: yield x
     
     def elements(self):
         """ itère sur chaque élément en fonction de sa multiplicity """
-        for x in self.__dic.keys():
+        for x in self.__cles:
             _ = 0 ; _occ = self.multiplicity(x) 
             while _ < _occ: yield x ; _ += 1
 
+    #==== tirages ======================================================#
+    def keys(self) -> list:
+        """ les éléments présents, dans l'ordre des indices de classe """
+        return [x for x in self.__cles if self.multiplicity(x) > 0]
+
+    def counts(self) -> np.ndarray:
+        """ les multiplicités, dans l'ordre de keys """
+        _o = self.__occ[:len(self.__cles)]
+        return _o[_o > 0]
+
+    def sample(self, n: int, rng=None) -> np.ndarray:
+        """ n éléments tirés sans remise, dans un ordre aléatoire
+        :rng: np.random.Generator ou RandomState, np.random par défaut
+        @return leurs indices dans keys()
+        """
+        if n > len(self):
+            raise ValueError("cannot draw {} out of {}".format(n, len(self)))
+        _r = np.random if rng is None else rng
+        _o = self.counts()
+        if n == len(self):
+            return _r.permutation(np.repeat(np.arange(_o.size), _o))
+        # chaque rang tiré désigne un élément par son bloc d'occurrences
+        _t = _r.choice(len(self), size=n, replace=False)
+        return np.searchsorted(np.cumsum(_o), _t, side='right')
+
+    def to_class_ids(self, rng=None) -> np.ndarray:
+        """ tous les éléments mélangés, en indices de keys() """
+        return self.sample(len(self), rng)
+
     #==== transtypage  =================================================#
     def toSet(self):
         """ transtypage vers les ensembles """
-        return set( (x, self.__dic[x]) for x in self.__dic.keys()
-                    if self.multiplicity(x) > 0)
+        return set(zip(self.keys(), self.counts().tolist()))
     def toList(self):
         """ transtypage vers list """
-        return [(x,self.__dic[x]) for x in self.__dic.keys()
-                if self.multiplicity(x) > 0]
+        return list(zip(self.keys(), self.counts().tolist()))
     def toDict(self):
         """ transtypage vers dictionnaire """
-        return {x:self.__dic[x] for x in self.__dic.keys()
-                if self.multiplicity(x) > 0}
+        return dict(zip(self.keys(), self.counts().tolist()))
 
     # opérations globales
     def compact(self):
         """ ne garde que les éléments ayant une multiplicity > 0 
             méthode optionnelle
         """
-        _d = {x: self.multiplicity(x)
-              for x in self.__dic if self.multiplicity(x) > 0}
-        self.__dic = _d
-        self.__size = None
+        _k, _o = self.keys(), self.counts()
+        self.__cles = _k
+        self.__pos = {x: i for i, x in enumerate(_k)}
+        self.__occ = np.zeros(max(8, 2 * _o.size), dtype=np.int64)
+        self.__occ[:_o.size] = _o
+
+class LRU:
+    """
+    dictionnaire de capacité bornée, les clefs les moins récemment
+    utilisées sont évincées en premier
+    hits/misses/evictions permettent de dimensionner la capacité
+    """
+    def __init__(self, capacite: int = 128):
+        self.__dic = collections.OrderedDict()
+        self.__capacite = max(0, capacite) if isinstance(capacite, int) else 128
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, self.__capacite)
+
+    def __len__(self):
+        return len(self.__dic)
+
+    def __contains__(self, key):
+        """ appartenance, ne compte ni succès ni échec """
+        return key in self.__dic
+
+    def get(self, key, default=None):
+        """ valeur associée à key, default en cas d'échec """
+        if key in self.__dic:
+            self.__hits += 1
+            self.__dic.move_to_end(key)
+            return self.__dic[key]
+        self.__misses += 1
+        return default
+
+    def put(self, key, val) -> None:
+        """ ajoute ou remplace, évince si la capacité est dépassée """
+        self.__dic[key] = val
+        self.__dic.move_to_end(key)
+        self.__reduce()
+
+    def clear(self) -> None:
+        """ vide le cache, les compteurs sont conservés """
+        self.__dic.clear()
+
+    def invalidate(self, predicat: callable = None) -> int:
+        """ retire les clefs k telles que predicat(k), toutes si None
+        @return le nombre de clefs retirées
+        """
+        _k = [k for k in self.__dic if predicat is None or predicat(k)]
+        for k in _k: del self.__dic[k]
+        return len(_k)
+
+    def __reduce(self):
+        while len(self.__dic) > self.__capacite:
+            self.__dic.popitem(last=False)
+            self.__evictions += 1
+
+    def get_capacite(self) -> int: return self.__capacite
+    def set_capacite(self, v) -> None:
+        if isinstance(v, int) and not isinstance(v, bool) and v >= 0:
+            self.__capacite = v
+            self.__reduce()
+    capacite = property(get_capacite, set_capacite)
+
+    @property
+    def hits(self) -> int: return self.__hits
+    @property
+    def misses(self) -> int: return self.__misses
+    @property
+    def evictions(self) -> int: return self.__evictions
+    @property
+    def stats(self) -> dict:
+        """ compteurs et occupation """
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'taille': len(self),
+                'capacite': self.capacite}
 
 #---------------- gestion de l'historique ----------------------------#
 
@@ -293,6 +584,399 @@ class Historique:
         self.__hist[_key] = data
         self.__hist['last'] = _0+1
 
+# un tour complet (image clef) au moins tous les PERIODE_DELTA tours
+PERIODE_DELTA = 50
+
+class HistoriqueDelta(Historique):
+    """ Un historique où les choix et récompenses des consommateurs
+    ne sont rangés que pour les cases qui ont changé depuis le tour
+    précédent, avec une image clef complète tous les periode tours
+
+    Iter_N est reconstruit exactement en au plus periode étapes
+    """
+    __slots__ = ('__periode', '__prec', '__cases')
+    def __init__(self, data=None, store='my_data', where='Data',
+                 periode: int = PERIODE_DELTA):
+        """ 
+        :data: the value to store, if None backup is provided
+        :store: the filename 
+        :where: the directory
+        :periode: the number of tours between two keyframes
+        """
+        self.__periode = max(1, periode) if isinstance(periode, int) else 1
+        self.__prec = None # (choix, récompenses) du tour précédent
+        self.__cases = [0, 0] # cases rangées, cases vues
+        super().__init__(data, store, where)
+
+    @property
+    def compression(self) -> float:
+        """ proportion des cases effectivement rangées """
+        return self.__cases[0] / max(1, self.__cases[1])
+
+    def __getattr__(self, att):
+        """ Iter_N est décodé, le reste est lu dans le dictionnaire """
+        if att.startswith('Iter_') and att[5:].isdigit():
+            return self.tour(int(att[5:]))
+        return super().__getattr__(att)
+
+    def __brut(self, k: int):
+        return super().__getattr__("Iter_{}".format(k))
+
+    def store(self, data):
+        """ encode le tour puis le range comme Historique """
+        _rec = {k: v for k, v in data.items()
+                if k not in ('consommateur', 'rewardConso')}
+        try:
+            _ch = np.array(data['consommateur'], dtype=float)
+            _r = np.array(data['rewardConso'], dtype=float)
+        except (ValueError, TypeError):
+            # récompenses vectorielles : tour rangé tel quel
+            self.__prec = None
+            self.__cases[0] += len(data['consommateur'])
+            self.__cases[1] += len(data['consommateur'])
+            return super().store(data)
+        _ch = np.nan_to_num(_ch, nan=-1).astype(np.int32)
+        k = (self.last or 0) + 1
+        if self.__prec is None and k > 1:
+            self.__prec = self.__decoder(k - 1)
+        if self.__prec is None or (k - 1) % self.__periode == 0:
+            _rec['_plein'] = _ch, _r
+            self.__cases[0] += _ch.size
+        else:
+            _c0, _r0 = self.__prec
+            with np.errstate(invalid='ignore'):
+                _diff = ((_ch != _c0) |
+                         ((_r != _r0) & ~(np.isnan(_r) & np.isnan(_r0))))
+            _i = np.flatnonzero(_diff).astype(np.int32)
+            _rec['_delta'] = _i, _ch[_i], _r[_i]
+            self.__cases[0] += _i.size
+        self.__cases[1] += _ch.size
+        self.__prec = _ch, _r
+        super().store(_rec)
+
+    def __decoder(self, k: int):
+        """ (choix, récompenses) du tour k, None si tour rangé tel quel """
+        _todo = [] ; j = k
+        while True:
+            _x = self.__brut(j)
+            if _x is None or 'consommateur' in _x: return None
+            if '_plein' in _x: break
+            _todo.append(_x['_delta']) ; j -= 1
+        _ch, _r = (v.copy() for v in _x['_plein'])
+        for _i, _c, _v in reversed(_todo):
+            _ch[_i] = _c ; _r[_i] = _v
+        return _ch, _r
+
+    def tour(self, k: int):
+        """ l'enregistrement du tour k, tel que reçu par store """
+        _x = self.__brut(k)
+        if _x is None or 'consommateur' in _x: return _x
+        _ch, _r = self.__decoder(k)
+        _d = {key: v for key, v in _x.items()
+              if key not in ('_plein', '_delta')}
+        _ch = _ch.tolist()
+        _d['consommateur'] = [None if c < 0 else c for c in _ch]
+        _d['rewardConso'] = [None if c < 0 else v
+                             for c, v in zip(_ch, _r.tolist())]
+        return _d
+
+# nombre de tours gardés en mémoire avant écriture sur disque
+TAMPON_HISTORIQUE = 100
+
+class HistoriqueFlux:
+    """ Un historique dont les tours sont écrits sur disque par paquets
+
+    cfg, initState, finalState, last restent en mémoire
+    les Iter_N sont dans <store>.flux, en ajout seulement, un
+    enregistrement tools.stockage par paquet,
+    au plus tampon tours sont gardés en mémoire
+    """
+    __slots__ = ('__store', '__hist', '__tampon', '__taille',
+                 '__premier', '__index')
+    def __init__(self, data=None, store=None, where='Data',
+                 tampon: int = TAMPON_HISTORIQUE):
+        """ 
+        :data: the value to store, if None backup is provided
+        :store: the filename, None: a new unique one (data) or my_data
+        :where: the directory
+        :tampon: the number of tours kept in memory
+
+        self.save() --> disk storage
+        """
+        if os.path.isdir(where): _0 = where
+        else: _0 = '.'
+        if store is None and data is not None:
+            # le flux s'écrit pendant le run : un fichier par historique
+            _fd, _name = tempfile.mkstemp(prefix="ia1718_", dir=_0)
+            os.close(_fd)
+        else:
+            _name = os.path.join(_0, "ia1718_{}".format(store or 'my_data'))
+        self.__store = _name
+        self.__taille = max(1, tampon) if isinstance(tampon, int) else 1
+        self.__tampon = []
+        self.__index = [] # (premier tour, nombre de tours, offset)
+        self.__hist = {}
+        if data is None:
+            self.__hist = self.load()
+        else:
+            self.__hist['cfg'] = data
+            # nouvelle simulation, l'ancien flux disparaît
+            open(self.fichier, 'wb').close()
+        self.__premier = (self.last or 0) + 1
+
+    def __repr__(self):
+        return "{}({!r}, {})".format(self.__class__.__name__,
+                                     self.__store, self.last)
+    def __str__(self):
+        """ affichage basique, sans les tours """
+        _str = "_"*80+'\n'
+        for k, v in self.__hist.items():
+            _str += "{}:\n{!r}\n".format(k, v)
+            _str += "-"*23+'\n'
+        _str += "_"*80+'\n'
+        return _str
+
+    @property
+    def fichier(self) -> str:
+        """ le fichier des tours """
+        return self.__store + ".flux"
+    @property
+    def tampon(self) -> int: return len(self.__tampon)
+
+    def flush(self) -> None:
+        """ écrit les tours en attente à la fin du flux """
+        if self.__tampon == []: return
+        _off = stockage.ajouter(self.fichier, {'premier': self.__premier,
+                                               'nombre': len(self.__tampon),
+                                               'tours': self.__tampon})
+        self.__index.append((self.__premier, len(self.__tampon), _off))
+        self.__premier += len(self.__tampon)
+        self.__tampon = []
+
+    def save(self):
+        """ vide le tampon et enregistre cfg, initState, finalState, last """
+        self.flush()
+        stockage.ecrire(self.__store, dict(self.__hist))
+    def load(self) -> dict:
+        """ On récupère un dictionnaire existant, le flux est réindexé """
+        _hist = {}
+        if stockage.estArchive(self.__store):
+            _hist = stockage.lire(self.__store)
+        # un paquet incomplet en fin de flux est coupé, les ajouts
+        # suivants restent lisibles
+        self.__index = []
+        _fin = 0
+        for _off in stockage.enregistrements(self.fichier):
+            _x = stockage.lire(self.fichier, _off)
+            self.__index.append((_x['premier'], _x['nombre'], _off))
+            _fin = _off + stockage._entete(self.fichier, _off)['taille']
+        if os.path.isfile(self.fichier) and os.path.getsize(self.fichier) > _fin:
+            os.truncate(self.fichier, _fin)
+        if self.__index:
+            _k, _n, _ = self.__index[-1]
+            _hist['last'] = _k + _n - 1
+        return _hist
+
+    def __getattr__(self, att):
+        """ tout ce qui est dans le dictionnaire est lisible
+        ainsi que chaque Iter_N
+        """
+        if att.startswith('Iter_') and att[5:].isdigit():
+            return self.tour(int(att[5:]))
+        return self.__hist.get(att, None)
+    def tour(self, k: int):
+        """ l'enregistrement du tour k, None s'il n'existe pas """
+        if k >= self.__premier:
+            _i = k - self.__premier
+            return self.__tampon[_i] if _i < len(self.__tampon) else None
+        for _p, _n, _off in self.__index:
+            if _p <= k < _p + _n:
+                return stockage.lire(self.fichier, _off)['tours'][k - _p]
+        return None
+    def tours(self):
+        """ itère sur tous les tours, un paquet à la fois """
+        for _p, _n, _off in self.__index:
+            yield from stockage.lire(self.fichier, _off)['tours']
+        yield from self.__tampon[:]
+
+    def add(self, key, data):
+        """ ajoute un état initState, finalState """
+        if (key in ('initState', 'finalState') and
+            self.__hist.get(key, None) is None):
+            self.__hist[key] = data
+            print("{} created ...".format(key))
+    def update(self, key, data):
+        """ change un initState, finalState s'il existe déjà """
+        if (key in ('initState', 'finalState') and
+            self.__hist.get(key, None) is not None):
+            self.__hist[key] = data
+            print("{} updated ...".format(key))
+    def store(self, data):
+        """ Tient à jour un compteur pour l'itération """
+        self.__tampon.append(data)
+        self.__hist['last'] = (self.last or 0) + 1
+        if len(self.__tampon) >= self.__taille: self.flush()
+
+@serialize
+class HistoriqueColonnes:
+    """ Un historique rangé par colonnes numpy, une ligne par tour
+
+    firmes: positions, prix, quantites, parts (rewardFirme)
+    cases: choix (-1 pour un obstacle), recompenses (np.nan idem)
+    une récompense vectorielle est résumée par son maximum
+    Iter_N reconstruit l'enregistrement du tour N en O(1)
+    """
+    __slots__ = ('__store', '__hist', '__col', '__objets', '__nc')
+    def __init__(self, data=None, store='my_data', where='Data',
+                 tours: int = 64):
+        """ 
+        :data: the value to store (get_structure), if None backup is provided
+        :store: the filename 
+        :where: the directory
+        :tours: initial capacity, doubled when needed
+
+        self.save() --> disk storage
+        """
+        if os.path.isdir(where): _0 = where
+        else: _0 = '.'
+        self.__store = os.path.join(_0, "ia1718_{}".format(store))
+        self.__hist = {}
+        self.__col = {}
+        self.__objets = [] # (firme, contexte) de chaque tour
+        if data is None:
+            _d = self.load()
+            self.__hist = _d.get('hist', {})
+            self.__col = _d.get('colonnes', {})
+            self.__objets = _d.get('objets', [])
+        else:
+            self.__hist['cfg'] = data
+            self.__allouer(max(1, tours))
+        self.__nc = self.cfg['colonnes'] if self.cfg else 1
+
+    def __allouer(self, tours: int) -> None:
+        """ réserve les colonnes pour tours lignes """
+        _f = self.cfg['firmes']
+        _a = self.cfg['lignes'] * self.cfg['colonnes']
+        _forme = {'positions': ((_f,), np.int32, -1),
+                  'prix': ((_f,), float, np.nan),
+                  'quantites': ((_f,), float, np.nan),
+                  'parts': ((_f,), float, np.nan),
+                  'choix': ((_a,), np.int32, -1),
+                  'recompenses': ((_a,), float, np.nan)}
+        _n = len(self.__objets)
+        for key, (sh, dt, v) in _forme.items():
+            _c = np.full((tours,) + sh, v, dtype=dt)
+            if key in self.__col: _c[:_n] = self.__col[key][:_n]
+            self.__col[key] = _c
+
+    def __repr__(self):
+        return "{}({!r}, {})".format(self.__class__.__name__,
+                                     self.__store, self.last)
+    def __str__(self):
+        """ affichage basique, sans les tours """
+        _str = "_"*80+'\n'
+        for k, v in self.__hist.items():
+            _str += "{}:\n{!r}\n".format(k, v)
+            _str += "-"*23+'\n'
+        _str += "_"*80+'\n'
+        return _str
+
+    def save(self):
+        """ On enregistre les colonnes utiles dans un fichier """
+        _n = len(self.__objets)
+        self._save({'hist': self.__hist, 'objets': self.__objets,
+                    'colonnes': {k: v[:_n] for k, v in self.__col.items()}},
+                   self.__store)
+    def load(self) -> dict:
+        """ On récupère un dictionnaire existant """
+        _ = self._load(self.__store)
+        return {} if _ is None else _
+    def __getattr__(self, att):
+        """ tout ce qui est dans le dictionnaire est lisible
+        ainsi que chaque Iter_N
+        """
+        if att.startswith('Iter_') and att[5:].isdigit():
+            return self.tour(int(att[5:]))
+        return self.__hist.get(att, None)
+
+    def add(self, key, data):
+        """ ajoute un état initState, finalState """
+        if (key in ('initState', 'finalState') and
+            self.__hist.get(key, None) is None):
+            self.__hist[key] = data
+            print("{} created ...".format(key))
+    def update(self, key, data):
+        """ change un initState, finalState s'il existe déjà """
+        if (key in ('initState', 'finalState') and
+            self.__hist.get(key, None) is not None):
+            self.__hist[key] = data
+            print("{} updated ...".format(key))
+    def store(self, data):
+        """ range le tour dans la ligne last """
+        k = len(self.__objets)
+        if k == self.__col['parts'].shape[0]: self.__allouer(max(1, 2 * k))
+        _c = self.__col
+        # les firmes qui n'agissent pas gardent position et prix
+        if k > 0:
+            _c['positions'][k] = _c['positions'][k-1]
+            _c['prix'][k] = _c['prix'][k-1]
+        elif self.initState is not None:
+            _c['positions'][k] = self.initState['firm_position']
+        _f = data.get('firme')
+        for i, (xy, p) in (enumerate(_f) if isinstance(_f, list)
+                           else [_f] if _f is not None else []):
+            _c['positions'][k, i] = xy[0] * self.__nc + xy[1]
+            _c['prix'][k, i] = p
+        if data.get('quantites') is not None:
+            _c['quantites'][k] = data['quantites']
+        _c['parts'][k] = data['rewardFirme']
+        _c['choix'][k] = np.nan_to_num(np.array(data['consommateur'],
+                                                dtype=float), nan=-1)
+        try:
+            _c['recompenses'][k] = np.array(data['rewardConso'], dtype=float)
+        except (ValueError, TypeError):
+            _c['recompenses'][k] = [np.nan if x is None else np.nanmax(x)
+                                    for x in data['rewardConso']]
+        self.__objets.append((_f, data.get('contexte')))
+        self.__hist['last'] = k + 1
+
+    def tour(self, k: int):
+        """ l'enregistrement du tour k (à partir de 1), None s'il n'existe pas """
+        if not 1 <= k <= len(self.__objets): return None
+        _c = self.__col ; i = k - 1
+        _f, _ctx = self.__objets[i]
+        _ch = _c['choix'][i].tolist()
+        _r = _c['recompenses'][i].tolist()
+        return {'firme': _f, 'contexte': _ctx,
+                'quantites': _c['quantites'][i].copy(),
+                'rewardFirme': _c['parts'][i].copy(),
+                'consommateur': [None if x < 0 else x for x in _ch],
+                'rewardConso': [None if x < 0 else y
+                                for x, y in zip(_ch, _r)]}
+
+    def __serie(self, key, idx):
+        """ la colonne key jusqu'au dernier tour, en lecture seule """
+        _v = self.__col[key][:len(self.__objets)]
+        if idx is not None: _v = _v[:, idx]
+        _v = _v.view()
+        _v.setflags(write=False)
+        return _v
+    def positions(self, firme=None) -> np.ndarray:
+        """ (tours, firmes) ou (tours,) pour une firme """
+        return self.__serie('positions', firme)
+    def prix(self, firme=None) -> np.ndarray:
+        return self.__serie('prix', firme)
+    def quantites(self, firme=None) -> np.ndarray:
+        return self.__serie('quantites', firme)
+    def parts(self, firme=None) -> np.ndarray:
+        """ les rewardFirme """
+        return self.__serie('parts', firme)
+    def choix(self, case=None) -> np.ndarray:
+        """ (tours, cases) ou (tours,) pour une case, -1 obstacle """
+        return self.__serie('choix', case)
+    def recompenses(self, case=None) -> np.ndarray:
+        return self.__serie('recompenses', case)
+
 #--------------- chainage --------------------------------------------#
 class UnNoeud(object):
     """ noeud pour chainage simple """
@@ -0,0 +1,48 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__version__ = "$Id: observateurs.py,v 1.1 2026/10/18 18:47:30 mmc Exp $"
+__usage__ = "Abonnés usuels aux événements de Terrain.step"
+
+import numpy as np
+
+"""
+Un abonné est une fonction fn(terrain, data), cf Terrain.abonner
+  firme: data = {idx, decision}
+  consommateurs: data = {quantites, consommateur, rewardConso}
+  tour: data = {struct}  l'enregistrement du tour
+
+console(t) rétablit l'affichage d'origine de step
+"""
+
+def afficherFirme(t, data: dict) -> None:
+    """ la décision brute de la firme """
+    (dx, dy), prix = data['decision']
+    _corp = t.getFirme(data['idx'])
+    print("Im {}: mvt {},{}, prix {}".format(_corp.__class__.__name__,
+                                             dx, dy, prix))
+
+def afficherTerrain(t, data: dict) -> None:
+    """ la grille en fin de tour """
+    print(t)
+
+def console(t) -> None:
+    """ abonne t aux affichages console """
+    t.abonner('firme', afficherFirme)
+    t.abonner('tour', afficherTerrain)
+
+class Releve:
+    """ relevé des quantités vendues, un abonné à 'consommateurs'
+    t.abonner('consommateurs', releve)
+    """
+    def __init__(self):
+        self.__qte = []
+    def __call__(self, t, data: dict) -> None:
+        self.__qte.append(np.asarray(data['quantites']).copy())
+    def __len__(self): return len(self.__qte)
+    @property
+    def quantites(self) -> np.ndarray:
+        """ (tours, firmes) """
+        return np.array(self.__qte)
@@ -0,0 +1,280 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+__author__ = "mmc <marc-michel dot corsini at u-bordeaux dot fr>"
+__date__ = "18.10.26"
+__version__ = "$Id: stockage.py,v 1.1 2026/10/18 18:05:12 mmc Exp $"
+__usage__ = "Format binaire versionné pour les historiques"
+
+import collections.abc
+import importlib
+import json
+import os
+import struct
+import tempfile
+import numpy as np
+
+"""
+Un enregistrement est fait de
+  MAGIE (8 octets) | version (uint32) | taille entête (uint64)
+  entête JSON utf-8 | tableaux bruts alignés sur ALIGNEMENT octets
+Les positions des tableaux sont relatives à leur zone,
+un fichier peut donc contenir plusieurs enregistrements à la suite
+(cf ajouter). La lecture projette le fichier en mémoire (memmap) :
+aucun tableau n'est copié, seul ce qui est lu est décodé
+
+Sont acceptés : None, bool, int, float, str, dict, list, tuple, set,
+les tableaux numpy non objets, les générateurs numpy (Generator,
+SeedSequence) et les classes ou fonctions de module
+(rangées par leur nom). Les longues listes de nombres (avec None
+éventuels) sont rangées comme des tableaux
+"""
+
+MAGIE = b"HOTLNG\r\n"
+VERSION = 1
+ALIGNEMENT = 64
+_TETE = struct.Struct("<8sIQ")
+# à partir de cette taille une liste de nombres devient un tableau
+SEUIL_LISTE = 16
+
+#========================== codage ===========================================#
+def _nombres(x: list):
+    """ 'i' ou 'f' si x ne contient que des entiers (resp. réels) ou None """
+    _k = None
+    for v in x:
+        if v is None: continue
+        if isinstance(v, (bool, np.bool_)): return None
+        if isinstance(v, (int, np.integer)): _t = 'i'
+        elif isinstance(v, (float, np.floating)): _t = 'f'
+        else: return None
+        if _k is None: _k = _t
+        elif _k != _t: return None
+    return _k
+
+def _coder(x, tableaux: list):
+    """ noeud JSON de x, les tableaux sont ajoutés à tableaux """
+    if x is None or isinstance(x, (bool, str)): return x
+    if isinstance(x, np.bool_): return bool(x)
+    if isinstance(x, (int, np.integer)): return int(x)
+    if isinstance(x, (float, np.floating)): return float(x)
+    if isinstance(x, np.ndarray):
+        if x.dtype.hasobject:
+            raise TypeError("object arrays are not supported")
+        tableaux.append(np.ascontiguousarray(x))
+        return {'a': len(tableaux) - 1}
+    if isinstance(x, dict):
+        return {'d': [[_coder(k, tableaux), _coder(v, tableaux)]
+                      for k, v in x.items()]}
+    if isinstance(x, list):
+        _k = _nombres(x) if len(x) >= SEUIL_LISTE else None
+        if _k is not None:
+            _none = np.array([v is None for v in x])
+            _v = np.array([0 if v is None else v for v in x],
+                          dtype=np.int64 if _k == 'i' else float)
+            return {'la': _coder(_v, tableaux),
+                    'n': _coder(_none, tableaux) if _none.any() else None}
+        return {'l': [_coder(v, tableaux) for v in x]}
+    if isinstance(x, tuple): return {'t': [_coder(v, tableaux) for v in x]}
+    if isinstance(x, (set, frozenset)):
+        return {'s': [_coder(v, tableaux) for v in x]}
+    if isinstance(x, np.random.Generator):
+        return {'g': _coder(x.bit_generator.state, tableaux)}
+    if isinstance(x, np.random.SeedSequence):
+        return {'q': _coder((x.entropy, x.spawn_key, x.pool_size), tableaux)}
+    if isinstance(x, type) or callable(x):
+        _n = "{}:{}".format(x.__module__, x.__qualname__)
+        if '<' in _n: raise TypeError("{}: cannot be named".format(_n))
+        return {'c': _n}
+    raise TypeError("{} is not serializable".format(type(x).__name__))
+
+def _nommer(nom: str):
+    """ la classe ou fonction nom, ValueError si introuvable """
+    _m, _q = nom.split(':')
+    try:
+        _x = importlib.import_module(_m)
+        for _a in _q.split('.'): _x = getattr(_x, _a)
+        return _x
+    except Exception as _e:
+        raise ValueError("{}: class or function not found ({})"
+                         .format(nom, _e)) from _e
+
+def _decoder(n, tableaux: list):
+    if not isinstance(n, dict): return n
+    if 'a' in n: return tableaux[n['a']]
+    if 'd' in n: return {_decoder(k, tableaux): _decoder(v, tableaux)
+                         for k, v in n['d']}
+    if 'la' in n:
+        _v = _decoder(n['la'], tableaux).tolist()
+        if n['n'] is not None:
+            for i in np.flatnonzero(_decoder(n['n'], tableaux)).tolist():
+                _v[i] = None
+        return _v
+    if 'l' in n: return [_decoder(v, tableaux) for v in n['l']]
+    if 't' in n: return tuple(_decoder(v, tableaux) for v in n['t'])
+    if 's' in n: return set(_decoder(v, tableaux) for v in n['s'])
+    if 'c' in n: return _nommer(n['c'])
+    if 'g' in n:
+        _e = detacher(_decoder(n['g'], tableaux))
+        _b = getattr(np.random, _e['bit_generator'])()
+        _b.state = _e
+        return np.random.Generator(_b)
+    if 'q' in n:
+        _e, _k, _p = _decoder(n['q'], tableaux)
+        return np.random.SeedSequence(_e, spawn_key=_k, pool_size=_p)
+    raise ValueError("unknown node {}".format(sorted(n)))
+
+def _aligner(n: int) -> int:
+    return -(-n // ALIGNEMENT) * ALIGNEMENT
+
+def _octets(data) -> bytes:
+    """ l'enregistrement complet de data """
+    _t = []
+    _n = _coder(data, _t)
+    _meta = [] ; _off = 0 # positions relatives à la zone des tableaux
+    for a in _t:
+        _meta.append({'dtype': a.dtype.str, 'shape': list(a.shape),
+                      'offset': _off})
+        _off += _aligner(a.nbytes)
+    _h = json.dumps({'version': VERSION, 'longueur': _off,
+                     'tableaux': _meta, 'data': _n}).encode()
+    _base = _aligner(_TETE.size + len(_h))
+    _out = bytearray(_base + _off)
+    _out[:_TETE.size] = _TETE.pack(MAGIE, VERSION, len(_h))
+    _out[_TETE.size:_TETE.size + len(_h)] = _h
+    for m, a in zip(_meta, _t):
+        _out[_base + m['offset']:_base + m['offset'] + a.nbytes] = a.tobytes()
+    return bytes(_out)
+
+#========================== objets ===========================================#
+def etatObjet(objet) -> dict:
+    """ les attributs de objet, sauf les fonctions : elles viennent de
+    la configuration (ex: la fonction de coût) et ne sont pas rangées
+    """
+    if not hasattr(objet, '__dict__'):
+        raise TypeError("{}: no __dict__".format(type(objet).__name__))
+    return {k: v for k, v in vars(objet).items()
+            if isinstance(v, type) or not callable(v)}
+
+def objetDepuis(klass, etat: dict, objet=None):
+    """ objet, ou un nouvel objet de klass sans appel à __init__,
+    dont les attributs sont mis à jour par etat
+    """
+    if objet is None or type(objet) is not klass:
+        objet = klass.__new__(klass)
+    objet.__dict__.update(detacher(etat))
+    return objet
+
+def detacher(x):
+    """ copie de x sans vue sur un fichier projeté en mémoire """
+    if isinstance(x, np.ndarray): return np.array(x)
+    if isinstance(x, collections.abc.Mapping):
+        return {k: detacher(v) for k, v in x.items()}
+    if isinstance(x, list): return [detacher(v) for v in x]
+    if isinstance(x, tuple): return tuple(detacher(v) for v in x)
+    return x
+
+#========================== fichiers =========================================#
+def ecrire(fichier: str, data) -> None:
+    """ écriture atomique, sans question, d'un enregistrement """
+    _d = os.path.dirname(os.path.abspath(fichier))
+    _fd, _tmp = tempfile.mkstemp(dir=_d, prefix=".tmp_")
+    try:
+        with os.fdopen(_fd, 'wb') as _f:
+            _f.write(_octets(data))
+            _f.flush()
+            os.fsync(_f.fileno())
+        os.replace(_tmp, fichier)
+    except BaseException:
+        if os.path.exists(_tmp): os.remove(_tmp)
+        raise
+
+def ajouter(fichier: str, data) -> int:
+    """ ajoute un enregistrement en fin de fichier
+    @return sa position dans le fichier
+    """
+    with open(fichier, 'ab') as _f:
+        _off = _f.tell()
+        _f.write(_octets(data))
+    return _off
+
+def estArchive(fichier: str) -> bool:
+    """ True si fichier commence par un enregistrement """
+    if not os.path.isfile(fichier): return False
+    with open(fichier, 'rb') as _f: return _f.read(len(MAGIE)) == MAGIE
+
+def _entete(fichier: str, debut: int) -> dict:
+    """ l'entête de l'enregistrement en debut, None si incomplet """
+    with open(fichier, 'rb') as _f:
+        _f.seek(debut)
+        _b = _f.read(_TETE.size)
+        if len(_b) < _TETE.size: return None
+        _m, _v, _l = _TETE.unpack(_b)
+        if _m != MAGIE: raise ValueError("{}: not an archive".format(fichier))
+        if _v > VERSION:
+            raise ValueError("{}: version {} unsupported".format(fichier, _v))
+        _h = _f.read(_l)
+        if len(_h) < _l: return None
+    _h = json.loads(_h.decode())
+    _h['debut'] = _aligner(_TETE.size + _l) # la zone des tableaux
+    _h['taille'] = _h['debut'] + _h['longueur']
+    if debut + _h['taille'] > os.path.getsize(fichier): return None
+    return _h
+
+def enregistrements(fichier: str):
+    """ itère sur les positions des enregistrements complets """
+    if not os.path.isfile(fichier): return
+    _off = 0
+    while True:
+        _h = _entete(fichier, _off)
+        if _h is None: return
+        yield _off
+        _off += _h['taille']
+
+def lire(fichier: str, debut: int = 0):
+    """ l'enregistrement en debut, projeté en mémoire
+    un dictionnaire donne une Archive, décodée clef par clef
+    """
+    _h = _entete(fichier, debut)
+    if _h is None: raise ValueError("{}: truncated record".format(fichier))
+    if _h['longueur'] > 0:
+        _buf = np.memmap(fichier, dtype=np.uint8, mode='r',
+                         offset=debut + _h['debut'],
+                         shape=(_h['longueur'],))
+    else:
+        _buf = np.empty(0, dtype=np.uint8)
+    _t = [_buf[m['offset']:m['offset'] +
+               int(np.prod(m['shape'])) * np.dtype(m['dtype']).itemsize]
+          .view(np.dtype(m['dtype'])).reshape(m['shape'])
+          for m in _h['tableaux']]
+    _n = _h['data']
+    if isinstance(_n, dict) and 'd' in _n: return Archive(_n['d'], _t)
+    return _decoder(_n, _t)
+
+class Archive(collections.abc.MutableMapping):
+    """ dictionnaire lu sur disque, chaque valeur est décodée à la
+    première lecture, les tableaux sont des vues en lecture seule
+    """
+    def __init__(self, paires: list, tableaux: list):
+        self.__noeuds = {_decoder(k, tableaux): v for k, v in paires}
+        self.__tableaux = tableaux
+        self.__valeurs = {}
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, list(self))
+    def __getitem__(self, key):
+        if key not in self.__valeurs:
+            if key not in self.__noeuds: raise KeyError(key)
+            self.__valeurs[key] = _decoder(self.__noeuds[key],
+                                           self.__tableaux)
+        return self.__valeurs[key]
+    def __setitem__(self, key, v):
+        self.__valeurs[key] = v
+    def __delitem__(self, key):
+        if key not in self: raise KeyError(key)
+        self.__valeurs.pop(key, None)
+        self.__noeuds.pop(key, None)
+    def __iter__(self):
+        yield from self.__noeuds
+        for k in self.__valeurs:
+            if k not in self.__noeuds: yield k
+    def __len__(self):
+        return len(set(self.__noeuds).union(self.__valeurs))